@@ -1,85 +1,194 @@
-from flask import Flask, render_template, jsonify, request, current_app, redirect, url_for
+from flask import Flask, Response, g, render_template, jsonify, request, current_app, redirect, url_for
 import os
 import json
+import hmac
+import logging
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from urllib.parse import parse_qsl
 from models.data_processor import DataProcessor
+from models.downsampling import downsample_records
+from models.attribution import SORT_FIELDS as ATTRIBUTION_SORT_FIELDS
+from models.performance_metrics import compute_metrics
+from models.rolling_metrics import WINDOWS as ROLLING_WINDOWS
+from models.trade_index import TradeLogIndex
+from models.jobs import JobPending, JobScheduler
+from models import memory, telemetry
+from models.logs import configure_logging
 from functools import lru_cache
 import time
 from flask_cors import CORS
 
+configure_logging()
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app)
 data_processor = DataProcessor(data_dir='data')
 
-# Add an in-memory cache with expiration
-cache = {}
+# Simulation files are generated by background jobs; requests that need a
+# file that is not ready get a "pending" response instead of waiting for it
+jobs = JobScheduler(workers=int(os.environ.get('FIVETEN_JOB_WORKERS', 1)))
+data_processor.jobs = jobs
+PENDING_RETRY_AFTER = 2  # seconds
+
+# Add an in-memory cache with expiration, bounded to the most recently used entries
+cache = OrderedDict()
 CACHE_TIMEOUT = 60  # seconds
+CACHE_MAX_ENTRIES = int(os.environ.get('FIVETEN_RESPONSE_CACHE', 256))
+
+# Trade log page sizes
+TRADE_LOG_DEFAULT_LIMIT = 50
+TRADE_LOG_MAX_LIMIT = 500
+
+# Chart series are downsampled on the server to keep payloads bounded
+CHART_DEFAULT_POINTS = 1000
+CHART_MIN_POINTS = 10
+CHART_MAX_POINTS = 5000
+
+# Returned by lookup_cache when there is no fresh entry
+CACHE_MISS = object()
+
+# A data API request resolved from its query parameters: the cache key, the
+# loader (and its arguments) producing the JSON payload, the payload to fall
+# back to on errors and the (mode, period) simulation artifact it reads.
+ApiCall = namedtuple('ApiCall', ['cache_key', 'loader', 'args', 'default', 'artifact'])
+
+def lookup_cache(key):
+    """Return the cached data for key if it has not expired, otherwise CACHE_MISS."""
+    entry = cache.get(key)
+    if entry is not None and time.time() - entry['timestamp'] < CACHE_TIMEOUT:
+        try:
+            cache.move_to_end(key)
+        except KeyError:
+            pass  # Evicted by another request since
+        return entry['data']
+    return CACHE_MISS
 
-def get_cached_data(key, callback, *args, **kwargs):
+def get_cached_data(key, callback, *args, default=None, **kwargs):
     """Simple cache implementation with timeout"""
     current_time = time.time()
-    if key in cache and current_time - cache[key]['timestamp'] < CACHE_TIMEOUT:
-        return cache[key]['data']
+    data = lookup_cache(key)
+    if data is not CACHE_MISS:
+        telemetry.record_cache_event('app', 'hit')
+        return data
+    telemetry.record_cache_event('app', 'miss')
     
     try:
         # Call the function to get fresh data
         data = callback(*args, **kwargs)
         
-        # Store in cache
+        # Store in cache, replacing any expired entry and dropping the least recently used
+        if key in cache:
+            telemetry.record_cache_event('app', 'eviction')
         cache[key] = {
             'data': data,
             'timestamp': current_time
         }
+        cache.move_to_end(key)
+        while len(cache) > CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+            telemetry.record_cache_event('app', 'eviction')
         
         return data
+    except JobPending:
+        raise
     except Exception as e:
-        print(f"Error retrieving data for {key}: {e}")
+        logger.error("Error retrieving data for %s: %s", key, e)
         # If there was a cached version, use it even if expired
-        if key in cache:
-            print(f"Using expired cache for {key}")
-            return cache[key]['data']
+        entry = cache.get(key)
+        if entry is not None:
+            logger.debug("Using expired cache for %s", key)
+            return entry['data']
+        if default is not None:
+            return default
         # Otherwise return a default value (empty list or dict)
         return [] if key.startswith(('performance_history', 'trade_log', 'distribution')) else {}
 
+def run_api_call(call):
+    """Produce the payload for an API call, answering from the cache when possible."""
+    return get_cached_data(call.cache_key, call.loader, *call.args, default=call.default)
+
+def pending_job(call):
+    """The job generating the simulation file an API call needs, or None if the call can be served now."""
+    if call.artifact is None or lookup_cache(call.cache_key) is not CACHE_MISS:
+        return None
+    return data_processor.request_artifact(*call.artifact)
+
+def pending_payload(job):
+    """The body of a response to a request waiting on a job."""
+    return {'status': 'pending', 'job': job.to_dict()}
+
+def serve_api_call(build_call):
+    """Resolve an API call from the current Flask request and return its JSON response."""
+    try:
+        call = build_call(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    job = pending_job(call)
+    if job is None:
+        try:
+            return jsonify(run_api_call(call))
+        except JobPending as e:
+            job = e.job
+    return jsonify(pending_payload(job)), 202, {'Retry-After': str(PENDING_RETRY_AFTER)}
+
 # Initialize data before server starts
 def initialize_data():
-    """Initialize data before starting the server."""
+    """
+    Initialize data before starting the server.
+    
+    Simulation files that are missing or cannot be continued on the current
+    market data (see DataProcessor.stale_artifacts) are regenerated by
+    background jobs, which are returned; until they are done the data API
+    answers "pending" for those files. The other files, including rolled-forward
+    ones and those left out of a partial roll-forward, are kept.
+    """
     # Create data directory if it doesn't exist
     if not os.path.exists('data'):
         os.makedirs('data')
     
     # Clear the cache
-    global cache
-    cache = {}
-    
-    # First, generate and cache market data (done only once)
-    print("Checking for cached market data...")
-    data_processor.generate_and_cache_market_data()
-    
-    # Force regeneration of all simulation modes to use the updated date range
-    print("Generating simulation data files for all periods...")
-    
-    # Generate separate files for each period (all, 2000, covid) and each mode
-    periods = ['all', '2000', 'covid']
-    for mode in data_processor.simulation_params:
-        for period in periods:
-            print(f"Generating {period} period data for {mode} mode...")
-            file_path = data_processor.get_simulation_file(mode, period)
-            
-            # Remove existing file
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    print(f"Removed existing file: {file_path}")
-                except Exception as e:
-                    print(f"Warning: Could not remove {file_path}: {e}")
-            
-            # Generate new data
-            data_processor.generate_period_simulation_data(period, mode)
-    
-    print("Data generation complete.")
+    if cache:
+        telemetry.CACHE_EVENTS.inc('app', 'eviction', amount=len(cache))
+    cache.clear()
+    
+    stale = data_processor.stale_artifacts()
+    if not stale:
+        logger.info("All simulation files can be continued from cutoff date %s", data_processor.cutoff_date)
+        return []
+    for mode, period in stale:
+        logger.info("Simulation file for %s period, %s mode is missing or does not match cutoff date %s",
+                    period, mode, data_processor.cutoff_date)
+    
+    # One job per group of periods missing the same modes; each job is a single
+    # pass over the market data, which is generated and cached first if needed
+    periods_by_modes = {}
+    for period in data_processor.PERIOD_START_DATES:
+        modes = tuple(mode for mode, stale_period in stale if stale_period == period)
+        if modes:
+            periods_by_modes.setdefault(modes, []).append(period)
+    return [data_processor.submit_generation(list(modes), periods,
+                                             description=f"Generate {len(modes) * len(periods)} simulations at startup")
+            for modes, periods in periods_by_modes.items()]
 
 # Call initialize data at startup
-initialize_data()
+startup_jobs = initialize_data()
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started for the latency histogram."""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and record its latency under its route rule."""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        telemetry.observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+    return response
 
 @app.route('/')
 def index():
@@ -91,182 +200,373 @@ def dashboard():
     """Render the dashboard page."""
     return render_template('index.html')
 
-@app.route('/api/performance_history')
-def get_performance_history():
-    """API endpoint to get performance history."""
+def get_max_points_arg(args):
+    """Read the max_points query parameter, clamped to the chart point limits."""
     try:
-        simulation_mode = request.args.get('mode', 'default')
-        timeline = request.args.get('timeline', 'all')
-        period = request.args.get('period', 'all')  # New parameter for period (all, 2000, covid)
-        
-        print(f"Fetching performance history for mode={simulation_mode}, period={period}, timeline={timeline}")
+        max_points = int(args.get('max_points', CHART_DEFAULT_POINTS))
+    except ValueError:
+        max_points = CHART_DEFAULT_POINTS
+    return max(CHART_MIN_POINTS, min(max_points, CHART_MAX_POINTS))
+
+def load_performance_history(simulation_mode, period, timeline, max_points, benchmark=False):
+    """
+    Load the performance history for a mode/period/timeline, downsampled for charting.
+    
+    With benchmark=True every point also carries the equal-weight buy-and-hold
+    and cash benchmark values of the same date.
+    """
+    # For period=all, filter by timeline
+    # For period=2000 or period=covid, get data for that specific period
+    if period in ['2000', 'covid']:
+        # Get data from period-specific file
+        data = data_processor.get_current_data_for_period(period, simulation_mode)
+        # Apply timeline filtering if needed
+        if timeline != 'all':
+            data = data_processor.filter_by_timeline(data, timeline)
+    else:
+        # Use merged performance history with timeline filtering
+        data = data_processor.get_merged_performance_data(simulation_mode, timeline)
+    history = data.get('performance_history', [])
+    
+    if not history:
+        logger.warning("Empty performance history returned for %s/%s/%s", simulation_mode, period, timeline)
+        return []
+    
+    # Ensure the data is sorted by date
+    history = sorted(history, key=lambda x: x['date'])
+    points = downsample_records(history, max_points, ['portfolio_value'], method='lttb')
+    
+    if benchmark:
+        benchmarks = {entry['date']: entry for entry in data.get('benchmark_history', [])}
+        points = [
+            dict(point,
+                 benchmark_equal_weight=benchmarks[point['date']]['equal_weight'],
+                 benchmark_cash=benchmarks[point['date']]['cash'])
+            if point['date'] in benchmarks else point
+            for point in points
+        ]
+    
+    logger.debug("Prepared %s of %s data points for %s/%s/%s", len(points), len(history), simulation_mode, period, timeline)
+    return points
+
+def performance_history_call(args):
+    """
+    Resolve a performance history request.
+    
+    The series is downsampled on the server to at most max_points points
+    (default CHART_DEFAULT_POINTS) so the payload stays bounded. benchmark=1
+    adds the equal-weight buy-and-hold and cash benchmarks to every point.
+    """
+    simulation_mode = args.get('mode', 'default')
+    timeline = args.get('timeline', 'all')
+    period = args.get('period', 'all')  # New parameter for period (all, 2000, covid)
+    max_points = get_max_points_arg(args)
+    benchmark = args.get('benchmark', '0').lower() in ('1', 'true', 'yes')
+    
+    return ApiCall(
+        cache_key=f"performance_history_{simulation_mode}_{period}_{timeline}_{max_points}_{benchmark}",
+        loader=load_performance_history,
+        args=(simulation_mode, period, timeline, max_points, benchmark),
+        default=[],
+        artifact=(simulation_mode, period)
+    )
+
+def load_trade_log_page(simulation_mode, period, filters, cursor, limit, descending):
+    """Load one page of the trade log from the artifact's trade log index."""
+    index = data_processor.get_trade_log_index(simulation_mode, period)
+    trades, next_cursor = index.query(
+        cursor=cursor,
+        limit=limit,
+        descending=descending,
+        **filters
+    )
+    return {
+        'trades': trades,
+        'next_cursor': next_cursor,
+        'limit': limit
+    }
+
+def trade_log_call(args):
+    """
+    Resolve a request for one page of the trade log.
+    
+    Query parameters: mode, period, timeline, symbol, action (BUY/SELL),
+    start_date, end_date, order (desc/asc), limit and cursor. The response
+    carries a next_cursor to pass back for the following page.
+    """
+    simulation_mode = args.get('mode', 'default')
+    timeline = args.get('timeline', 'all')
+    period = args.get('period', 'all')  # New parameter for period
+    symbol = args.get('symbol') or None
+    action = args.get('action') or None
+    start_date = args.get('start_date') or None
+    end_date = args.get('end_date') or None
+    cursor = args.get('cursor') or None
+    descending = args.get('order', 'desc') != 'asc'
+    
+    try:
+        limit = int(args.get('limit', TRADE_LOG_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    limit = max(1, min(limit, TRADE_LOG_MAX_LIMIT))
+    
+    if symbol:
+        symbol = symbol.upper()
+    if action:
+        action = action.upper()
+        if action not in TradeLogIndex.ACTIONS:
+            raise ValueError(f"Invalid action: {action!r}")
+    if cursor:
+        TradeLogIndex.decode_cursor(cursor)
+    
+    # The timeline only narrows the date range
+    timeline_start = data_processor.get_timeline_start_date(timeline)
+    if timeline_start and (start_date is None or timeline_start > start_date):
+        start_date = timeline_start
+    
+    filters = {
+        'symbol': symbol,
+        'action': action,
+        'start_date': start_date,
+        'end_date': end_date
+    }
+    return ApiCall(
+        cache_key=(f"trade_log_{simulation_mode}_{period}_{symbol}_{action}_{start_date}_{end_date}_"
+                   f"{cursor}_{limit}_{descending}"),
+        loader=load_trade_log_page,
+        args=(simulation_mode, period, filters, cursor, limit, descending),
+        default={'trades': [], 'next_cursor': None, 'limit': 0},
+        artifact=(simulation_mode, period)
+    )
+
+def load_portfolio(simulation_mode, period):
+    """Load the current capital and holdings for a mode/period."""
+    if period in ['2000', 'covid']:
+        # Get data from period-specific file
+        data = data_processor.get_current_data_for_period(period, simulation_mode)
+        portfolio = {
+            'capital': data.get('capital', 0),
+            'portfolio': data.get('portfolio', {})
+        }
+    else:
+        # Use standard approach
+        portfolio = data_processor.get_current_portfolio(simulation_mode)
+    
+    return portfolio if portfolio else {'capital': 0, 'portfolio': {}}
+
+def portfolio_call(args):
+    """Resolve a request for the current portfolio state."""
+    simulation_mode = args.get('mode', 'default')
+    period = args.get('period', 'all')  # New parameter for period
+    
+    return ApiCall(
+        cache_key=f"portfolio_{simulation_mode}_{period}",
+        loader=load_portfolio,
+        args=(simulation_mode, period),
+        default={'capital': 0, 'portfolio': {}},
+        artifact=(simulation_mode, period)
+    )
+
+def load_metrics(simulation_mode, period, timeline):
+    """Load the performance metrics for a mode/period/timeline."""
+    if period in ['2000', 'covid']:
+        # Get data from period-specific file
+        data = data_processor.get_current_data_for_period(period, simulation_mode)
+        # Apply timeline filtering if needed
+        if timeline != 'all':
+            data = data_processor.filter_by_timeline(data, timeline)
         
-        cache_key = f"performance_history_{simulation_mode}_{period}_{timeline}"
+        # Always start with $1M for these periods
+        metrics = compute_metrics(data.get('performance_history', []),
+                                  trade_log=data.get('trade_log', []),
+                                  starting_value=1000000)
+    else:
+        # Use standard approach
+        metrics = data_processor.get_performance_metrics(simulation_mode, timeline)
+    
+    return metrics if metrics else {}
+
+def metrics_call(args):
+    """Resolve a request for performance metrics."""
+    simulation_mode = args.get('mode', 'default')
+    timeline = args.get('timeline', 'all')
+    period = args.get('period', 'all')  # New parameter for period
+    
+    return ApiCall(
+        cache_key=f"metrics_{simulation_mode}_{period}_{timeline}",
+        loader=load_metrics,
+        args=(simulation_mode, period, timeline),
+        default={},
+        artifact=(simulation_mode, period)
+    )
+
+def load_distribution(simulation_mode, period, timeline, max_points):
+    """Load the cash/equity distribution for a mode/period/timeline, downsampled for charting."""
+    if period in ['2000', 'covid']:
+        # Get data from period-specific file
+        data = data_processor.get_current_data_for_period(period, simulation_mode)
+        # Apply timeline filtering if needed
+        if timeline != 'all':
+            data = data_processor.filter_by_timeline(data, timeline)
         
-        # Try to get data from the processor
-        try:
-            # For period=all, filter by timeline
-            # For period=2000 or period=covid, get data for that specific period
-            if period in ['2000', 'covid']:
-                # Get data from period-specific file
-                data = data_processor.get_current_data_for_period(period, simulation_mode)
-                # Apply timeline filtering if needed
-                if timeline != 'all':
-                    data = data_processor.filter_by_timeline(data, timeline)
-                history = data.get('performance_history', [])
-            else:
-                # Use merged performance history with timeline filtering
-                history = data_processor.get_merged_performance_history(simulation_mode, timeline)
-            
-            if not history:
-                print(f"Warning: Empty performance history returned for {simulation_mode}/{period}/{timeline}")
-        except Exception as e:
-            print(f"Error getting performance history directly: {e}")
-            # Fall back to cached data or an empty list
-            history = cache.get(cache_key, {}).get('data', []) if cache_key in cache else []
+        # Extract distribution data
+        history = data.get('performance_history', [])
         
-        # Ensure the data is sorted by date
-        if history:
+        distribution = []
+        for entry in history:
+            distribution.append({
+                'date': entry['date'],
+                'cash': entry.get('cash', 0),
+                'equity': entry['portfolio_value'] - entry.get('cash', 0),
+                'total': entry['portfolio_value']
+            })
+    else:
+        # Use standard approach
+        distribution = data_processor.get_portfolio_distribution(simulation_mode, timeline)
+    
+    # Keep the extremes of both stacked series
+    return downsample_records(distribution, max_points, ['cash', 'equity'], method='minmax')
+
+def distribution_call(args):
+    """Resolve a request for the cash/equity distribution, downsampled to max_points."""
+    simulation_mode = args.get('mode', 'default')
+    timeline = args.get('timeline', 'all')
+    period = args.get('period', 'all')  # New parameter for period
+    max_points = get_max_points_arg(args)
+    
+    return ApiCall(
+        cache_key=f"distribution_{simulation_mode}_{period}_{timeline}_{max_points}",
+        loader=load_distribution,
+        args=(simulation_mode, period, timeline, max_points),
+        default=[],
+        artifact=(simulation_mode, period)
+    )
+
+def load_rolling_metrics(simulation_mode, period, timeline, windows, max_points):
+    """Load rolling volatility, Sharpe and maximum drawdown series for a mode/period/timeline."""
+    analyzer = data_processor.get_rolling_analyzer(simulation_mode, period)
+    start_date = data_processor.get_timeline_start_date(timeline)
+    
+    series = {}
+    for window in windows:
+        points = analyzer.get_series(window, start_date)
+        series[window] = downsample_records(points, max_points, ['volatility', 'sharpe_ratio', 'max_drawdown'],
+                                            method='minmax')
+    return series
+
+def rolling_metrics_call(args):
+    """
+    Resolve a request for rolling-window metrics.
+    
+    Query parameters: mode, period, timeline, window (3m, 6m, 12m or a
+    comma-separated list; all of them by default) and max_points.
+    """
+    simulation_mode = args.get('mode', 'default')
+    timeline = args.get('timeline', 'all')
+    period = args.get('period', 'all')
+    max_points = get_max_points_arg(args)
+    
+    windows = [window.strip() for window in args.get('window', ','.join(ROLLING_WINDOWS)).split(',') if window.strip()]
+    for window in windows:
+        if window not in ROLLING_WINDOWS:
+            raise ValueError(f"Invalid window: {window!r}")
+    
+    return ApiCall(
+        cache_key=f"rolling_metrics_{simulation_mode}_{period}_{timeline}_{','.join(windows)}_{max_points}",
+        loader=load_rolling_metrics,
+        args=(simulation_mode, period, timeline, tuple(windows), max_points),
+        default={},
+        artifact=(simulation_mode, period)
+    )
+
+def load_attribution(simulation_mode, period, start_date, end_date, sort, limit):
+    """Load per-symbol P&L attribution over a date range."""
+    index = data_processor.get_attribution_index(simulation_mode, period)
+    return index.query(start_date=start_date, end_date=end_date, sort=sort, limit=limit)
+
+def attribution_call(args):
+    """
+    Resolve a request for per-symbol P&L attribution.
+    
+    Query parameters: mode, period, timeline, start_date, end_date (YYYY-MM-DD),
+    sort (one of attribution.SORT_FIELDS) and limit.
+    """
+    simulation_mode = args.get('mode', 'default')
+    timeline = args.get('timeline', 'all')
+    period = args.get('period', 'all')
+    start_date = args.get('start_date') or None
+    end_date = args.get('end_date') or None
+    sort = args.get('sort', 'total_pnl')
+    
+    for value in (start_date, end_date):
+        if value:
             try:
-                history = sorted(history, key=lambda x: x['date'])
-                print(f"Successfully prepared {len(history)} data points for {simulation_mode}/{period}/{timeline}")
-            except Exception as sorting_error:
-                print(f"Error sorting history data: {sorting_error}")
-        else:
-            print("Returning empty history list")
-            
-        return jsonify(history)
-    except Exception as e:
-        print(f"Critical error in performance_history endpoint: {e}")
-        return jsonify([])
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"Invalid date: {value!r}")
+    if sort not in ATTRIBUTION_SORT_FIELDS:
+        raise ValueError(f"Invalid sort field: {sort!r}")
+    
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = max(1, int(limit))
+        except ValueError:
+            raise ValueError('limit must be an integer')
+    
+    # The timeline only narrows the date range
+    timeline_start = data_processor.get_timeline_start_date(timeline)
+    if timeline_start and (start_date is None or timeline_start > start_date):
+        start_date = timeline_start
+    
+    return ApiCall(
+        cache_key=f"attribution_{simulation_mode}_{period}_{start_date}_{end_date}_{sort}_{limit}",
+        loader=load_attribution,
+        args=(simulation_mode, period, start_date, end_date, sort, limit),
+        default={},
+        artifact=(simulation_mode, period)
+    )
+
+# Data API routes, shared with the ASGI server in asgi_app.py
+API_CALLS = {
+    '/api/performance_history': performance_history_call,
+    '/api/trade_log': trade_log_call,
+    '/api/portfolio': portfolio_call,
+    '/api/metrics': metrics_call,
+    '/api/distribution': distribution_call,
+    '/api/rolling_metrics': rolling_metrics_call,
+    '/api/attribution': attribution_call
+}
+
+@app.route('/api/performance_history')
+def get_performance_history():
+    """API endpoint to get performance history."""
+    return serve_api_call(performance_history_call)
 
 @app.route('/api/trade_log')
 def get_trade_log():
-    """API endpoint to get trade log."""
-    try:
-        simulation_mode = request.args.get('mode', 'default')
-        timeline = request.args.get('timeline', 'all')
-        period = request.args.get('period', 'all')  # New parameter for period
-        
-        cache_key = f"trade_log_{simulation_mode}_{period}_{timeline}"
-        
-        if period in ['2000', 'covid']:
-            # Get data from period-specific file
-            data = data_processor.get_current_data_for_period(period, simulation_mode)
-            # Apply timeline filtering if needed
-            if timeline != 'all':
-                data = data_processor.filter_by_timeline(data, timeline)
-            log = data.get('trade_log', [])
-        else:
-            # Use standard approach
-            log = get_cached_data(
-                cache_key,
-                data_processor.get_trade_log,
-                simulation_mode, 
-                timeline
-            )
-        
-        # Ensure the data is sorted by date
-        if log:
-            log = sorted(log, key=lambda x: x['date'])
-            
-        return jsonify(log)
-    except Exception as e:
-        print(f"Error in trade_log endpoint: {e}")
-        return jsonify([])
+    """API endpoint to get one page of the trade log."""
+    return serve_api_call(trade_log_call)
 
 @app.route('/api/portfolio')
 def get_portfolio():
     """API endpoint to get current portfolio state."""
-    try:
-        simulation_mode = request.args.get('mode', 'default')
-        period = request.args.get('period', 'all')  # New parameter for period
-        
-        cache_key = f"portfolio_{simulation_mode}_{period}"
-        
-        if period in ['2000', 'covid']:
-            # Get data from period-specific file
-            data = data_processor.get_current_data_for_period(period, simulation_mode)
-            portfolio = {
-                'capital': data.get('capital', 0),
-                'portfolio': data.get('portfolio', {})
-            }
-        else:
-            # Use standard approach
-            portfolio = get_cached_data(
-                cache_key,
-                data_processor.get_current_portfolio,
-                simulation_mode
-            )
-        
-        return jsonify(portfolio if portfolio else {'capital': 0, 'portfolio': {}})
-    except Exception as e:
-        print(f"Error in portfolio endpoint: {e}")
-        return jsonify({'capital': 0, 'portfolio': {}})
+    return serve_api_call(portfolio_call)
 
 @app.route('/api/metrics')
 def get_metrics():
     """API endpoint to get performance metrics."""
-    try:
-        simulation_mode = request.args.get('mode', 'default')
-        timeline = request.args.get('timeline', 'all')
-        period = request.args.get('period', 'all')  # New parameter for period
-        
-        cache_key = f"metrics_{simulation_mode}_{period}_{timeline}"
-        
-        if period in ['2000', 'covid']:
-            # Get data from period-specific file
-            data = data_processor.get_current_data_for_period(period, simulation_mode)
-            # Apply timeline filtering if needed
-            if timeline != 'all':
-                data = data_processor.filter_by_timeline(data, timeline)
-            
-            # Calculate metrics
-            history = data.get('performance_history', [])
-            
-            if not history:
-                metrics = {
-                    'total_return': 0,
-                    'starting_value': 1000000,
-                    'ending_value': 1000000,
-                    'max_drawdown': 0,
-                    'volatility': 0,
-                    'sharpe_ratio': 0
-                }
-            else:
-                starting_value = 1000000  # Always start with $1M for these periods
-                ending_value = history[-1]['portfolio_value']
-                total_return = (ending_value / starting_value - 1) * 100
-                
-                # Calculate max drawdown
-                peak = history[0]['portfolio_value']
-                max_drawdown = 0
-                
-                for entry in history:
-                    if entry['portfolio_value'] > peak:
-                        peak = entry['portfolio_value']
-                    current_drawdown = (peak - entry['portfolio_value']) / peak * 100 if peak > 0 else 0
-                    max_drawdown = max(max_drawdown, current_drawdown)
-                
-                metrics = {
-                    'total_return': total_return,
-                    'starting_value': starting_value,
-                    'ending_value': ending_value,
-                    'max_drawdown': max_drawdown
-                }
-        else:
-            # Use standard approach
-            metrics = get_cached_data(
-                cache_key,
-                data_processor.get_performance_metrics,
-                simulation_mode, 
-                timeline
-            )
-        
-        return jsonify(metrics if metrics else {})
-    except Exception as e:
-        print(f"Error in metrics endpoint: {e}")
-        return jsonify({})
+    return serve_api_call(metrics_call)
+
+@app.route('/api/rolling_metrics')
+def get_rolling_metrics():
+    """API endpoint to get rolling-window volatility, Sharpe ratio and maximum drawdown."""
+    return serve_api_call(rolling_metrics_call)
+
+@app.route('/api/attribution')
+def get_attribution():
+    """API endpoint to get per-symbol P&L attribution."""
+    return serve_api_call(attribution_call)
 
 @app.route('/api/status')
 def get_status():
@@ -274,52 +574,141 @@ def get_status():
     precomputed_exists = os.path.exists(os.path.join('data', 'precomputed_simulation.json'))
     
     return jsonify({
-        'status': 'ready' if precomputed_exists else 'initializing',
+        'status': 'ready' if precomputed_exists and not any(job.active for job in startup_jobs) else 'initializing',
         'precomputed_data_available': precomputed_exists,
-        'cutoff_date': data_processor.cutoff_date
+        'cutoff_date': data_processor.cutoff_date,
+        'active_jobs': len(jobs.jobs(active_only=True))
+    })
+
+@app.route('/api/jobs')
+def list_jobs():
+    """API endpoint to list background jobs and their progress (active=1 for pending and running ones only)."""
+    active_only = request.args.get('active', '0').lower() in ('1', 'true', 'yes')
+    return jsonify({
+        'workers': jobs.workers,
+        'jobs': [job.to_dict() for job in jobs.jobs(active_only=active_only)]
     })
 
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    API endpoint to queue the regeneration of simulation files.
+    
+    Requires the admin token (see admin_denied). JSON body: modes and
+    periods, lists defaulting to every mode and period.
+    """
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    
+    body = request.get_json(silent=True) or {}
+    modes = body.get('modes') or None
+    periods = body.get('periods') or None
+    for value, known in ((modes, data_processor.simulation_params), (periods, data_processor.PERIOD_START_DATES)):
+        if value is not None and (not isinstance(value, list) or any(item not in known for item in value)):
+            return jsonify({'error': f"Invalid value: {value!r}, expected a list of {', '.join(known)}"}), 400
+    
+    job = data_processor.submit_generation(modes, periods)
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """API endpoint to get one background job."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """API endpoint to cancel a pending or running background job; requires the admin token (see admin_denied)."""
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    cancelled = jobs.cancel(job_id)
+    return jsonify(dict(job.to_dict(), cancelled=cancelled))
+
 @app.route('/api/distribution')
 def get_distribution():
     """API endpoint to get cash/equity distribution over time."""
+    return serve_api_call(distribution_call)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose request, cache and simulation metrics in the Prometheus text format."""
+    return Response(telemetry.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# Request whose allocations the memory report traces by default
+REPRESENTATIVE_REQUEST = '/api/performance_history?mode=default&period=all&timeline=all&benchmark=1'
+
+def trace_api_request(path=REPRESENTATIVE_REQUEST, top=15):
+    """
+    Trace the allocations of a data API request under tracemalloc.
+    
+    The payload is built and encoded without the response cache, so the trace
+    shows the work of a cache miss.
+    """
+    route, _, query = path.partition('?')
+    build_call = API_CALLS.get(route)
+    if build_call is None:
+        raise ValueError(f"Not a data API route: {route!r}")
+    call = build_call(dict(parse_qsl(query, keep_blank_values=True)))
+    
+    _, peak, allocators = memory.trace_allocations(lambda: app.json.dumps(call.loader(*call.args)), top=top)
+    return {'path': path, 'peak_bytes': peak, 'allocators': allocators}
+
+# Token the admin endpoints require; they are disabled without one
+ADMIN_TOKEN = os.environ.get('FIVETEN_ADMIN_TOKEN')
+ADMIN_MAX_TOP = 100
+
+def admin_denied():
+    """
+    The error response for an admin request without the admin token, or None if allowed.
+    
+    The token is sent as "Authorization: Bearer <token>" or "X-Admin-Token: <token>".
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled; set FIVETEN_ADMIN_TOKEN to enable them'}), 404
+    authorization = request.headers.get('Authorization', '')
+    token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+@app.route('/api/admin/memory')
+def memory_endpoint():
+    """
+    API endpoint reporting the memory held by simulation artifacts and caches.
+    
+    Requires the admin token (see admin_denied). Query parameters: market=1 to
+    also load and measure the market data, trace=1 to add the top allocators
+    of REPRESENTATIVE_REQUEST, and top (number of allocators, at most
+    ADMIN_MAX_TOP).
+    """
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    
+    trace = request.args.get('trace')
+    if trace not in (None, '', '0', '1'):
+        return jsonify({'error': 'trace must be 0 or 1'}), 400
     try:
-        simulation_mode = request.args.get('mode', 'default')
-        timeline = request.args.get('timeline', 'all')
-        period = request.args.get('period', 'all')  # New parameter for period
-        
-        cache_key = f"distribution_{simulation_mode}_{period}_{timeline}"
-        
-        if period in ['2000', 'covid']:
-            # Get data from period-specific file
-            data = data_processor.get_current_data_for_period(period, simulation_mode)
-            # Apply timeline filtering if needed
-            if timeline != 'all':
-                data = data_processor.filter_by_timeline(data, timeline)
-            
-            # Extract distribution data
-            history = data.get('performance_history', [])
-            
-            distribution = []
-            for entry in history:
-                distribution.append({
-                    'date': entry['date'],
-                    'cash': entry.get('cash', 0),
-                    'equity': entry['portfolio_value'] - entry.get('cash', 0),
-                    'total': entry['portfolio_value']
-                })
-        else:
-            # Use standard approach
-            distribution = get_cached_data(
-                cache_key,
-                data_processor.get_portfolio_distribution,
-                simulation_mode, 
-                timeline
-            )
-        
-        return jsonify(distribution)
-    except Exception as e:
-        print(f"Error in distribution endpoint: {e}")
-        return jsonify([])
+        top = min(max(1, int(request.args.get('top', 15))), ADMIN_MAX_TOP)
+    except ValueError:
+        return jsonify({'error': 'top must be an integer'}), 400
+    
+    report = memory.memory_report(data_processor, cache,
+                                  market_data=request.args.get('market', '0').lower() in ('1', 'true', 'yes'))
+    if trace == '1':
+        try:
+            report['trace'] = trace_api_request(REPRESENTATIVE_REQUEST, top=top)
+        except JobPending as e:
+            return jsonify(pending_payload(e.job)), 202, {'Retry-After': str(PENDING_RETRY_AFTER)}
+    return jsonify(report)
 
 @app.route('/api/test')
 def test_endpoint():
@@ -0,0 +1,281 @@
+"""
+ASGI server for FiveTenAlgo.
+
+Serves the same routes as app.py, but on an asyncio event loop instead of one
+blocking worker per request:
+
+- Data API responses that are already in app.cache are answered directly on
+  the event loop, so they never wait behind a slow request.
+- Cache misses (simulation continuation, filtering, downsampling) run on a
+  bounded compute executor. Identical concurrent misses share one computation
+  and requests beyond the compute queue limit get a 503 instead of piling up.
+- Simulation files are checked and read on a separate I/O executor before
+  the compute step; requests for a simulation that is still being generated
+  by a background job get a 202 "pending" response without waiting for it.
+  Every other route (pages, static files, status) is handed to the Flask app
+  on that I/O executor.
+
+Concurrency limits can be set with environment variables or cli.py flags:
+FIVETEN_COMPUTE_WORKERS, FIVETEN_COMPUTE_QUEUE and FIVETEN_IO_WORKERS.
+FIVETEN_BODY_CACHE bounds the encoded response bodies kept for cached
+entries; the least recently served are dropped first.
+
+Run with:
+    uvicorn asgi_app:app --port 8080
+or:
+    python cli.py run --async
+"""
+import asyncio
+import io
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qsl
+
+import app as flask_app
+from models import telemetry
+from models.jobs import JobPending
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class AsyncServer:
+    def __init__(self, compute_workers=None, compute_queue=None, io_workers=None, body_cache=None):
+        """
+        Initialize the ASGI server.
+
+        Parameters:
+        compute_workers (int): Threads running simulation and data processing work
+        compute_queue (int): Compute requests admitted at once (running or waiting)
+        io_workers (int): Threads for file reads and the Flask fallback routes
+        body_cache (int): Encoded response bodies kept, least recently served dropped first
+        """
+        self.compute_workers = compute_workers or _env_int('FIVETEN_COMPUTE_WORKERS', 2)
+        self.compute_queue = compute_queue or _env_int('FIVETEN_COMPUTE_QUEUE', 16)
+        self.io_workers = io_workers or _env_int('FIVETEN_IO_WORKERS', 8)
+        self.body_cache = body_cache or _env_int('FIVETEN_BODY_CACHE', 256)
+
+        self.compute_pool = ThreadPoolExecutor(max_workers=self.compute_workers,
+                                               thread_name_prefix='fiveten-compute')
+        self.io_pool = ThreadPoolExecutor(max_workers=self.io_workers,
+                                          thread_name_prefix='fiveten-io')
+
+        self._inflight = {}  # Cache key: task computing it (identical misses share it)
+        self._bodies = OrderedDict()  # Cache key: (cache timestamp, encoded JSON body), least recently served first
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        build_call = flask_app.API_CALLS.get(scope['path'])
+        if build_call is not None and scope['method'] == 'GET':
+            start = time.perf_counter()
+            status = await self._serve_api(scope, build_call, send)
+            telemetry.observe_request(scope['path'], 'GET', status, time.perf_counter() - start)
+        else:
+            # Flask records its own request metrics
+            await self._serve_wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        """Handle the ASGI lifespan protocol."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def shutdown(self):
+        """Stop the executors and the background jobs."""
+        self.compute_pool.shutdown(wait=False, cancel_futures=True)
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        flask_app.jobs.shutdown()
+
+    async def _serve_api(self, scope, build_call, send):
+        """Serve a data API route from the cache or the compute executor; returns the status code."""
+        args = dict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        try:
+            call = build_call(args)
+        except ValueError as e:
+            await self._send_body(send, 400, flask_app.app.json.dumps({'error': str(e)}).encode())
+            return 400
+
+        body = self._cached_body(call.cache_key)
+        if body is None:
+            task = self._inflight.get(call.cache_key)
+            if task is None:
+                # Every in-flight task is one admitted computation, running or queued
+                if len(self._inflight) >= self.compute_queue:
+                    await self._send_body(send, 503, b'{"error": "server busy"}', [(b'retry-after', b'1')])
+                    return 503
+                task = asyncio.ensure_future(self._compute(call))
+                self._inflight[call.cache_key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(call.cache_key, None))
+            try:
+                body = await asyncio.shield(task)
+            except JobPending as e:
+                return await self._send_pending(send, e.job)
+
+        await self._send_body(send, 200, body)
+        return 200
+
+    async def _send_pending(self, send, job):
+        """Answer that the data is being generated by a background job; returns the status code."""
+        body = flask_app.app.json.dumps(flask_app.pending_payload(job)).encode()
+        await self._send_body(send, 202, body, [(b'retry-after', str(flask_app.PENDING_RETRY_AFTER).encode())])
+        return 202
+
+    def _cached_body(self, cache_key):
+        """Return the encoded body for a fresh cache entry, encoding it at most once."""
+        data = flask_app.lookup_cache(cache_key)
+        if data is flask_app.CACHE_MISS:
+            # The miss is counted by get_cached_data on the compute pool
+            self._bodies.pop(cache_key, None)
+            return None
+        telemetry.record_cache_event('app', 'hit')
+
+        entry = flask_app.cache.get(cache_key)
+        if entry is None:
+            # Evicted from the response cache since the lookup
+            self._bodies.pop(cache_key, None)
+            return flask_app.app.json.dumps(data).encode()
+        timestamp = entry['timestamp']
+        encoded = self._bodies.get(cache_key)
+        if encoded is None or encoded[0] != timestamp:
+            encoded = (timestamp, flask_app.app.json.dumps(data).encode())
+            self._bodies[cache_key] = encoded
+        self._bodies.move_to_end(cache_key)
+        while len(self._bodies) > self.body_cache:
+            self._bodies.popitem(last=False)
+        return encoded[1]
+
+    async def _compute(self, call):
+        """Load the call's artifact on the I/O pool, then build and encode the payload on the compute pool."""
+        loop = asyncio.get_running_loop()
+        if call.artifact:
+            await loop.run_in_executor(self.io_pool, self._prefetch_artifact, call)
+        return await loop.run_in_executor(self.compute_pool, self._load_and_encode, call)
+
+    @staticmethod
+    def _prefetch_artifact(call):
+        """Read the call's simulation file into DataProcessor's artifact cache; raises JobPending while a job generates it."""
+        job = flask_app.pending_job(call)
+        if job is not None:
+            raise JobPending(job)
+        try:
+            flask_app.data_processor.load_simulation_artifact(*call.artifact)
+        except Exception:
+            # Missing or unreadable files are handled (and regenerated) by the loader
+            pass
+
+    @staticmethod
+    def _load_and_encode(call):
+        """Run the API call and encode its payload."""
+        return flask_app.app.json.dumps(flask_app.run_api_call(call)).encode()
+
+    async def _send_body(self, send, status, body, extra_headers=()):
+        """Send a complete JSON response."""
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'access-control-allow-origin', b'*')
+        ]
+        headers.extend(extra_headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _serve_wsgi(self, scope, receive, send):
+        """Hand the request to the Flask app on the I/O executor."""
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        environ = self._build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(self.io_pool, partial(self._call_wsgi, environ))
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    @staticmethod
+    def _build_environ(scope, body):
+        """Build a WSGI environ from an ASGI HTTP scope."""
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'],
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f"HTTP_{name}"
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    @staticmethod
+    def _call_wsgi(environ):
+        """Run the Flask app for one request and collect the full response."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+
+        result = flask_app.app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], content
+
+
+def run_async_app(port=8080, compute_workers=None, compute_queue=None, io_workers=None, body_cache=None):
+    """Run the ASGI application with uvicorn."""
+    import uvicorn
+    server = AsyncServer(compute_workers=compute_workers, compute_queue=compute_queue, io_workers=io_workers,
+                         body_cache=body_cache)
+    uvicorn.run(server, host='0.0.0.0', port=port)
+
+
+app = AsyncServer()
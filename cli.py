@@ -1,8 +1,10 @@
 import argparse
+import json
 import os
 import sys
 from models.algorithm import FiveTenAlgo
 from models.data_processor import DataProcessor
+from models.logs import configure_logging
 
 def generate_precomputed_data(args):
     """Generate precomputed data for a specified date range."""
@@ -85,11 +87,12 @@ def run_simulation(args):
             
             if metrics:
                 print("\nSimulation Results:")
-                print(f"Total Return: {metrics['total_return_pct']:.2f}%")
+                print(f"Total Return: {metrics['total_return']:.2f}%")
                 print(f"Annualized Return: {metrics['annualized_return']:.2f}%")
-                print(f"Maximum Drawdown: {metrics['max_drawdown']:.2f}%")
-                print(f"Final Portfolio Value: ${metrics['latest_value']:.2f}")
-                print(f"Latest Date: {metrics['latest_date']}")
+                print(f"Maximum Drawdown: {metrics['max_drawdown']:.2f}% ({metrics['max_drawdown_duration']} days)")
+                print(f"Sharpe Ratio: {metrics['sharpe_ratio']:.2f}")
+                print(f"Sortino Ratio: {metrics['sortino_ratio']:.2f}")
+                print(f"Final Portfolio Value: ${metrics['ending_value']:.2f}")
             else:
                 print("No metrics available.")
         else:
@@ -99,12 +102,62 @@ def parse_args():
     parser = argparse.ArgumentParser(description='FiveTenAlgo CLI')
     subparsers = parser.add_subparsers(dest='command', help='Command to run')
     
+    # Logging and profiling options shared by every command
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument('--log-level', default=None, type=str.upper,
+                               choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                               help='Minimum level of log messages (defaults to $FIVETEN_LOG_LEVEL, else INFO)')
+    common_parser.add_argument('--profile', action='store_true',
+                                help='Print the time spent in each phase (loading, signal scanning, '
+                                     'execution, valuation, serialization...) when the command ends')
+    common_parser.add_argument('--profile-output', type=str, default=None,
+                                help='With --profile, also write cProfile statistics to this file (read with pstats)')
+    
     # Add generate-market-data command
-    generate_market_parser = subparsers.add_parser('generate-market-data', 
+    generate_market_parser = subparsers.add_parser('generate-market-data', parents=[common_parser], 
                                               help='Generate and cache market data')
+    generate_market_parser.add_argument('--symbols', type=int, default=20,
+                                        help='Number of symbols in the synthetic market')
+    generate_market_parser.add_argument('--freq', type=str, default='W', choices=['W', 'B'],
+                                        help='Bar frequency: W (weekly) or B (business days)')
+    generate_market_parser.add_argument('--seed', type=int, default=None,
+                                        help='Seed for reproducible market data')
+    
+    # Add build-market-store command
+    store_parser = subparsers.add_parser('build-market-store', parents=[common_parser],
+                                         help='Generate a synthetic market into the partitioned on-disk store')
+    store_parser.add_argument('--symbols', type=int, default=8000,
+                              help='Number of symbols in the synthetic market')
+    store_parser.add_argument('--freq', type=str, default='B', choices=['W', 'B'],
+                              help='Bar frequency: W (weekly) or B (business days)')
+    store_parser.add_argument('--start-date', type=str, default='1971-02-08',
+                              help='First date of the market (YYYY-MM-DD)')
+    store_parser.add_argument('--end-date', type=str, default='2025-03-01',
+                              help='Last date of the market (YYYY-MM-DD)')
+    store_parser.add_argument('--seed', type=int, default=None,
+                              help='Seed for reproducible market data')
+    
+    # Add ingest command
+    ingest_parser = subparsers.add_parser('ingest', parents=[common_parser],
+                                          help='Stream external price files into the partitioned market store')
+    ingest_parser.add_argument('paths', nargs='+',
+                               help='CSV or Parquet files in long format (one price per row); '
+                                    'earlier files win on duplicate dates and symbols')
+    ingest_parser.add_argument('--format', type=str, default=None, choices=['csv', 'parquet'],
+                               help='File format (defaults to each file\'s extension)')
+    ingest_parser.add_argument('--chunksize', type=int, default=1000000,
+                               help='Rows read per chunk')
+    ingest_parser.add_argument('--date-column', type=str, default=None,
+                               help='Date column (defaults to date, timestamp, datetime or trade_date)')
+    ingest_parser.add_argument('--symbol-column', type=str, default=None,
+                               help='Symbol column (defaults to symbol, ticker, sym or code)')
+    ingest_parser.add_argument('--price-column', type=str, default=None,
+                               help='Price column (defaults to price, close, adj_close or last)')
+    ingest_parser.add_argument('--date-format', type=str, default=None,
+                               help='strptime format of the dates (inferred when omitted)')
     
     # Add generate command
-    generate_parser = subparsers.add_parser('generate', 
+    generate_parser = subparsers.add_parser('generate', parents=[common_parser], 
                                               help='Generate precomputed simulation data')
     generate_parser.add_argument('--start-date', type=str, default='1971-02-08',
                                help='Start date for simulation (YYYY-MM-DD)')
@@ -117,30 +170,235 @@ def parse_args():
                                help='Comma-separated list of symbols to include')
     generate_parser.add_argument('--initial-capital', type=float, default=1000000,
                                help='Initial capital for simulation')
+    generate_parser.add_argument('--signal-workers', type=int, default=None,
+                               help='Worker processes to shard signal detection across')
     
     # Add regenerate-all command to fix corrupted data
-    regenerate_parser = subparsers.add_parser('regenerate-all', 
+    regenerate_parser = subparsers.add_parser('regenerate-all', parents=[common_parser], 
                                             help='Regenerate all simulation data to fix corrupted files')
+    regenerate_parser.add_argument('--signal-workers', type=int, default=None,
+                                   help='Worker processes to shard signal detection across')
+    
+    # Add roll-forward command
+    roll_parser = subparsers.add_parser('roll-forward', parents=[common_parser],
+                                        help='Extend the precomputed simulations to a new cutoff date')
+    roll_parser.add_argument('--cutoff-date', type=str, default=None,
+                             help='New cutoff date (YYYY-MM-DD, default: today)')
+    roll_parser.add_argument('--modes', type=str, default=None,
+                             help='Comma-separated simulation modes (default: all)')
+    roll_parser.add_argument('--periods', type=str, default=None,
+                             help='Comma-separated periods (default: all of them)')
+    roll_parser.add_argument('--signal-workers', type=int, default=None,
+                             help='Worker processes to shard signal detection across')
     
     # Add run command
-    run_parser = subparsers.add_parser('run', help='Run the FiveTenAlgo application')
+    run_parser = subparsers.add_parser('run', parents=[common_parser], help='Run the FiveTenAlgo application')
     run_parser.add_argument('--port', type=int, default=8080,
                            help='Port to run the server on')
     run_parser.add_argument('--continue-from-precomputed', action='store_true',
                           help='Continue simulation from precomputed data')
+    run_parser.add_argument('--async', dest='use_async', action='store_true',
+                          help='Serve with the ASGI server (requires uvicorn)')
+    run_parser.add_argument('--compute-workers', type=int, default=None,
+                          help='ASGI mode: threads for simulation work')
+    run_parser.add_argument('--compute-queue', type=int, default=None,
+                          help='ASGI mode: compute requests admitted before answering 503')
+    run_parser.add_argument('--io-workers', type=int, default=None,
+                          help='ASGI mode: threads for file reads and page routes')
+    run_parser.add_argument('--body-cache', type=int, default=None,
+                          help='ASGI mode: encoded response bodies kept in memory')
+    
+    # Add montecarlo command
+    montecarlo_parser = subparsers.add_parser('montecarlo', parents=[common_parser],
+                                              help='Run the strategy over many seeded synthetic market paths')
+    montecarlo_parser.add_argument('--paths', type=int, default=100,
+                                   help='Number of synthetic paths')
+    montecarlo_parser.add_argument('--workers', type=int, default=None,
+                                   help='Worker processes (defaults to the CPU count)')
+    montecarlo_parser.add_argument('--batch-size', type=int, default=None,
+                                   help='Paths submitted at a time (defaults to twice the workers)')
+    montecarlo_parser.add_argument('--seed', type=int, default=None,
+                                   help='Root seed; the same seed reproduces the same run')
+    montecarlo_parser.add_argument('--modes', type=str, default=None,
+                                   help='Comma-separated simulation modes (defaults to all)')
+    montecarlo_parser.add_argument('--start-date', type=str, default='2000-01-01',
+                                   help='First date of every path (YYYY-MM-DD)')
+    montecarlo_parser.add_argument('--end-date', type=str, default='2025-03-01',
+                                   help='Last date of every path (YYYY-MM-DD)')
+    montecarlo_parser.add_argument('--symbols', type=int, default=20,
+                                   help='Number of symbols in every path')
+    montecarlo_parser.add_argument('--freq', type=str, default='W', choices=['W', 'B'],
+                                   help='Bar frequency: W (weekly) or B (business days)')
+    montecarlo_parser.add_argument('--output', type=str, default=None,
+                                   help='Write the full results to this JSON file')
+    
+    # Add walkforward command
+    walkforward_parser = subparsers.add_parser('walkforward', parents=[common_parser],
+                                               help='Walk-forward optimize the trading parameters on the market data')
+    walkforward_parser.add_argument('--train-years', type=int, default=10,
+                                    help='Length of each train window in years')
+    walkforward_parser.add_argument('--test-years', type=int, default=2,
+                                    help='Length of each test window (and the step between folds) in years')
+    walkforward_parser.add_argument('--objective', type=str, default='sharpe_ratio',
+                                    choices=['sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'total_return'],
+                                    help='Metric maximized on the train windows')
+    walkforward_parser.add_argument('--workers', type=int, default=None,
+                                    help='Worker processes (defaults to the CPU count)')
+    walkforward_parser.add_argument('--grid-margin', type=int, default=1,
+                                    help='Grid steps beyond the lowest and highest preset value of each parameter')
+    walkforward_parser.add_argument('--seed', type=int, default=0,
+                                    help='Seed for buy-candidate sampling in every simulated window')
+    walkforward_parser.add_argument('--report', type=str, default=os.path.join('data', 'walk_forward_report.json'),
+                                    help='Where to write the per-fold report')
+    
+    # Add intraday command
+    intraday_parser = subparsers.add_parser('intraday', parents=[common_parser],
+                                            help='Backtest on minute bars with stability confirmation')
+    intraday_parser.add_argument('--input', type=str, default=None,
+                                 help='CSV of minute bars [symbol, timestamp, price] sorted by timestamp; '
+                                      'synthetic bars are generated when omitted')
+    intraday_parser.add_argument('--mode', type=str, default='default',
+                                 help='Simulation mode whose parameters are used')
+    intraday_parser.add_argument('--stability-minutes', type=int, default=3,
+                                 help='Consecutive minutes a change must stay inside its band')
+    intraday_parser.add_argument('--symbols', type=int, default=20,
+                                 help='Synthetic bars: number of symbols')
+    intraday_parser.add_argument('--start-date', type=str, default='2024-01-01',
+                                 help='Synthetic bars: first date (YYYY-MM-DD)')
+    intraday_parser.add_argument('--end-date', type=str, default='2024-12-31',
+                                 help='Synthetic bars: last date (YYYY-MM-DD)')
+    intraday_parser.add_argument('--seed', type=int, default=None,
+                                 help='Seed for the synthetic bars and candidate sampling')
+    intraday_parser.add_argument('--output', type=str, default=os.path.join('data', 'intraday_simulation.json'),
+                                 help='Where to save the simulation')
+    
+    # Add live command
+    live_parser = subparsers.add_parser('live', parents=[common_parser], help='Run the paper-trading daemon')
+    live_parser.add_argument('--mode', type=str, default='default',
+                             help='Simulation mode to paper-trade')
+    live_parser.add_argument('--source', type=str, default='synthetic', choices=['synthetic', 'file', 'socket'],
+                             help='Quote source: synthetic random walk, a JSON-lines file, or a TCP socket')
+    live_parser.add_argument('--quotes-file', type=str, default=os.path.join('data', 'quotes.jsonl'),
+                             help='File source: JSON-lines file of quote bars, followed as it grows')
+    live_parser.add_argument('--no-follow', action='store_true',
+                             help='File source: stop at the end of the file')
+    live_parser.add_argument('--host', type=str, default='127.0.0.1',
+                             help='Socket source: interface to listen on')
+    live_parser.add_argument('--port', type=int, default=8765,
+                             help='Socket source: port to listen on')
+    live_parser.add_argument('--interval', type=float, default=5.0,
+                             help='Synthetic source: seconds between bars')
+    live_parser.add_argument('--seed', type=int, default=None,
+                             help='Synthetic source: seed for the random walk')
+    live_parser.add_argument('--reset', action='store_true',
+                             help='Discard the live state and start again from the precomputed simulation')
+    
+    # Add kernel-check command
+    kernel_parser = subparsers.add_parser('kernel-check', parents=[common_parser],
+                                          help='Check the compiled kernel against the Python engine and time both')
+    kernel_parser.add_argument('--symbols', type=int, default=200,
+                               help='Number of symbols in the synthetic market')
+    kernel_parser.add_argument('--freq', type=str, default='B', choices=['W', 'B'],
+                               help='Bar frequency: W (weekly) or B (business days)')
+    kernel_parser.add_argument('--start-date', type=str, default='1971-02-08',
+                               help='First date of the market (YYYY-MM-DD)')
+    kernel_parser.add_argument('--end-date', type=str, default='2025-03-01',
+                               help='Last date of the market (YYYY-MM-DD)')
+    kernel_parser.add_argument('--seed', type=int, default=0,
+                               help='Seed for the market and for candidate sampling')
+    kernel_parser.add_argument('--signal-workers', type=int, default=None,
+                               help='Also run with signal detection sharded across this many processes')
+    
+    # Add loadtest command
+    loadtest_parser = subparsers.add_parser('loadtest', parents=[common_parser],
+                                            help='Drive dashboard traffic against the API and report latencies')
+    loadtest_parser.add_argument('--url', type=str, default=None,
+                                 help='Base URL of a running server (default: the app in-process via its test client)')
+    loadtest_parser.add_argument('--concurrency', type=int, default=8,
+                                 help='Number of concurrent virtual users')
+    loadtest_parser.add_argument('--views', type=int, default=200,
+                                 help='Number of dashboard views to load, five panel requests each')
+    loadtest_parser.add_argument('--duration', type=float, default=None,
+                                 help='Run for this many seconds instead of a number of views')
+    loadtest_parser.add_argument('--modes', type=str, default=None,
+                                 help='Comma-separated simulation modes (default: all)')
+    loadtest_parser.add_argument('--periods', type=str, default=None,
+                                 help='Comma-separated periods (default: all of them)')
+    loadtest_parser.add_argument('--timelines', type=str, default=None,
+                                 help='Comma-separated timelines (default: all of them)')
+    loadtest_parser.add_argument('--timeout', type=float, default=30.0,
+                                 help='With --url, seconds before a request counts as failed')
+    loadtest_parser.add_argument('--seed', type=int, default=None,
+                                 help='Seed for the choice of views')
+    loadtest_parser.add_argument('--output', type=str, default=None,
+                                 help='Also write the results as JSON to this file')
+    
+    # Add memreport command
+    memreport_parser = subparsers.add_parser('memreport', parents=[common_parser],
+                                             help='Report the memory held by simulation artifacts and caches')
+    memreport_parser.add_argument('--warm-views', type=int, default=20,
+                                  help='Dashboard views to load first, so the caches hold what serving puts in them')
+    memreport_parser.add_argument('--trace', type=str, default=None,
+                                  help='Data API path to trace allocations for (default: a full performance history)')
+    memreport_parser.add_argument('--top', type=int, default=15,
+                                  help='Number of top allocators to list')
+    memreport_parser.add_argument('--no-market', dest='market', action='store_false',
+                                  help='Do not load and measure the market data')
+    memreport_parser.add_argument('--output', type=str, default=None,
+                                  help='Also write the report as JSON to this file')
     
     return parser.parse_args()
 
-def generate_market_data():
+def generate_market_data(args):
     """Generate and cache market data for all simulations."""
     print("Generating market data...")
-    data_processor = DataProcessor()
+    data_processor = DataProcessor(seed=args.seed, sample_symbols=args.symbols, bar_frequency=args.freq)
     market_data = data_processor.generate_and_cache_market_data()
     print(f"Market data generation complete. Generated {len(market_data)} records.")
     
+def build_market_store(args):
+    """Generate a synthetic market year by year into the partitioned market store."""
+    import resource
+    from models.market_store import build_synthetic_store
+    
+    data_processor = DataProcessor()
+    store = data_processor.get_market_store()
+    symbols = data_processor.get_sample_symbols(args.symbols)
+    print(f"Building market store in {store.directory}: {len(symbols)} symbols from {args.start_date} to {args.end_date}")
+    bars = build_synthetic_store(store, symbols, args.start_date, args.end_date,
+                                 freq=args.freq, seed=args.seed, progress=print)
+    
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Wrote {bars} bars of {len(symbols)} symbols ({bars * len(symbols)} prices); peak memory {peak_mb:.0f} MB")
+    print("Simulations (generate, regenerate-all, the app) now run over the store chunk by chunk.")
+
+def ingest_price_files(args):
+    """Stream price files into the partitioned market store and report the throughput."""
+    from models.ingest import Ingestor
+    
+    data_processor = DataProcessor()
+    store = data_processor.get_market_store()
+    overrides = {'date': args.date_column, 'symbol': args.symbol_column, 'price': args.price_column}
+    print(f"Ingesting {len(args.paths)} file(s) into {store.directory}...")
+    
+    try:
+        summary = Ingestor(store, chunksize=args.chunksize, progress=print).run(
+            args.paths, file_format=args.format, column_overrides=overrides, date_format=args.date_format)
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    print("\nIngestion Summary:")
+    print(f"Rows Read: {summary['rows_read']:,}")
+    print(f"Rows Dropped (invalid): {summary['rows_read'] - summary['rows_kept']:,}")
+    print(f"Duplicates Dropped: {summary['duplicates']:,}")
+    print(f"Prices Written: {summary['prices']:,} over {summary['bars']:,} bars in {summary['years']} partitions")
+    print(f"Store Universe: {summary['symbols']:,} symbols")
+    print(f"Throughput: {summary['rows_per_second']:,.0f} rows/s ({summary['seconds']:.1f}s)")
+
 def generate_simulation(args):
     """Generate precomputed simulation data."""
-    data_processor = DataProcessor()
+    data_processor = DataProcessor(signal_workers=args.signal_workers)
     
     # Update cutoff date
     data_processor.cutoff_date = args.end_date
@@ -154,9 +412,9 @@ def generate_simulation(args):
     else:
         print("Failed to generate simulation data.")
 
-def regenerate_all_simulations():
+def regenerate_all_simulations(args):
     """Regenerate all simulation data files to fix corrupted data."""
-    data_processor = DataProcessor()
+    data_processor = DataProcessor(signal_workers=args.signal_workers)
     
     # First, ensure we have market data
     print("Ensuring market data is available...")
@@ -183,25 +441,399 @@ def regenerate_all_simulations():
     
     print("All simulation data regenerated.")
 
+def roll_forward(args):
+    """Simulate only the bars between the current and the new cutoff date for every precomputed simulation."""
+    data_processor = DataProcessor(signal_workers=args.signal_workers)
+    modes = args.modes.split(',') if args.modes else None
+    periods = args.periods.split(',') if args.periods else None
+    for value, known in ((modes, data_processor.simulation_params), (periods, data_processor.PERIOD_START_DATES)):
+        for item in value or []:
+            if item not in known:
+                print(f"Error: Unknown value: {item} (expected one of {', '.join(known)})")
+                sys.exit(1)
+    
+    print(f"Rolling the precomputed simulations forward from {data_processor.cutoff_date} "
+          f"to {args.cutoff_date or 'today'}...")
+    results = data_processor.roll_forward(args.cutoff_date, modes, periods)
+    
+    for (mode, period), added in results.items():
+        outcome = 'FAILED' if added is None else f"{added} new bars"
+        print(f"  {mode:<14}{period:<8}{outcome}")
+    print(f"Cutoff date: {data_processor.cutoff_date}")
+    if any(added is None for added in results.values()):
+        sys.exit(1)
+
 def run_app(args):
-    """Run the Flask application."""
+    """Run the Flask application, or the ASGI server with --async."""
+    if args.use_async:
+        from asgi_app import run_async_app
+        print(f"Starting FiveTenAlgo (ASGI) on port {args.port}...")
+        run_async_app(
+            port=args.port,
+            compute_workers=args.compute_workers,
+            compute_queue=args.compute_queue,
+            io_workers=args.io_workers,
+            body_cache=args.body_cache
+        )
+        return
+    
     from app import run_app
     print(f"Starting FiveTenAlgo on port {args.port}...")
     run_app(port=args.port)
 
-def main():
-    args = parse_args()
+def run_montecarlo(args):
+    """Run Monte Carlo robustness simulations and print the outcome percentiles."""
+    from models.monte_carlo import run_monte_carlo, PERCENTILES
+    
+    data_processor = DataProcessor()
+    mode_names = args.modes.split(',') if args.modes else list(data_processor.simulation_params)
+    for mode in mode_names:
+        if mode not in data_processor.simulation_params:
+            print(f"Error: Unknown simulation mode: {mode}")
+            return
+    modes = {mode: data_processor.simulation_params[mode] for mode in mode_names}
+    symbols = data_processor.get_sample_symbols(args.symbols)
+    
+    print(f"Running {args.paths} paths for {', '.join(mode_names)} from {args.start_date} to {args.end_date}...")
+    results = run_monte_carlo(
+        modes,
+        paths=args.paths,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        symbols=symbols,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        freq=args.freq
+    )
+    
+    print(f"\nMonte Carlo Results (seed {results['seed']}, {results['bars']} bars per path):")
+    header = f"{'Mode':<14}{'Outcome':<16}" + ''.join(f"{f'p{q}':>10}" for q in PERCENTILES) + f"{'Mean':>10}"
+    print(header)
+    for mode, outcomes in results['modes'].items():
+        for outcome, summary in outcomes.items():
+            row = ''.join(f"{summary[f'p{q}']:>10.2f}" for q in PERCENTILES)
+            print(f"{mode:<14}{outcome:<16}{row}{summary['mean']:>10.2f}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+def run_walkforward(args):
+    """Run a walk-forward optimization over the cached market data and write the report."""
+    from models.price_matrix import PriceMatrix
+    from models.walk_forward import parameter_grid, walk_forward
+    
+    data_processor = DataProcessor()
+    matrix = PriceMatrix.from_frame(data_processor.load_market_data())
+    print(f"Walk-forward over {len(matrix)} bars of {len(matrix.symbols)} symbols "
+          f"({args.train_years}y train, {args.test_years}y test, maximizing {args.objective})")
+    
+    report = walk_forward(
+        matrix,
+        data_processor.simulation_params,
+        train_years=args.train_years,
+        test_years=args.test_years,
+        objective=args.objective,
+        grid=parameter_grid(data_processor.simulation_params, margin=args.grid_margin),
+        seed=args.seed,
+        workers=args.workers,
+        cache_dir=os.path.join(data_processor.data_dir, 'walk_forward'),
+        progress=print
+    )
+    
+    if not report['folds']:
+        print("Not enough market data for a single fold.")
+        return
+    
+    print(f"\n{'Test window':<25}{'Buy':>14}{'Sell':>14}{'Buy %':>8}{'Sell %':>8}{'Train':>9}{'Test':>9}{'Default':>9}")
+    for fold in report['folds']:
+        params = fold['selected_params']
+        window = f"{fold['test_window'][0]}..{fold['test_window'][1]}"
+        buy = f"{params['buy_threshold'][0]}/{params['buy_threshold'][1]}"
+        sell = f"{params['sell_threshold'][0]}/{params['sell_threshold'][1]}"
+        print(f"{window:<25}{buy:>14}{sell:>14}{params['trade_size_buy_pct'] * 100:>8.2f}"
+              f"{params['trade_size_sell_pct'] * 100:>8.2f}{fold['train_score']:>9.2f}"
+              f"{fold['test_results'][args.objective]:>9.2f}"
+              f"{fold['presets_test_results']['default'][args.objective]:>9.2f}")
+    
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved walk-forward report to {args.report}")
+
+def run_intraday(args):
+    """Run a minute-bar backtest and save it like a precomputed simulation."""
+    from models.intraday import IntradayBacktest, generate_minute_days, read_minute_csv
+    from models.performance_metrics import compute_metrics
     
+    data_processor = DataProcessor()
+    if args.mode not in data_processor.simulation_params:
+        print(f"Error: Unknown simulation mode: {args.mode}")
+        return
+    params = data_processor.simulation_params[args.mode]
+    algo = FiveTenAlgo(
+        initial_capital=params['initial_capital'],
+        stability_minutes=args.stability_minutes,
+        buy_threshold=params['buy_threshold'],
+        sell_threshold=params['sell_threshold'],
+        trade_size_buy_pct=params['trade_size_buy_pct'],
+        trade_size_sell_pct=params['trade_size_sell_pct'],
+        seed=args.seed
+    )
+    
+    if args.input:
+        print(f"Reading minute bars from {args.input}...")
+        days = read_minute_csv(args.input)
+    else:
+        symbols = data_processor.get_sample_symbols(args.symbols)
+        print(f"Generating minute bars for {len(symbols)} symbols from {args.start_date} to {args.end_date}...")
+        days = generate_minute_days(symbols, args.start_date, args.end_date, seed=args.seed)
+    
+    IntradayBacktest(algo).run(days, progress=print)
+    if not algo.performance_history:
+        print("No minute bars to process.")
+        return
+    
+    metrics = compute_metrics(algo.performance_history, algo.trade_log, starting_value=algo.initial_capital)
+    print(f"\nIntraday Results ({args.mode} mode, {args.stability_minutes}-minute stability):")
+    print(f"Days: {len(algo.performance_history)}")
+    print(f"Trades: {len(algo.trade_log)}")
+    print(f"Total Return: {metrics['total_return']:.2f}%")
+    print(f"Max Drawdown: {metrics['max_drawdown']:.2f}%")
+    print(f"Sharpe Ratio: {metrics['sharpe_ratio']:.2f}")
+    print(f"Ending Value: ${metrics['ending_value']:,.2f}")
+    
+    if algo.save_simulation(args.output):
+        print(f"\nSaved intraday simulation to {args.output}")
+
+def run_live_daemon(args):
+    """Run the paper-trading daemon for one mode until interrupted."""
+    import shutil
+    from models.live import FileQuoteSource, SocketQuoteSource, SyntheticQuoteSource, run_live, start_engine
+    
+    data_processor = DataProcessor()
+    if args.mode not in data_processor.simulation_params:
+        print(f"Error: Unknown simulation mode: {args.mode}")
+        return
+    
+    store = data_processor.get_live_store(args.mode)
+    if args.reset and os.path.exists(store.directory):
+        shutil.rmtree(store.directory)
+        print(f"Removed live state: {store.directory}")
+    
+    engine = start_engine(data_processor, args.mode)
+    if args.source == 'file':
+        source = FileQuoteSource(args.quotes_file, follow=not args.no_follow)
+    elif args.source == 'socket':
+        source = SocketQuoteSource(args.host, args.port)
+    else:
+        source = SyntheticQuoteSource(engine.algo.last_prices, engine.last_date, freq=data_processor.bar_frequency,
+                                      interval=args.interval, seed=args.seed)
+    
+    print(f"Paper-trading {args.mode} mode from {args.source} quotes; state in {store.directory}")
+    run_live(engine, source,
+             on_bar=lambda date, trades, value: print(f"{date}: {trades} trades, portfolio value ${value:,.2f}"))
+
+def run_kernel_check(args):
+    """Run every mode and period through both engines on one synthetic market and compare the results."""
+    import time
+    from contextlib import nullcontext
+    from models import kernel
+    from models.algorithm import run_forked_simulations
+    from models.sharding import SignalPool
+    from models.synthetic import generate_market
+    
+    data_processor = DataProcessor()
+    symbols = data_processor.get_sample_symbols(args.symbols)
+    market = generate_market(symbols, args.start_date, args.end_date, freq=args.freq, seed=args.seed)
+    print(f"Synthetic market: {len(market)} bars of {len(symbols)} symbols")
+    if not kernel.NUMBA_AVAILABLE:
+        print("Numba is not installed: the kernel runs as plain Python and the engine uses the Python loop by default")
+    
+    # (name, compiled, signal workers)
+    engines = [('Python', False, None), ('Kernel', True, None)]
+    if args.signal_workers:
+        engines.append((f"Sharded ({args.signal_workers} workers)", True, args.signal_workers))
+    
+    results = []
+    for engine, compiled, workers in engines:
+        simulations = []
+        for mode, params in data_processor.simulation_params.items():
+            for period, start_date in data_processor.PERIOD_START_DATES.items():
+                algo = FiveTenAlgo(
+                    initial_capital=params['initial_capital'],
+                    buy_threshold=params['buy_threshold'],
+                    sell_threshold=params['sell_threshold'],
+                    trade_size_buy_pct=params['trade_size_buy_pct'],
+                    trade_size_sell_pct=params['trade_size_sell_pct'],
+                    seed=args.seed
+                )
+                simulations.append((f"{mode}/{period}", algo, start_date))
+        
+        with (SignalPool(workers) if workers else nullcontext()) as signal_pool:
+            start = time.perf_counter()
+            run_forked_simulations(market, [(algo, start_date) for _, algo, start_date in simulations],
+                                   compiled=compiled, signal_pool=signal_pool)
+            elapsed = time.perf_counter() - start
+        trades = sum(len(algo.trade_log) for _, algo, _ in simulations)
+        print(f"{engine} engine: {elapsed:.2f}s for {len(simulations)} simulations, {trades} trades")
+        results.append((engine, simulations, elapsed))
+    
+    mismatches = []
+    _, reference, python_elapsed = results[0]
+    for engine, simulations, elapsed in results[1:]:
+        for (name, python_algo, _), (_, algo, _) in zip(reference, simulations):
+            for field in ('trade_log', 'performance_history', 'benchmark_history', 'portfolio', 'capital'):
+                if getattr(python_algo, field) != getattr(algo, field):
+                    mismatches.append(f"{engine}: {name} {field}")
+        print(f"{engine} speedup: {python_elapsed / elapsed:.1f}x")
+    
+    print("(The first compiled run includes JIT compilation)")
+    if mismatches:
+        print(f"Parity FAILED: {', '.join(mismatches)}")
+        sys.exit(1)
+    print("Parity OK: identical trade logs, histories and portfolios")
+
+def run_load_test(args):
+    """Load the dashboard panels with concurrent virtual users and print per-route latencies."""
+    from models.loadtest import ClientTransport, HTTPTransport, run_load_test, save_result
+    
+    data_processor = DataProcessor()
+    modes = args.modes.split(',') if args.modes else list(data_processor.simulation_params)
+    periods = args.periods.split(',') if args.periods else list(data_processor.PERIOD_START_DATES)
+    timelines = args.timelines.split(',') if args.timelines else ['all'] + list(data_processor.TIMELINE_DAYS)
+    
+    if args.url:
+        transport = HTTPTransport(args.url, timeout=args.timeout)
+        target = args.url
+    else:
+        print("Loading the app in-process (this prepares the simulation data)...")
+        from app import app, startup_jobs
+        for job in startup_jobs:
+            job.wait()
+        transport = ClientTransport(app)
+        target = 'the in-process app'
+    
+    amount = f"for {args.duration:g}s" if args.duration else f"{args.views} views ({args.views * 5} requests)"
+    print(f"Load testing {target}: {amount} with {args.concurrency} concurrent users")
+    result = run_load_test(
+        transport,
+        modes,
+        periods,
+        timelines,
+        views=args.views,
+        duration=args.duration,
+        concurrency=args.concurrency,
+        seed=args.seed,
+        progress=lambda done: print(f"  {done} requests")
+    )
+    
+    print()
+    for line in result.report():
+        print(line)
+    if args.output:
+        save_result(result, args.output)
+        print(f"Saved results to {args.output}")
+
+def run_memreport(args):
+    """Load the app in-process, warm its caches with dashboard traffic and report what holds the memory."""
+    from models import memory
+    from models.loadtest import ClientTransport, run_load_test
+    
+    print("Loading the app in-process (this prepares the simulation data)...")
+    import app as app_module
+    for job in app_module.startup_jobs:
+        job.wait()
+    
+    data_processor = app_module.data_processor
+    if args.warm_views:
+        print(f"Warming the caches with {args.warm_views} dashboard views...")
+        run_load_test(ClientTransport(app_module.app), list(data_processor.simulation_params),
+                      list(data_processor.PERIOD_START_DATES), ['all'] + list(data_processor.TIMELINE_DAYS),
+                      views=args.warm_views, concurrency=1, seed=0)
+    
+    report = memory.memory_report(data_processor, app_module.cache, market_data=args.market)
+    print()
+    for line in memory.format_report(report):
+        print(line)
+    
+    trace = app_module.trace_api_request(args.trace or app_module.REPRESENTATIVE_REQUEST, top=args.top)
+    report['trace'] = trace
+    print(f"\nTop allocators of {trace['path']} (uncached; peak {memory.format_bytes(trace['peak_bytes'])}):")
+    for allocator in trace['allocators']:
+        print(f"  {memory.format_bytes(allocator['bytes']):>10}{allocator['count']:>9} blocks  {allocator['location']}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Saved the report to {args.output}")
+
+def run_profiled(args, command):
+    """Run a command with the phase timers (and optionally cProfile) enabled, then print the breakdown."""
+    import cProfile
+    import time
+    from models import profiling
+    
+    profiling.enable()
+    profiler = cProfile.Profile() if args.profile_output else None
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.runcall(command, args)
+        else:
+            command(args)
+    finally:
+        wall_seconds = time.perf_counter() - start
+        profiling.disable()
+        print("\nProfile (cumulative; nested phases overlap, worker processes are not included):")
+        for line in profiling.TIMER.report(wall_seconds):
+            print(line)
+        if profiler:
+            profiler.dump_stats(args.profile_output)
+            print(f"Saved cProfile statistics to {args.profile_output}")
+
+def dispatch(args):
+    """Run the selected command."""
     if args.command == 'generate-market-data':
-        generate_market_data()
+        generate_market_data(args)
+    elif args.command == 'build-market-store':
+        build_market_store(args)
+    elif args.command == 'ingest':
+        ingest_price_files(args)
     elif args.command == 'generate':
         generate_simulation(args)
     elif args.command == 'regenerate-all':
-        regenerate_all_simulations()
+        regenerate_all_simulations(args)
+    elif args.command == 'roll-forward':
+        roll_forward(args)
     elif args.command == 'run':
         run_app(args)
+    elif args.command == 'montecarlo':
+        run_montecarlo(args)
+    elif args.command == 'walkforward':
+        run_walkforward(args)
+    elif args.command == 'intraday':
+        run_intraday(args)
+    elif args.command == 'live':
+        run_live_daemon(args)
+    elif args.command == 'kernel-check':
+        run_kernel_check(args)
+    elif args.command == 'loadtest':
+        run_load_test(args)
+    elif args.command == 'memreport':
+        run_memreport(args)
     else:
         print("No command specified. Use --help for usage information.")
 
+def main():
+    args = parse_args()
+    configure_logging(getattr(args, 'log_level', None))
+    
+    if getattr(args, 'profile', False):
+        run_profiled(args, dispatch)
+    else:
+        dispatch(args)
+
 if __name__ == '__main__':
     main() 
\ No newline at end of file
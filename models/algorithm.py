@@ -3,12 +3,20 @@ import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
 import json
+import logging
 import os
+from models import kernel
+from models.benchmarks import BenchmarkTracker
+from models.price_matrix import PriceMatrix
+from models.profiling import phase
+from models.telemetry import timed
+
+logger = logging.getLogger(__name__)
 
 class FiveTenAlgo:
     def __init__(self, initial_capital=1000000, stability_minutes=3, 
                 buy_threshold=(-5.5, -4.5), sell_threshold=(9.5, 10.5),
-                trade_size_buy_pct=0.001, trade_size_sell_pct=0.002):
+                trade_size_buy_pct=0.001, trade_size_sell_pct=0.002, seed=None):
         """
         Initialize the FiveTenAlgo trading algorithm.
         
@@ -19,12 +27,16 @@ class FiveTenAlgo:
         sell_threshold (tuple): Low and high percentages for sell signal (default: 9.5% to 10.5%)
         trade_size_buy_pct (float): Percentage of capital to use per buy (default: 0.1%)
         trade_size_sell_pct (float): Percentage of capital to use per sell (default: 0.2%)
+        seed (int or SeedSequence): Seed for sampling buy candidates; None uses the global NumPy state
         """
         self.initial_capital = initial_capital
         self.capital = initial_capital
         self.portfolio = {}  # Symbol: {'shares': quantity, 'cost_basis': total_cost}
         self.trade_log = []
         self.performance_history = []
+        self.benchmark_history = []  # Equal-weight buy-and-hold and cash benchmarks, per bar
+        self.last_prices = {}  # Symbol: last known price, carried forward for valuation
+        self.cutoff_date = None  # Date the simulation was last rolled forward to (YYYY-MM-DD), if any
         self.stability_minutes = stability_minutes  # Minutes required for signal confirmation
         
         # Thresholds for trading signals
@@ -35,6 +47,9 @@ class FiveTenAlgo:
         self.trade_size_buy_pct = trade_size_buy_pct
         self.trade_size_sell_pct = trade_size_sell_pct
         
+        # Random source for candidate sampling, seeded for reproducible runs
+        self._rng = np.random.default_rng(seed) if seed is not None else np.random
+        
     def check_buy_signal(self, current_price, week_ago_price):
         """Check if the price drop is within the buy threshold range."""
         if week_ago_price <= 0:
@@ -51,6 +66,7 @@ class FiveTenAlgo:
         price_change_pct = (current_price - week_ago_price) / week_ago_price * 100
         return self.sell_threshold_low <= price_change_pct <= self.sell_threshold_high
     
+    @phase('trade_execution')
     def execute_buy(self, symbol, price, date):
         """Execute a buy order based on the configured percentage of capital."""
         # Calculate the dollar amount to buy based on percentage of initial capital
@@ -89,6 +105,7 @@ class FiveTenAlgo:
         
         return True
     
+    @phase('trade_execution')
     def execute_sell(self, symbol, price, date):
         """Execute a sell order based on the configured percentage of capital."""
         if symbol not in self.portfolio or self.portfolio[symbol]['shares'] <= 0:
@@ -131,86 +148,281 @@ class FiveTenAlgo:
         
         return True
     
+    @phase('simulation')
+    @timed('process_market_data')
     def process_market_data(self, market_data):
         """
         Process market data for a specific period.
-        market_data: DataFrame with columns [symbol, date, price]
+        market_data: DataFrame with columns [symbol, date, price], or a PriceMatrix
         """
-        # Group by date to process one day at a time
-        dates = market_data['date'].unique()
-        dates.sort()
+        run_forked_simulations(market_data, [(self, None)])
+    
+    @phase('signal_scan')
+    def signal_masks(self, change_pct, valid):
+        """
+        Buy and sell signal masks for one bar.
         
-        # Create a lookup table for all symbols and their previous prices
-        symbols = market_data['symbol'].unique()
-        symbol_price_history = {symbol: {} for symbol in symbols}
+        Args:
+            change_pct: Price change against a week ago for every symbol
+            valid: Symbols with a positive week-ago price
+            
+        Returns:
+            (buy_mask, sell_mask) boolean arrays
+        """
+        buy_mask = valid & (self.buy_threshold_low <= change_pct) & (change_pct <= self.buy_threshold_high)
+        sell_mask = valid & ~buy_mask & (self.sell_threshold_low <= change_pct) & (change_pct <= self.sell_threshold_high)
+        return buy_mask, sell_mask
+    
+    @property
+    def signal_key(self):
+        """Simulations with equal keys produce identical signal masks."""
+        return (self.buy_threshold_low, self.buy_threshold_high, self.sell_threshold_low, self.sell_threshold_high)
+    
+    def start_scan(self, matrix):
+        """Prepare for a scan over a price matrix: symbol columns, last prices and benchmarks."""
+        # Held symbols outside the matrix get columns past it, valued at their last known price
+        listed = set(matrix.symbols)
+        self._symbols = list(matrix.symbols) + [symbol for symbol in self.portfolio if symbol not in listed]
+        self._columns = {symbol: i for i, symbol in enumerate(self._symbols)}
+        
+        # Forward-filled last price of every column (0 until a price is known)
+        self._marks = np.zeros(len(self._symbols))
+        for symbol, price in self.last_prices.items():
+            column = self._columns.get(symbol)
+            if column is not None:
+                self._marks[column] = price
+        
+        # Benchmarks over the same universe and bars, continuing from their last values.
+        # A scan continuing an earlier one over the same universe (a chunked run) keeps
+        # the benchmark holdings instead of re-buying them at the new prices
+        universe = getattr(self, '_universe', None)
+        continuing = (self.benchmark_history and universe is not None
+                      and len(universe) == len(matrix.symbols) and np.array_equal(universe, matrix.symbols))
+        if not continuing:
+            if self.benchmark_history:
+                last = self.benchmark_history[-1]
+                self._benchmarks = BenchmarkTracker(len(matrix.symbols), last['equal_weight'], last['cash'], last['date'])
+            else:
+                start_value = self.performance_history[-1]['portfolio_value'] if self.performance_history else self.initial_capital
+                self._benchmarks = BenchmarkTracker(len(matrix.symbols), start_value)
+        self._universe = matrix.symbols
+    
+    def process_bar(self, matrix, row, masks=None):
+        """
+        Trade and record one bar of a scan started with start_scan.
+        
+        Args:
+            matrix: The PriceMatrix being scanned
+            row: Index of the bar
+            masks: (buy_mask, sell_mask) for the bar, or None without week-ago prices
+        """
+        symbols = matrix.symbols
+        current_date = matrix.dates[row]
+        day_prices = matrix.prices[row]
         
-        for current_date in dates:
-            day_data = market_data[market_data['date'] == current_date]
+        if masks is not None:
+            buy_mask, sell_mask = masks
             
-            # Get data from one week ago
-            week_ago_date = (pd.to_datetime(current_date) - pd.Timedelta(days=7)).strftime('%Y-%m-%d')
-            week_ago_data = market_data[market_data['date'] == week_ago_date]
+            # Identify all buy and sell candidates, in symbol order
+            buy_candidates = [(symbols[i], day_prices[i]) for i in np.flatnonzero(buy_mask)]
+            sell_candidates = [(symbols[i], day_prices[i]) for i in np.flatnonzero(sell_mask)
+                               if symbols[i] in self.portfolio]
             
-            # Update the lookup table for all symbols on this date
-            for _, row in day_data.iterrows():
-                symbol = row['symbol']
-                current_price = row['price']
-                symbol_price_history[symbol][current_date] = current_price
+            # Randomly sample buy candidates if we have too many (to avoid concentration)
+            if len(buy_candidates) > 10:
+                self._rng.shuffle(buy_candidates)
+                buy_candidates = buy_candidates[:10]
             
-            if len(week_ago_data) > 0:
-                # Process each stock on this date
-                buy_candidates = []
-                sell_candidates = []
-                
-                # First, identify all buy and sell candidates
-                for _, row in day_data.iterrows():
-                    symbol = row['symbol']
-                    current_price = row['price']
-                    
-                    # Get this symbol's price from a week ago
-                    symbol_week_ago = week_ago_data[week_ago_data['symbol'] == symbol]
-                    
-                    if len(symbol_week_ago) > 0:
-                        week_ago_price = symbol_week_ago.iloc[0]['price']
-                        
-                        # Check for buy signal
-                        if self.check_buy_signal(current_price, week_ago_price):
-                            buy_candidates.append((symbol, current_price))
-                        
-                        # Check for sell signal for stocks we own
-                        elif symbol in self.portfolio and self.check_sell_signal(current_price, week_ago_price):
-                            sell_candidates.append((symbol, current_price))
-                
-                # Randomly sample buy candidates if we have too many (to avoid concentration)
-                if len(buy_candidates) > 10:
-                    np.random.shuffle(buy_candidates)
-                    buy_candidates = buy_candidates[:10]
-                
-                # Execute buys for the selected candidates
-                for symbol, price in buy_candidates:
-                    if self.capital > self.initial_capital * self.trade_size_buy_pct:
-                        self.execute_buy(symbol, price, current_date)
-                
-                # Execute sells for all sell candidates
-                for symbol, price in sell_candidates:
-                    self.execute_sell(symbol, price, current_date)
+            # Execute buys for the selected candidates
+            for symbol, price in buy_candidates:
+                if self.capital > self.initial_capital * self.trade_size_buy_pct:
+                    self.execute_buy(symbol, price, current_date)
+            
+            # Execute sells for all sell candidates
+            for symbol, price in sell_candidates:
+                self.execute_sell(symbol, price, current_date)
+        
+        # Calculate total portfolio value at end of day, at the last known prices
+        listed = day_prices > 0
+        np.copyto(self._marks[:len(day_prices)], day_prices, where=listed)
+        shares = np.zeros(len(self._symbols))
+        for symbol, details in self.portfolio.items():
+            shares[self._columns[symbol]] = details['shares']
+        portfolio_value = self.capital + mark_to_market(shares, self._marks)
+        
+        # Record performance
+        self.performance_history.append({
+            'date': current_date,
+            'portfolio_value': portfolio_value,
+            'cash': self.capital,
+            'total_return': (portfolio_value / self.initial_capital - 1) * 100
+        })
+        
+        equal_weight, cash = self._benchmarks.update(day_prices, matrix.days[row])
+        self.benchmark_history.append({
+            'date': current_date,
+            'equal_weight': equal_weight,
+            'cash': cash
+        })
+    
+    def finish_scan(self):
+        """Record the last known prices of a scan, so the next one carries them forward."""
+        self.last_prices = {symbol: float(price) for symbol, price in zip(self._symbols, self._marks) if price > 0}
+    
+    def execute_scan(self, matrix, first_row, buys, sells):
+        """
+        Run the bars of a scan from first_row on through the compiled kernel.
+        
+        Equivalent to start_scan followed by process_bar for every bar, with the
+        candidate selection done up front and the execution loop in the kernel.
+        
+        Args:
+            matrix: The PriceMatrix being scanned
+            first_row: Index of the first bar to process
+            buys: (rows, columns) of buy signals from first_row on, sorted by row
+            sells: (rows, columns) of sell signals from first_row on, sorted by row
+        """
+        self.start_scan(matrix)
+        prices = matrix.prices[first_row:]
+        bars = len(prices)
+        
+        # Randomly sample buy candidates if a bar has too many (to avoid concentration)
+        buy_rows, buy_columns = buys
+        buy_ptr = np.searchsorted(buy_rows, np.arange(first_row, first_row + bars + 1))
+        crowded = np.flatnonzero(np.diff(buy_ptr) > 10)
+        if len(crowded):
+            keep = np.ones(len(buy_columns), dtype=bool)
+            buy_columns = buy_columns.copy()
+            for bar in crowded:
+                start, stop = buy_ptr[bar], buy_ptr[bar + 1]
+                candidates = buy_columns[start:stop].tolist()
+                self._rng.shuffle(candidates)
+                buy_columns[start:stop] = candidates
+                keep[start + 10:stop] = False
+            buy_columns = buy_columns[keep]
+            buy_ptr = np.searchsorted(buy_rows[keep], np.arange(first_row, first_row + bars + 1))
+        sell_rows, sell_columns = sells
+        sell_ptr = np.searchsorted(sell_rows, np.arange(first_row, first_row + bars + 1))
+        
+        # Holdings as arrays over the scan's columns
+        symbols = self._symbols
+        shares = np.zeros(len(symbols))
+        cost_basis = np.zeros(len(symbols))
+        held = np.zeros(len(symbols), dtype=bool)
+        order = np.zeros(len(symbols), dtype=np.int64)
+        for position, (symbol, details) in enumerate(self.portfolio.items()):
+            column = self._columns[symbol]
+            shares[column] = details['shares']
+            cost_basis[column] = details['cost_basis']
+            held[column] = True
+            order[position] = column
+        start_shares = shares.copy()
+        
+        capacity = len(buy_columns) + len(sell_columns)
+        trade_bar = np.zeros(capacity, dtype=np.int64)
+        trade_column = np.zeros(capacity, dtype=np.int64)
+        trade_side = np.zeros(capacity, dtype=np.int8)
+        trade_shares = np.zeros(capacity)
+        trade_value = np.zeros(capacity)
+        trade_profit_loss = np.zeros(capacity)
+        cash = np.zeros(bars)
+        
+        capital, held_count, trade_count = kernel.execute_bars(
+            prices, buy_ptr, buy_columns, sell_ptr, sell_columns, float(self.capital),
+            self.initial_capital * self.trade_size_buy_pct, self.initial_capital * self.trade_size_sell_pct,
+            shares, cost_basis, held, order, len(self.portfolio),
+            trade_bar, trade_column, trade_side, trade_shares, trade_value, trade_profit_loss,
+            cash
+        )
+        trade_bar, trade_column, trade_side, trade_shares = (
+            trade_bar[:trade_count], trade_column[:trade_count], trade_side[:trade_count], trade_shares[:trade_count])
+        values = self._value_bars(prices, cash, start_shares, trade_bar, trade_column,
+                                  np.where(trade_side == kernel.BUY, trade_shares, -trade_shares))
+        
+        # Back to the dict-based state
+        self.capital = float(capital)
+        self.portfolio = {
+            symbols[column]: {'shares': float(shares[column]), 'cost_basis': float(cost_basis[column])}
+            for column in order[:held_count]
+        }
+        dates = matrix.dates[first_row:].tolist()
+        trade_dates = [dates[bar] for bar in trade_bar.tolist()]
+        trade_symbols = [symbols[column] for column in trade_column.tolist()]
+        trade_prices = prices[trade_bar, trade_column].tolist()
+        for date, symbol, side, price, quantity, value, profit_loss in zip(
+                trade_dates, trade_symbols, trade_side.tolist(), trade_prices, trade_shares.tolist(),
+                trade_value[:trade_count].tolist(), trade_profit_loss[:trade_count].tolist()):
+            if side == kernel.BUY:
+                self.trade_log.append({'date': date, 'symbol': symbol, 'action': 'BUY',
+                                       'price': price, 'shares': quantity, 'value': value})
+            else:
+                self.trade_log.append({'date': date, 'symbol': symbol, 'action': 'SELL',
+                                       'price': price, 'shares': quantity, 'value': value,
+                                       'profit_loss': profit_loss})
+        
+        total_returns = (values / self.initial_capital - 1) * 100
+        self.performance_history.extend(
+            {'date': date, 'portfolio_value': portfolio_value, 'cash': capital, 'total_return': total_return}
+            for date, portfolio_value, capital, total_return
+            in zip(dates, values.tolist(), cash.tolist(), total_returns.tolist())
+        )
+        
+        days = matrix.days[first_row:]
+        for start in range(0, bars, VALUATION_BLOCK_ROWS):
+            stop = min(start + VALUATION_BLOCK_ROWS, bars)
+            equal_weight, benchmark_cash = self._benchmarks.update_block(prices[start:stop], days[start:stop])
+            self.benchmark_history.extend(
+                {'date': date, 'equal_weight': value, 'cash': capital}
+                for date, value, capital in zip(dates[start:stop], equal_weight.tolist(), benchmark_cash.tolist())
+            )
+    
+    @phase('valuation')
+    def _value_bars(self, prices, cash, shares, trade_bar, trade_column, share_changes):
+        """
+        Portfolio value at every bar of a kernel scan, at the last known prices.
+        
+        Holdings are rebuilt from the trades with a running sum and prices are
+        forward-filled, one block of bars at a time; each bar is then marked
+        with the same reduction as process_bar, so values match it exactly.
+        
+        Args:
+            prices: bars x symbols prices of the scan
+            cash: Cash at every bar
+            shares: Holdings per column before the first bar
+            trade_bar, trade_column, share_changes: Shares bought (+) or sold (-) per trade, in bar order
+            
+        Returns:
+            Array of portfolio values
+        """
+        bars, listed_columns = prices.shape
+        values = np.zeros(bars)
+        bounds = np.append(np.arange(0, bars, VALUATION_BLOCK_ROWS), bars)
+        trade_ptr = np.searchsorted(trade_bar, bounds)
+        
+        for block, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            block_prices = prices[start:stop]
+            
+            # Last known prices: the latest listed bar of the block, else the marks before it
+            marks = np.tile(self._marks, (stop - start, 1))
+            latest = np.where(block_prices > 0, np.arange(stop - start)[:, np.newaxis], -1)
+            np.maximum.accumulate(latest, axis=0, out=latest)
+            known = latest >= 0
+            marks[:, :listed_columns][known] = block_prices[latest[known], np.nonzero(known)[1]]
+            self._marks = marks[-1].copy()
             
-            # Calculate total portfolio value at end of day
-            portfolio_value = self.capital
-            for symbol, details in self.portfolio.items():
-                symbol_day_data = day_data[day_data['symbol'] == symbol]
-                if len(symbol_day_data) > 0:
-                    symbol_price = symbol_day_data.iloc[0]['price']
-                    portfolio_value += details['shares'] * symbol_price
+            # Holdings after every bar, adding each bar's changes to the previous bar's holdings
+            holdings = np.zeros((stop - start, len(shares)))
+            holdings[0] = shares
+            trades = slice(trade_ptr[block], trade_ptr[block + 1])
+            holdings[trade_bar[trades] - start, trade_column[trades]] += share_changes[trades]
+            np.cumsum(holdings, axis=0, out=holdings)
+            shares = holdings[-1].copy()
             
-            # Record performance
-            self.performance_history.append({
-                'date': current_date,
-                'portfolio_value': portfolio_value,
-                'cash': self.capital,
-                'total_return': (portfolio_value / self.initial_capital - 1) * 100
-            })
+            values[start:stop] = cash[start:stop] + mark_to_market(holdings, marks)
+        return values
     
+    @phase('save_simulation')
+    @timed('save_simulation')
     def save_simulation(self, filename):
         """Save the current simulation state to a file."""
         try:
@@ -220,8 +432,12 @@ class FiveTenAlgo:
                 'portfolio': self.portfolio,
                 'trade_log': self.trade_log,
                 'performance_history': self.performance_history,
+                'benchmark_history': self.benchmark_history,
+                'last_prices': self.last_prices,
                 'initial_capital': self.initial_capital
             }
+            if self.cutoff_date:
+                data['cutoff_date'] = self.cutoff_date
             
             # Ensure all data is JSON serializable
             for entry in data['performance_history']:
@@ -230,7 +446,7 @@ class FiveTenAlgo:
                         entry[key] = 0.0
                     # Cap extremely large values that might be errors
                     if isinstance(value, float) and value > 1e9:  # Cap at 1 billion
-                        print(f"WARNING: Capping extremely large value {value} to 1 billion")
+                        logger.warning("Capping extremely large value %s to 1 billion", value)
                         entry[key] = 1e9
             
             for entry in data['trade_log']:
@@ -239,25 +455,9 @@ class FiveTenAlgo:
                         entry[key] = 0.0
                     # Cap extremely large values that might be errors
                     if isinstance(value, float) and value > 1e9:  # Cap at 1 billion
-                        print(f"WARNING: Capping extremely large value {value} to 1 billion")
+                        logger.warning("Capping extremely large value %s to 1 billion", value)
                         entry[key] = 1e9
             
-            # Check for anomalous jumps in the performance history
-            if len(data['performance_history']) > 1:
-                for i in range(1, len(data['performance_history'])):
-                    curr = data['performance_history'][i]
-                    prev = data['performance_history'][i-1]
-                    
-                    # Check for suspicious jumps in portfolio value (>50% in one day)
-                    if 'portfolio_value' in curr and 'portfolio_value' in prev:
-                        curr_value = curr['portfolio_value']
-                        prev_value = prev['portfolio_value']
-                        
-                        if prev_value > 0 and curr_value / prev_value > 1.5:
-                            print(f"WARNING: Correcting suspicious jump in portfolio value on {curr['date']}")
-                            # Replace with a more reasonable value (5% growth)
-                            data['performance_history'][i]['portfolio_value'] = prev_value * 1.05
-            
             # Create parent directory if it doesn't exist
             os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
             
@@ -267,9 +467,9 @@ class FiveTenAlgo:
                 import shutil
                 try:
                     shutil.copy2(filename, backup_file)
-                    print(f"Created backup: {filename} -> {backup_file}")
+                    logger.info("Created backup: %s -> %s", filename, backup_file)
                 except Exception as e:
-                    print(f"Warning: Failed to create backup: {e}")
+                    logger.warning("Failed to create backup: %s", e)
             
             # Write to a temporary file first to prevent partial writes
             temp_filename = filename + '.tmp'
@@ -277,22 +477,28 @@ class FiveTenAlgo:
                 json.dump(data, f)
                 
             # Verify the file was written correctly
-            with open(temp_filename, 'r') as f:
-                # This will raise an exception if the JSON is invalid
-                json.load(f)
+            self._verify_file(temp_filename)
             
             # Replace the original file
             os.replace(temp_filename, filename)
             
             return True
         except Exception as e:
-            print(f"Error saving simulation data: {e}")
+            logger.error("Error saving simulation data: %s", e)
             return False
     
+    @phase('verify_reread')
+    def _verify_file(self, filename):
+        """Re-read a written simulation file; raises if the JSON is invalid."""
+        with open(filename, 'r') as f:
+            json.load(f)
+    
+    @phase('load_simulation')
+    @timed('load_simulation')
     def load_simulation(self, filename):
         """Load simulation results from a file."""
         if not os.path.exists(filename):
-            print(f"File not found: {filename}")
+            logger.info("File not found: %s", filename)
             return False
         
         # First try to load the file directly
@@ -304,7 +510,10 @@ class FiveTenAlgo:
             self.portfolio = data['portfolio']
             self.trade_log = data['trade_log']
             self.performance_history = data['performance_history']
+            self.benchmark_history = data.get('benchmark_history', [])
+            self.last_prices = data.get('last_prices', {})
             self.initial_capital = data.get('initial_capital', self.initial_capital)
+            self.cutoff_date = data.get('cutoff_date')
             
             # Perform data validation and corrections
             self._validate_and_fix_data()
@@ -312,12 +521,12 @@ class FiveTenAlgo:
             return True
         
         except json.JSONDecodeError as e:
-            print(f"Error parsing JSON from {filename}: {e}")
+            logger.error("Error parsing JSON from %s: %s", filename, e)
             
             # Try to load a backup file if it exists
             backup_file = filename + '.backup'
             if os.path.exists(backup_file):
-                print(f"Attempting to load from backup file: {backup_file}")
+                logger.info("Attempting to load from backup file: %s", backup_file)
                 try:
                     with open(backup_file, 'r') as f:
                         data = json.load(f)
@@ -326,7 +535,10 @@ class FiveTenAlgo:
                     self.portfolio = data['portfolio']
                     self.trade_log = data['trade_log']
                     self.performance_history = data['performance_history']
+                    self.benchmark_history = data.get('benchmark_history', [])
+                    self.last_prices = data.get('last_prices', {})
                     self.initial_capital = data.get('initial_capital', self.initial_capital)
+                    self.cutoff_date = data.get('cutoff_date')
                     
                     # Perform data validation and corrections
                     self._validate_and_fix_data()
@@ -334,15 +546,15 @@ class FiveTenAlgo:
                     # Restore the backup to the original file
                     import shutil
                     shutil.copy2(backup_file, filename)
-                    print(f"Restored from backup: {backup_file} -> {filename}")
+                    logger.info("Restored from backup: %s -> %s", backup_file, filename)
                     
                     return True
                 except Exception as backup_error:
-                    print(f"Failed to load backup: {backup_error}")
+                    logger.error("Failed to load backup: %s", backup_error)
             
             return False
         except Exception as e:
-            print(f"Error loading simulation from {filename}: {e}")
+            logger.error("Error loading simulation from %s: %s", filename, e)
             return False
     
     def _validate_and_fix_data(self):
@@ -352,39 +564,23 @@ class FiveTenAlgo:
             for i, entry in enumerate(self.performance_history):
                 for key, value in list(entry.items()):
                     if isinstance(value, float) and (np.isnan(value) or np.isinf(value)):
-                        print(f"Warning: Found invalid value {value} in performance history. Setting to 0.0")
+                        logger.warning("Found invalid value %s in performance history. Setting to 0.0", value)
                         self.performance_history[i][key] = 0.0
                     # Cap extremely large values
                     if isinstance(value, float) and value > 1e9:  # Cap at 1 billion
-                        print(f"Warning: Capping extremely large value {value} to 1 billion")
+                        logger.warning("Capping extremely large value %s to 1 billion", value)
                         self.performance_history[i][key] = 1e9
-            
-            # Check for abnormal jumps
-            for i in range(1, len(self.performance_history)):
-                curr = self.performance_history[i]
-                prev = self.performance_history[i-1]
-                
-                if 'portfolio_value' in curr and 'portfolio_value' in prev:
-                    curr_value = curr['portfolio_value']
-                    prev_value = prev['portfolio_value']
-                    
-                    # Check for suspicious jumps (>50% in one day)
-                    if prev_value > 0 and curr_value / prev_value > 1.5:
-                        print(f"Warning: Detected abnormal jump in portfolio value on {curr['date']}")
-                        # Smooth out the jump (use a 5% growth instead)
-                        self.performance_history[i]['portfolio_value'] = prev_value * 1.05
-                        print(f"Corrected value from {curr_value} to {self.performance_history[i]['portfolio_value']}")
         
         # Validate portfolio values
         for symbol, details in list(self.portfolio.items()):
             if 'shares' not in details or 'cost_basis' not in details:
-                print(f"Warning: Invalid portfolio entry for {symbol}. Removing.")
+                logger.warning("Invalid portfolio entry for %s. Removing.", symbol)
                 del self.portfolio[symbol]
             elif details['shares'] <= 0:
-                print(f"Warning: Zero or negative shares for {symbol}. Removing from portfolio.")
+                logger.warning("Zero or negative shares for %s. Removing from portfolio.", symbol)
                 del self.portfolio[symbol]
             elif details['cost_basis'] <= 0:
-                print(f"Warning: Zero or negative cost basis for {symbol}. Fixing.")
+                logger.warning("Zero or negative cost basis for %s. Fixing.", symbol)
                 self.portfolio[symbol]['cost_basis'] = details['shares'] * 100  # Assume $100 price
     
     def generate_precomputed_data(self, start_date, end_date, symbols=None, output_file=None):
@@ -422,7 +618,7 @@ class FiveTenAlgo:
                     
                     all_data.append(symbol_data)
             except Exception as e:
-                print(f"Error downloading {symbol}: {e}")
+                logger.error("Error downloading %s: %s", symbol, e)
         
         if not all_data:
             return False
@@ -494,10 +690,171 @@ def create_sample_data(output_file, symbols=['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'M
                 symbol_data['date'] = symbol_data['date'].dt.strftime('%Y-%m-%d')
                 all_data.append(symbol_data)
         except Exception as e:
-            print(f"Error downloading {symbol}: {e}")
+            logger.error("Error downloading %s: %s", symbol, e)
     
     if all_data:
         combined_data = pd.concat(all_data)
         combined_data.to_csv(output_file, index=False)
         return True
-    return False 
\ No newline at end of file
+    return False 
+
+
+@phase('valuation')
+def mark_to_market(shares, marks):
+    """
+    Value holdings at their marks: shares and marks are per-column arrays
+    (or bars x columns, giving one value per bar).
+    """
+    return (shares * marks).sum(axis=-1)
+
+
+@phase('simulation')
+def run_forked_simulations(market_data, simulations, compiled=None, context_rows=0, signal_pool=None):
+    """
+    Run several simulations in a single scan over the market data.
+    
+    Each simulation starts trading at its own start date with its own capital,
+    as if it had been run on the data from that date on. The price change
+    against a week ago is computed once per bar for all of them, and signal
+    masks are shared by simulations with the same thresholds.
+    
+    Args:
+        market_data: DataFrame with columns [symbol, date, price], or a PriceMatrix
+        simulations: List of (FiveTenAlgo, start_date) pairs; a start_date of
+            None starts at the first bar
+        compiled: Execute trades in the compiled kernel; defaults to whether
+            Numba is installed
+        context_rows: Leading bars that only serve as week-ago references for
+            simulations continuing from an earlier scan; trading starts after them
+        signal_pool: SignalPool (models/sharding.py) to detect signals in worker
+            processes; trades are then executed through the kernel's scan path
+    """
+    matrix = PriceMatrix.from_frame(market_data)
+    prices = matrix.prices
+    week_ago_index = matrix.week_ago_index()
+    
+    # The first bar of each simulation, in scan order
+    pending = sorted(
+        ((0 if start_date is None else int(np.searchsorted(matrix.dates, start_date)), algo)
+         for algo, start_date in simulations),
+        key=lambda item: item[0]
+    )
+    
+    if compiled is None:
+        compiled = kernel.NUMBA_AVAILABLE
+    if compiled or signal_pool is not None:
+        _run_compiled(matrix, week_ago_index, pending, context_rows, signal_pool)
+        for _, algo in pending:
+            algo.finish_scan()
+        return
+    
+    active = []
+    
+    for row in range(context_rows, len(matrix)):
+        while pending and pending[0][0] <= row:
+            first_row, algo = pending.pop(0)
+            algo.start_scan(matrix)
+            active.append((first_row, algo))
+        
+        if week_ago_index[row] >= 0:
+            day_prices = prices[row]
+            week_ago_prices = prices[week_ago_index[row]]
+            
+            # Price change against a week ago for every symbol at once
+            with np.errstate(invalid='ignore', divide='ignore'):
+                change_pct = (day_prices - week_ago_prices) / week_ago_prices * 100
+            valid = week_ago_prices > 0
+        
+        shared_masks = {}
+        for first_row, algo in active:
+            # A fresh simulation sees no prices before its first bar
+            if week_ago_index[row] < first_row:
+                algo.process_bar(matrix, row)
+                continue
+            
+            key = algo.signal_key
+            if key not in shared_masks:
+                shared_masks[key] = algo.signal_masks(change_pct, valid)
+            algo.process_bar(matrix, row, shared_masks[key])
+    
+    for _, algo in active:
+        algo.finish_scan()
+
+
+# Bars per block when detecting signals and valuing holdings for the compiled kernel
+SIGNAL_BLOCK_ROWS = 512
+VALUATION_BLOCK_ROWS = 512
+
+
+@phase('signal_scan')
+def detect_signals(prices, week_ago_index, algos, start_row=0):
+    """
+    Buy and sell signals of every distinct threshold set, detected in row blocks.
+    
+    Signals are kept as (row, column) pairs sorted by row then column, rather
+    than dense masks, so memory follows the number of signals instead of
+    bars x symbols.
+    
+    Args:
+        prices: bars x symbols prices (any subset of the symbol columns)
+        week_ago_index: Index of the bar one week before every bar, or -1
+        algos: signal_key: FiveTenAlgo with those thresholds
+        start_row: First bar to detect signals at
+        
+    Returns:
+        Dict of signal_key: ((buy_rows, buy_columns), (sell_rows, sell_columns))
+    """
+    signals = {key: ([], []) for key in algos}
+    for start in range(start_row, len(prices), SIGNAL_BLOCK_ROWS):
+        rows = np.arange(start, min(start + SIGNAL_BLOCK_ROWS, len(prices)))
+        rows = rows[week_ago_index[rows] >= 0]
+        if not len(rows):
+            continue
+        day_prices = prices[rows]
+        week_ago_prices = prices[week_ago_index[rows]]
+        
+        # Price change against a week ago for every symbol at once
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change_pct = (day_prices - week_ago_prices) / week_ago_prices * 100
+        valid = week_ago_prices > 0
+        
+        for key, algo in algos.items():
+            for masks, mask in zip(signals[key], algo.signal_masks(change_pct, valid)):
+                block_rows, columns = np.nonzero(mask)
+                masks.append((rows[block_rows], columns))
+    
+    def concat(parts):
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return (np.concatenate([rows for rows, _ in parts]).astype(np.int64),
+                np.concatenate([columns for _, columns in parts]).astype(np.int64))
+    
+    return {key: (concat(buys), concat(sells)) for key, (buys, sells) in signals.items()}
+
+
+def _run_compiled(matrix, week_ago_index, simulations, context_rows=0, signal_pool=None):
+    """
+    Detect signals for every distinct threshold set, then run each simulation's
+    bars through the compiled kernel.
+    
+    With a signal_pool the detection is sharded by symbol across its worker
+    processes; the merged signals are the same.
+    """
+    keys = {}
+    for _, algo in simulations:
+        keys.setdefault(algo.signal_key, algo)
+    
+    if signal_pool is not None:
+        signals = signal_pool.detect(matrix.prices, week_ago_index, list(keys), context_rows)
+    else:
+        signals = detect_signals(matrix.prices, week_ago_index, keys, context_rows)
+    
+    for first_row, algo in simulations:
+        (buy_rows, buy_columns), (sell_rows, sell_columns) = signals[algo.signal_key]
+        
+        # A fresh simulation sees no prices before its first bar
+        seen_buys = week_ago_index[buy_rows] >= first_row
+        seen_sells = week_ago_index[sell_rows] >= first_row
+        algo.execute_scan(matrix, max(first_row, context_rows),
+                          (buy_rows[seen_buys], buy_columns[seen_buys]),
+                          (sell_rows[seen_sells], sell_columns[seen_sells]))
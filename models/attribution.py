@@ -0,0 +1,190 @@
+"""
+Per-symbol P&L attribution over a simulation's trade log.
+
+The index is built once per artifact. Trades are numbered in date order and
+regrouped by symbol id, and every per-trade quantity gets a running total in
+that symbol-major order. Any date range then maps to one [low, high) slice
+of every symbol's run, found for all symbols at once with searchsorted, so a
+query costs O(symbols * log trades) with no per-request loop over trades.
+"""
+import numpy as np
+
+# Fields that can be used to sort the attribution rows
+SORT_FIELDS = (
+    'total_pnl',
+    'realized_pnl',
+    'unrealized_pnl',
+    'invested',
+    'trade_count',
+    'avg_hold_days'
+)
+
+# Per-trade quantities with a running total in symbol-major order
+_SUMMED = ('realized_pnl', 'invested', 'proceeds', 'buys', 'sells', 'hold_share_days', 'sold_shares')
+
+
+class AttributionIndex:
+    def __init__(self, trade_log, portfolio=None, last_prices=None):
+        """
+        Build the attribution index.
+
+        Parameters:
+        trade_log (list): Trades with date, symbol, action, price, shares, value
+                          and (for sells) profit_loss
+        portfolio (dict): Current holdings, symbol: {'shares', 'cost_basis'}
+        last_prices (dict): Last known prices to mark open positions at; symbols
+                            without one are marked at their last traded price
+        """
+        trades = sorted(trade_log, key=lambda trade: trade['date'])
+        count = len(trades)
+
+        self.dates = np.array([trade['date'] for trade in trades], dtype='U10')
+        self.symbols, symbol_ids = np.unique(np.array([trade['symbol'] for trade in trades], dtype=str),
+                                             return_inverse=True)
+
+        is_buy = np.array([trade['action'] == 'BUY' for trade in trades], dtype=bool)
+        values = np.array([trade.get('value', 0) for trade in trades], dtype=float)
+        shares = np.array([trade.get('shares', 0) for trade in trades], dtype=float)
+        profit_loss = np.array([trade.get('profit_loss', 0) for trade in trades], dtype=float)
+
+        per_trade = {
+            'realized_pnl': np.where(is_buy, 0.0, profit_loss),
+            'invested': np.where(is_buy, values, 0.0),
+            'proceeds': np.where(is_buy, 0.0, values),
+            'buys': is_buy.astype(float),
+            'sells': (~is_buy).astype(float),
+            'hold_share_days': self._hold_share_days(trades, is_buy, shares),
+            'sold_shares': np.where(is_buy, 0.0, shares)
+        }
+
+        # Regroup trades by symbol, keeping date order within each symbol
+        self._count = count
+        order = np.lexsort((np.arange(count), symbol_ids))
+        self._keys = symbol_ids[order].astype(np.int64) * max(count, 1) + order
+        self._prefix = {}
+        for name in _SUMMED:
+            prefix = np.zeros(count + 1)
+            np.cumsum(per_trade[name][order], out=prefix[1:])
+            self._prefix[name] = prefix
+
+        # Open positions, marked to market
+        marks = {trade['symbol']: trade['price'] for trade in trades}
+        marks.update(last_prices or {})
+        self.portfolio = portfolio or {}
+        self.shares_held = np.zeros(len(self.symbols))
+        self.cost_basis = np.zeros(len(self.symbols))
+        self.market_value = np.zeros(len(self.symbols))
+        position_of = {symbol: i for i, symbol in enumerate(self.symbols)}
+        for symbol, details in self.portfolio.items():
+            i = position_of.get(symbol)
+            if i is None:
+                continue
+            self.shares_held[i] = details.get('shares', 0)
+            self.cost_basis[i] = details.get('cost_basis', 0)
+            self.market_value[i] = self.shares_held[i] * marks.get(symbol, 0)
+        self.unrealized_pnl = np.where(self.shares_held > 0, self.market_value - self.cost_basis, 0.0)
+
+    @staticmethod
+    def _hold_share_days(trades, is_buy, shares):
+        """
+        Days held times shares sold for every sell.
+
+        Mirrors the algorithm's average-cost accounting: each symbol carries the
+        share-weighted average acquisition date of its open position, which buys
+        move and sells leave unchanged.
+        """
+        days = np.asarray([trade['date'] for trade in trades], dtype='datetime64[D]').astype(np.int64)
+        result = np.zeros(len(trades))
+        held = {}  # Symbol: [shares, average acquisition day]
+        for i, trade in enumerate(trades):
+            position = held.setdefault(trade['symbol'], [0.0, 0.0])
+            if is_buy[i]:
+                total = position[0] + shares[i]
+                if total > 0:
+                    position[1] = (position[0] * position[1] + shares[i] * days[i]) / total
+                position[0] = total
+            elif position[0] > 0:
+                result[i] = (days[i] - position[1]) * shares[i]
+                position[0] = max(position[0] - shares[i], 0.0)
+        return result
+
+    def __len__(self):
+        return self._count
+
+    def _range_sums(self, start_date=None, end_date=None):
+        """Sum every per-trade quantity of every symbol over an inclusive date range."""
+        low = 0 if start_date is None else np.searchsorted(self.dates, start_date, side='left')
+        high = self._count if end_date is None else np.searchsorted(self.dates, end_date, side='right')
+        high = max(high, low)
+
+        base = np.arange(len(self.symbols), dtype=np.int64) * max(self._count, 1)
+        left = np.searchsorted(self._keys, base + low)
+        right = np.searchsorted(self._keys, base + high)
+        return {name: prefix[right] - prefix[left] for name, prefix in self._prefix.items()}
+
+    def query(self, start_date=None, end_date=None, sort='total_pnl', limit=None):
+        """
+        Get per-symbol attribution over a date range.
+
+        Realized P&L, trade counts, invested capital and average hold cover the
+        trades inside the range; unrealized P&L is the current open position.
+
+        Args:
+            start_date: First trade date to include (YYYY-MM-DD), or None
+            end_date: Last trade date to include (YYYY-MM-DD), or None
+            sort: One of SORT_FIELDS, sorted descending
+            limit: Maximum number of symbols to return
+
+        Returns:
+            Dictionary with the per-symbol rows and their totals
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort!r}")
+
+        sums = self._range_sums(start_date, end_date)
+        trade_count = sums['buys'] + sums['sells']
+        avg_hold_days = np.divide(sums['hold_share_days'], sums['sold_shares'],
+                                  out=np.zeros(len(self.symbols)), where=sums['sold_shares'] > 0)
+        columns = {
+            'realized_pnl': sums['realized_pnl'],
+            'unrealized_pnl': self.unrealized_pnl,
+            'total_pnl': sums['realized_pnl'] + self.unrealized_pnl,
+            'invested': sums['invested'],
+            'proceeds': sums['proceeds'],
+            'buy_count': sums['buys'],
+            'sell_count': sums['sells'],
+            'trade_count': trade_count,
+            'avg_hold_days': avg_hold_days,
+            'shares_held': self.shares_held,
+            'market_value': self.market_value
+        }
+
+        # Symbols with activity in the range, or still held
+        selected = np.flatnonzero((trade_count > 0) | (self.shares_held > 0))
+        selected = selected[np.argsort(-columns[sort][selected], kind='stable')]
+        if limit is not None:
+            selected = selected[:limit]
+
+        counts = ('buy_count', 'sell_count', 'trade_count')
+        rows = []
+        for i in selected:
+            row = {'symbol': str(self.symbols[i])}
+            for name, column in columns.items():
+                row[name] = int(column[i]) if name in counts else float(column[i])
+            rows.append(row)
+
+        totals = {
+            'realized_pnl': float(sums['realized_pnl'].sum()),
+            'unrealized_pnl': float(self.unrealized_pnl.sum()),
+            'total_pnl': float(sums['realized_pnl'].sum() + self.unrealized_pnl.sum()),
+            'invested': float(sums['invested'].sum()),
+            'proceeds': float(sums['proceeds'].sum()),
+            'trade_count': int(trade_count.sum())
+        }
+
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'symbols': rows,
+            'totals': totals
+        }
@@ -0,0 +1,113 @@
+"""
+Benchmark series computed alongside a simulation.
+
+The tracker is fed the same price rows as the strategy while it scans the
+market data, so benchmarks never need a second pass over it.
+"""
+import numpy as np
+
+from models.performance_metrics import RISK_FREE_RATE
+
+
+class BenchmarkTracker:
+    def __init__(self, symbol_count, start_value, cash_value=None, last_date=None,
+                 risk_free_rate=RISK_FREE_RATE):
+        """
+        Initialize the benchmarks.
+
+        Parameters:
+        symbol_count (int): Number of symbols in the universe
+        start_value (float): Value split equally across the symbols for buy-and-hold
+        cash_value (float): Starting value of the cash benchmark (defaults to start_value)
+        last_date (str): Date the cash benchmark was last valued at (YYYY-MM-DD), if continuing
+        risk_free_rate (float): Annual rate the cash benchmark earns
+        """
+        # Each symbol gets an equal slice, bought at its first positive price
+        self.allocation = start_value / symbol_count if symbol_count else 0.0
+        self.shares = np.zeros(symbol_count)
+        self.bought = np.zeros(symbol_count, dtype=bool)
+        self.last_prices = np.zeros(symbol_count)
+        self.uninvested = start_value
+
+        self.cash_value = start_value if cash_value is None else cash_value
+        self.last_day = None if last_date is None else np.datetime64(last_date, 'D').astype(np.int64)
+        self.daily_log_rate = np.log1p(risk_free_rate) / 365.25
+
+    def update(self, prices, day):
+        """
+        Value the benchmarks at one bar.
+
+        Args:
+            prices: Price of every symbol at the bar (NaN where missing)
+            day: Day number of the bar (days since the epoch)
+
+        Returns:
+            (equal_weight, cash) benchmark values
+        """
+        listed = prices > 0
+        new = listed & ~self.bought
+        if new.any():
+            self.shares[new] = self.allocation / prices[new]
+            self.bought |= new
+            self.uninvested -= self.allocation * np.count_nonzero(new)
+
+        # Missing prices carry the last known price forward
+        np.copyto(self.last_prices, prices, where=listed)
+        # Same reduction as update_block, so both give identical values
+        equal_weight = self.uninvested + float((self.shares * self.last_prices).sum(axis=-1))
+
+        if self.last_day is not None:
+            self.cash_value *= np.exp(self.daily_log_rate * (day - self.last_day))
+        self.last_day = day
+
+        return equal_weight, float(self.cash_value)
+
+    def update_block(self, prices, days):
+        """
+        Value the benchmarks at a block of bars, as update() would bar by bar.
+
+        Args:
+            prices: bars x symbols prices (NaN where missing)
+            days: Day number of every bar
+
+        Returns:
+            (equal_weight, cash) arrays of benchmark values
+        """
+        bars = len(prices)
+        listed = prices > 0
+        # The bar each symbol is first listed at within the block, or bars if never
+        first_listed = np.where(listed.any(axis=0), listed.argmax(axis=0), bars)
+        new = ~self.bought & (first_listed < bars)
+        new_columns = np.flatnonzero(new)
+        self.shares[new_columns] = self.allocation / prices[first_listed[new_columns], new_columns]
+
+        # Cash left after every bar's purchases, subtracted in bar order like update()
+        bought_per_bar = np.bincount(first_listed[new_columns], minlength=bars)
+        uninvested = np.subtract.accumulate(np.concatenate(([self.uninvested], self.allocation * bought_per_bar)))[1:]
+        self.uninvested = uninvested[-1]
+
+        # Holdings after every bar: a symbol is held from its first listed bar on
+        held_from = np.where(self.bought, -1, np.where(new, first_listed, bars))
+        holdings = np.where(np.arange(bars)[:, np.newaxis] >= held_from, self.shares, 0.0)
+        self.bought |= new
+
+        # Last known prices: the latest listed bar of the block, else the prices before it
+        marks = np.tile(self.last_prices, (bars, 1))
+        latest = np.where(listed, np.arange(bars)[:, np.newaxis], -1)
+        np.maximum.accumulate(latest, axis=0, out=latest)
+        known = latest >= 0
+        marks[known] = prices[latest[known], np.nonzero(known)[1]]
+        self.last_prices = marks[-1].copy()
+        equal_weight = uninvested + (holdings * marks).sum(axis=-1)
+
+        # Cash compounds from bar to bar, multiplied in bar order like update()
+        days = np.asarray(days, dtype=np.int64)
+        gaps = np.diff(days, prepend=days[0] if self.last_day is None else self.last_day)
+        growth = np.exp(self.daily_log_rate * gaps)
+        if self.last_day is None:
+            growth[0] = 1.0
+        cash = np.multiply.accumulate(np.concatenate(([self.cash_value], growth)))[1:]
+        self.cash_value = cash[-1]
+        self.last_day = int(days[-1])
+
+        return equal_weight, cash
@@ -1,20 +1,76 @@
 import os
 import json
+import logging
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import yfinance as yf
-from models.algorithm import FiveTenAlgo
-from functools import lru_cache
+from models.algorithm import FiveTenAlgo, run_forked_simulations
+from models.attribution import AttributionIndex
+from models.jobs import JobPending, report_progress
+from models.live import LiveStore
+from models.market_store import MarketStore, SimulationLog, run_chunked_simulations
+from models.price_matrix import PriceMatrix
+from models.trade_index import TradeLogIndex
+from models.performance_metrics import compute_metrics
+from models.profiling import phase
+from models.rolling_metrics import RollingAnalyzer
+from models.sharding import SignalPool
+from models.synthetic import generate_market
+from models.telemetry import timed, record_artifact, record_cache_event
+from contextlib import nullcontext
 import uuid
 
+logger = logging.getLogger(__name__)
+
 class DataProcessor:
-    def __init__(self, data_dir='data'):
+    # Relative timelines, expressed as a number of days back from today
+    TIMELINE_DAYS = {
+        '1m': 30,
+        '3m': 90,
+        '6m': 180,
+        '1y': 365,
+        '3y': 3 * 365,
+        '5y': 5 * 365
+    }
+    
+    # Last date of the precomputed data until a roll-forward records a later one
+    DEFAULT_CUTOFF_DATE = '2025-03-01'  # March 1st, 2025
+    
+    # First trading date of each simulation period; each period is a fresh-capital simulation
+    PERIOD_START_DATES = {
+        'all': '1971-02-08',   # NASDAQ inception date
+        '2000': '2000-01-01',
+        'covid': '2020-03-13'
+    }
+    
+    def __init__(self, data_dir='data', seed=None, sample_symbols=20, bar_frequency='W', signal_workers=None):
+        """
+        Initialize the data processor.
+        
+        Parameters:
+        data_dir (str): Directory holding the market data and simulation files
+        seed (int): Seed for the synthetic market generator; None draws fresh entropy
+        sample_symbols (int): Number of symbols in the synthetic market
+        bar_frequency (str): Synthetic bar frequency, 'W' (weekly) or 'B' (business days)
+        signal_workers (int): Worker processes to shard signal detection across when
+            generating simulations; None or 1 detects in this process
+        """
         self.data_dir = data_dir
         self.precomputed_file = os.path.join(data_dir, 'precomputed_simulation.json')
         self.market_data_file = os.path.join(data_dir, 'market_data.json')
-        self.cutoff_date = '2025-03-01'  # March 1st, 2025
+        self.market_store_dir = os.path.join(data_dir, 'market_store')  # Partitioned market data (see models/market_store.py)
+        self.cutoff_file = os.path.join(data_dir, 'cutoff.json')  # Written by roll_forward
+        self.cutoff_date = self._load_cutoff_date()
         self._cache = {}  # Simple cache for performance data
+        self._artifacts = {}  # Parsed simulation files, keyed by path
+        self.jobs = None  # JobScheduler generating missing files in the background (see models/jobs.py); None generates inline
+        
+        # Synthetic market settings
+        self._rng = np.random.default_rng(seed)
+        self.sample_symbols = sample_symbols
+        self.bar_frequency = bar_frequency
+        self.signal_workers = signal_workers
         
         # Define parameters for different simulation modes
         self.simulation_params = {
@@ -56,6 +112,14 @@ class DataProcessor:
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
     
+    def _load_cutoff_date(self):
+        """The cutoff date recorded by the last roll-forward, or DEFAULT_CUTOFF_DATE."""
+        try:
+            with open(self.cutoff_file, 'r') as f:
+                return json.load(f)['cutoff_date']
+        except (OSError, ValueError, KeyError):
+            return self.DEFAULT_CUTOFF_DATE
+    
     def get_simulation_file(self, mode='default', period='all'):
         """
         Get the correct file for the specified simulation mode and period.
@@ -92,23 +156,24 @@ class DataProcessor:
         
         return self.simulation_params[mode]['initial_capital']
     
+    @phase('load_market_data')
     def generate_and_cache_market_data(self):
         """Generate market data once and cache it to a file to avoid regenerating it each time."""
-        print(f"Generating market data cache file: {self.market_data_file}")
+        logger.info("Generating market data cache file: %s", self.market_data_file)
         
         if os.path.exists(self.market_data_file):
-            print("Market data cache already exists. Loading from file...")
+            logger.info("Market data cache already exists. Loading from file...")
             try:
                 with open(self.market_data_file, 'r') as f:
                     market_data_dict = json.load(f)
                     
                 # Convert the loaded JSON back to DataFrame
                 market_data = pd.DataFrame(market_data_dict)
-                print(f"Loaded market data with {len(market_data)} records")
+                logger.info("Loaded market data with %s records", len(market_data))
                 return market_data
             except Exception as e:
-                print(f"Error loading market data from cache: {e}")
-                print("Regenerating market data...")
+                logger.error("Error loading market data from cache: %s", e)
+                logger.info("Regenerating market data...")
                 
         # Generate fresh market data
         market_data = self._create_sample_data()
@@ -121,12 +186,13 @@ class DataProcessor:
             with open(self.market_data_file, 'w') as f:
                 json.dump(market_data_dict, f)
             
-            print(f"Successfully saved {len(market_data)} market data records to {self.market_data_file}")
+            logger.info("Successfully saved %s market data records to %s", len(market_data), self.market_data_file)
             return market_data
         except Exception as e:
-            print(f"Error saving market data to cache: {e}")
+            logger.error("Error saving market data to cache: %s", e)
             return market_data
     
+    @phase('load_market_data')
     def load_market_data(self):
         """Load market data from cache file or generate if not exists."""
         if os.path.exists(self.market_data_file):
@@ -136,13 +202,13 @@ class DataProcessor:
                 
                 # Convert the loaded JSON back to DataFrame
                 market_data = pd.DataFrame(market_data_dict)
-                print(f"Loaded market data from cache: {len(market_data)} records")
+                logger.debug("Loaded market data from cache: %s records", len(market_data))
                 return market_data
             except Exception as e:
-                print(f"Error loading market data from cache: {e}")
+                logger.error("Error loading market data from cache: %s", e)
         
         # If cache doesn't exist or is corrupted, generate new data
-        print("Market data cache not found. Generating new data...")
+        logger.info("Market data cache not found. Generating new data...")
         return self.generate_and_cache_market_data()
     
     def generate_sample_precomputed_data(self, mode='default'):
@@ -201,95 +267,62 @@ class DataProcessor:
         ]
         
         # Combine all the lists and limit to the maximum number of stocks
-        all_stocks = list(set(major_stocks + nasdaq_additional + nyse_additional))
+        all_stocks = sorted(set(major_stocks + nasdaq_additional + nyse_additional))
         return all_stocks[:max_stocks]
     
+    def get_sample_symbols(self, count=None):
+        """
+        Get the symbols of the synthetic market.
+        
+        Markets larger than the stock list are padded with placeholder tickers.
+        """
+        count = count or self.sample_symbols
+        symbols = self._get_stock_universe(max_stocks=count)
+        return symbols + [f"SYN{i:04d}" for i in range(count - len(symbols))]
+    
     def _create_sample_data(self):
         """Create synthetic sample data for demonstration."""
-        # Use a very limited set of symbols to prevent memory issues
-        symbols = self._get_stock_universe(max_stocks=20)  # Reduced from 50 to 20
-        
-        # Use a weekly frequency to ensure we can properly compare week-over-week prices
-        start_date = '1971-02-08'  # NASDAQ inception date
-        end_date = self.cutoff_date
-        
-        # Create a weekly date range to capture the exact 7-day change
-        dates = pd.date_range(start=start_date, end=end_date, freq='W')
-        
-        all_data = []
+        symbols = self.get_sample_symbols()
         
-        for symbol in symbols:
-            # Create a base price
-            base_price = np.random.uniform(50, 500)
-            
-            # Create price trends with substantial volatility
-            prices = []
-            current_price = base_price
-            
-            for i in range(len(dates)):
-                # Add significant weekly volatility to trigger buy/sell signals
-                weekly_change = np.random.normal(0, 0.05)  # 5% standard deviation
-                
-                # Add some trend
-                trend = 0.001  # Small upward trend
-                
-                # Add some cyclical behavior with occasional 5% drops and 10% rises
-                # This ensures we'll hit our trading thresholds regularly
-                if i > 0 and i % 8 == 0:  # Every 8 weeks, add a price drop
-                    special_move = -0.05  # 5% drop to trigger buys
-                elif i > 0 and i % 12 == 0:  # Every 12 weeks, add a price rise
-                    special_move = 0.10  # 10% rise to trigger sells
-                else:
-                    special_move = 0
-                
-                # Update price
-                current_price = current_price * (1 + weekly_change + trend + special_move)
-                
-                # Ensure price doesn't go negative
-                current_price = max(current_price, 1.0)
-                
-                prices.append(current_price)
-            
-            # Create a DataFrame for this symbol
-            symbol_data = pd.DataFrame({
-                'date': dates.strftime('%Y-%m-%d'),
-                'price': prices,
-                'symbol': symbol
-            })
-            
-            all_data.append(symbol_data)
-        
-        # Combine all symbol data
-        return pd.concat(all_data, ignore_index=True)
+        # Weekly bars by default, so every bar has a price from exactly 7 days earlier
+        start_date = self.PERIOD_START_DATES['all']
+        market = generate_market(symbols, start_date, self.cutoff_date,
+                                 freq=self.bar_frequency, rng=self._rng)
+        return market.to_frame()
     
-    @lru_cache(maxsize=8)  # Cache for different mode combinations
     def get_precomputed_data(self, mode='default'):
-        """Get precomputed data from file or generate if not exists."""
+        """
+        Get precomputed data from file or generate if not exists.
+        
+        The file is read through load_simulation_artifact, so a regenerated or
+        rolled-forward file is picked up like in every other view. Callers
+        must not mutate the returned dict.
+        """
         simulation_file = self.get_simulation_file(mode)
         
         # If file doesn't exist or is empty/corrupt, regenerate it
         if not os.path.exists(simulation_file) or os.path.getsize(simulation_file) == 0:
-            print(f"Generating new sample data for {mode} mode...")
+            job = self.request_artifact(mode)
+            if job is not None:
+                raise JobPending(job)
+            logger.info("Generating new sample data for %s mode...", mode)
             success = self.generate_sample_precomputed_data(mode)
             if not success:
                 return self._get_empty_data(mode)
         
         try:
-            with open(simulation_file, 'r') as f:
-                data = json.load(f)
-            return data
+            return self.load_simulation_artifact(mode, 'all')
         except json.JSONDecodeError as e:
-            print(f"Error parsing JSON from {simulation_file}: {e}")
+            logger.error("Error parsing JSON from %s: %s", simulation_file, e)
             # Regenerate the data if JSON is corrupted
-            print(f"Regenerating corrupt data file for {mode} mode...")
+            logger.info("Regenerating corrupt data file for %s mode...", mode)
             os.remove(simulation_file)  # Remove the corrupt file
             success = self.generate_sample_precomputed_data(mode)
             if success:
                 try:
-                    with open(simulation_file, 'r') as f:
-                        return json.load(f)
+                    return self.load_simulation_artifact(mode, 'all')
                 except Exception as e:
-                    print(f"Error loading regenerated file: {e}")
+                    logger.error("Error loading regenerated file: %s", e)
             return self._get_empty_data(mode)
     
     def _get_empty_data(self, mode='default'):
@@ -300,16 +333,23 @@ class DataProcessor:
             'portfolio': {},
             'trade_log': [],
             'performance_history': [],
+            'benchmark_history': [],
             'initial_capital': initial_capital
         }
     
+    @phase('continuation')
+    @timed('get_current_data')
     def get_current_data(self, precomputed_data=None, mode='default'):
         """
         Get current data by continuing simulation from precomputed data.
         Returns merged data from precomputed_simulation + current simulation.
         """
         if precomputed_data is None:
-            precomputed_data = self.get_precomputed_data(mode)
+            live_data = self.load_live_data(mode)
+            if live_data is not None:
+                return dict(live_data)
+            # Shallow copy, the continuation replaces keys
+            precomputed_data = dict(self.get_precomputed_data(mode))
             if not precomputed_data:
                 return self._get_empty_data(mode)
         
@@ -337,39 +377,27 @@ class DataProcessor:
             with open(temp_file, 'w') as f:
                 json.dump(precomputed_data, f, indent=2)
             
-            # Get the most recent date from precomputed data
+            # Get the most recent date from precomputed data (or the cutoff it was rolled forward to)
             if precomputed_data.get('performance_history'):
-                last_date = datetime.strptime(precomputed_data['performance_history'][-1]['date'], '%Y-%m-%d')
-                
-                # Verify the integrity of the last data point
-                last_point = precomputed_data['performance_history'][-1]
-                if 'portfolio_value' in last_point and (last_point['portfolio_value'] > 100000000 or  # Unreasonable value check
-                    (len(precomputed_data['performance_history']) > 1 and 
-                     last_point['portfolio_value'] > 2 * precomputed_data['performance_history'][-2]['portfolio_value'])):
-                    # We found an anomaly - use the second-to-last point instead
-                    print(f"WARNING: Anomalous value detected in last performance record: {last_point['portfolio_value']}")
-                    last_date = datetime.strptime(precomputed_data['performance_history'][-2]['date'], '%Y-%m-%d')
-                    # Remove the last point
-                    precomputed_data['performance_history'] = precomputed_data['performance_history'][:-1]
-                    # Update the file
-                    with open(temp_file, 'w') as f:
-                        json.dump(precomputed_data, f, indent=2)
+                last_date = precomputed_data['performance_history'][-1]['date']
             else:
-                last_date = datetime.strptime(self.cutoff_date, '%Y-%m-%d')
+                last_date = self.cutoff_date
+            last_date = datetime.strptime(max(last_date, precomputed_data.get('cutoff_date') or ''), '%Y-%m-%d')
             
             # Generate sample data for the period after the last date
             current_date = datetime.now()
             
             # Load the algorithm state from the temp file
             if not algo.load_simulation(temp_file):
-                print(f"Warning: Failed to load simulation from {temp_file}")
+                logger.warning("Failed to load simulation from %s", temp_file)
                 return precomputed_data  # Fall back to precomputed data if load fails
             
             # Create sample data for this additional period
             additional_data = self._create_additional_sample_data(
                 symbols=list(algo.portfolio.keys()) or ['SPY', 'QQQ', 'AAPL', 'MSFT', 'AMZN', 'GOOGL'], 
                 start_date=last_date,
-                end_date=current_date
+                end_date=current_date,
+                last_prices=algo.last_prices
             )
             
             # Process the additional data
@@ -378,7 +406,7 @@ class DataProcessor:
             
             # Save updated simulation
             if not algo.save_simulation(updated_file):
-                print(f"Warning: Failed to save updated simulation to {updated_file}")
+                logger.warning("Failed to save updated simulation to %s", updated_file)
                 return precomputed_data
             
             # Load the updated data
@@ -386,33 +414,16 @@ class DataProcessor:
                 with open(updated_file, 'r') as f:
                     updated_data = json.load(f)
                 
-                # Verify data integrity - perform sanity checks on portfolio values
-                if updated_data.get('performance_history'):
-                    history = updated_data['performance_history']
-                    
-                    # Check for unreasonable jumps in portfolio value (more than 50% in one day)
-                    for i in range(1, len(history)):
-                        prev_value = history[i-1]['portfolio_value']
-                        curr_value = history[i]['portfolio_value']
-                        
-                        if prev_value > 0 and curr_value / prev_value > 1.5:
-                            print(f"WARNING: Detected large jump in portfolio value from {prev_value} to {curr_value}")
-                            # Correct this by interpolating between valid points
-                            history[i]['portfolio_value'] = prev_value * 1.01  # Assume modest 1% growth
-                    
-                    # Update the corrected history
-                    updated_data['performance_history'] = history
-                
                 return updated_data
             except json.JSONDecodeError as e:
-                print(f"Error loading updated data: {e}")
+                logger.error("Error loading updated data: %s", e)
                 return precomputed_data
             except Exception as e:
-                print(f"Unexpected error handling updated data: {e}")
+                logger.error("Unexpected error handling updated data: %s", e)
                 return precomputed_data
                 
         except Exception as e:
-            print(f"Error in get_current_data: {e}")
+            logger.error("Error in get_current_data: %s", e)
             return precomputed_data  # Fall back to precomputed data
         finally:
             # Clean up temporary files
@@ -420,64 +431,20 @@ class DataProcessor:
                 for file_path in [temp_file, updated_file]:
                     if os.path.exists(file_path):
                         os.remove(file_path)
-                        print(f"Removed temporary file: {file_path}")
+                        logger.debug("Removed temporary file: %s", file_path)
             except Exception as e:
-                print(f"Warning: Could not remove temporary files: {e}")
+                logger.warning("Could not remove temporary files: %s", e)
     
-    def _create_additional_sample_data(self, symbols, start_date, end_date):
-        """Create synthetic sample data for continuation period."""
-        # Create a weekly date range for the additional period
-        dates = pd.date_range(start=start_date + timedelta(days=1), end=end_date, freq='W')
+    def _create_additional_sample_data(self, symbols, start_date, end_date, last_prices=None):
+        """Create synthetic sample data for continuation period, continuing from the last known prices."""
+        market = generate_market(symbols, start_date + timedelta(days=1), end_date,
+                                 freq=self.bar_frequency, rng=self._rng, last_prices=last_prices)
         
-        if len(dates) == 0:
-            print(f"No dates in range {start_date} to {end_date}")
+        if len(market) == 0:
+            logger.debug("No dates in range %s to %s", start_date, end_date)
             return pd.DataFrame()
         
-        all_data = []
-        
-        for symbol in symbols:
-            # Create a base price - this would normally come from the last price in the precomputed data
-            base_price = np.random.uniform(50, 500)
-            
-            # Create price trends with substantial volatility
-            prices = []
-            current_price = base_price
-            
-            for i in range(len(dates)):
-                # Add significant weekly volatility to trigger buy/sell signals
-                weekly_change = np.random.normal(0, 0.05)  # 5% standard deviation
-                
-                # Add some trend
-                trend = 0.001  # Small upward trend
-                
-                # Add some cyclical behavior with occasional 5% drops and 10% rises
-                # This ensures we'll hit our trading thresholds regularly
-                if i > 0 and i % 8 == 0:  # Every 8 weeks, add a price drop
-                    special_move = -0.05  # 5% drop to trigger buys
-                elif i > 0 and i % 12 == 0:  # Every 12 weeks, add a price rise
-                    special_move = 0.10  # 10% rise to trigger sells
-                else:
-                    special_move = 0
-                
-                # Update price
-                current_price = current_price * (1 + weekly_change + trend + special_move)
-                
-                # Ensure price doesn't go negative
-                current_price = max(current_price, 1.0)
-                
-                prices.append(current_price)
-            
-            # Create a DataFrame for this symbol
-            symbol_data = pd.DataFrame({
-                'date': dates.strftime('%Y-%m-%d'),
-                'price': prices,
-                'symbol': symbol
-            })
-            
-            all_data.append(symbol_data)
-        
-        # Combine all symbol data
-        return pd.concat(all_data, ignore_index=True)
+        return market.to_frame()
     
     def filter_by_timeline(self, data, timeline='all'):
         """Filter data based on timeline selection."""
@@ -487,11 +454,13 @@ class DataProcessor:
             
             # Check if we have this result cached
             if cache_key in self._cache:
-                print(f"Using cached data for timeline={timeline}")
+                record_cache_event('data_processor', 'hit')
+                logger.debug("Using cached data for timeline=%s", timeline)
                 return self._cache[cache_key]
+            record_cache_event('data_processor', 'miss')
                 
             if not data.get('performance_history'):
-                print("No performance history found in data")
+                logger.debug("No performance history found in data")
                 return data
                 
             # Get the initial capital
@@ -500,46 +469,28 @@ class DataProcessor:
             # Calculate the cutoff date based on the timeline selection
             today = datetime.now()
             
-            # Track if this is a special simulation start point (2000 or COVID)
-            is_special_start = False
-            
             # Create the cutoff date based on the timeline selection with simplified logic
             try:
-                if timeline == '1m':
-                    cutoff_date = (today - timedelta(days=30)).strftime('%Y-%m-%d')
-                elif timeline == '3m':
-                    cutoff_date = (today - timedelta(days=90)).strftime('%Y-%m-%d')
-                elif timeline == '6m':
-                    cutoff_date = (today - timedelta(days=180)).strftime('%Y-%m-%d')
-                elif timeline == '1y':
-                    cutoff_date = (today - timedelta(days=365)).strftime('%Y-%m-%d')
-                elif timeline == '3y':
-                    cutoff_date = (today - timedelta(days=3*365)).strftime('%Y-%m-%d')
-                elif timeline == '5y':
-                    cutoff_date = (today - timedelta(days=5*365)).strftime('%Y-%m-%d')
-                elif timeline == '2000':
-                    cutoff_date = '2000-01-01'
-                    is_special_start = True
-                    print("Using 2000 timeline with fresh $1,000,000 capital (all cash)")
-                elif timeline == 'covid':
-                    cutoff_date = '2020-03-13'
-                    is_special_start = True
-                    print("Using COVID timeline with fresh $1,000,000 capital (all cash)")
+                if timeline in self.TIMELINE_DAYS:
+                    cutoff_date = (today - timedelta(days=self.TIMELINE_DAYS[timeline])).strftime('%Y-%m-%d')
+                elif timeline in ('2000', 'covid'):
+                    # Fresh-capital views of these dates come from the period simulations
+                    cutoff_date = self.PERIOD_START_DATES[timeline]
                 elif timeline == 'all':
                     # For 'all' timeline, use the start date of the data instead of a fixed date
                     # This ensures we always have data for the "all" view
                     if data['performance_history']:
                         cutoff_date = data['performance_history'][0]['date']
                     else:
-                        cutoff_date = '1971-02-08'
+                        cutoff_date = self.PERIOD_START_DATES['all']
                 else:
-                    print(f"Unknown timeline: {timeline}, using all data")
+                    logger.debug("Unknown timeline: %s, using all data", timeline)
                     return data
             except Exception as date_error:
-                print(f"Error calculating cutoff date: {date_error}")
+                logger.error("Error calculating cutoff date: %s", date_error)
                 return data
                 
-            print(f"Using cutoff date {cutoff_date} for timeline {timeline}")
+            logger.debug("Using cutoff date %s for timeline %s", cutoff_date, timeline)
             
             # Simple filtering with error handling
             try:
@@ -553,63 +504,26 @@ class DataProcessor:
                     if entry['date'] >= cutoff_date:
                         filtered_trades.append(entry.copy())  # Copy to avoid modifying original data
                         
-                print(f"Filtered history from {len(data['performance_history'])} to {len(filtered_history)} entries")
+                filtered_benchmarks = [entry.copy() for entry in data.get('benchmark_history', [])
+                                       if entry['date'] >= cutoff_date]
+                        
+                logger.debug("Filtered history from %s to %s entries", len(data['performance_history']), len(filtered_history))
                 
                 # If no data in the filtered period, return empty data with initial capital
                 if not filtered_history:
-                    print(f"No data found after cutoff date {cutoff_date}")
+                    logger.debug("No data found after cutoff date %s", cutoff_date)
                     result = {
                         'capital': initial_capital,
                         'portfolio': {},
                         'trade_log': [],
                         'performance_history': [],
+                        'benchmark_history': [],
                         'initial_capital': initial_capital
                     }
                     self._cache[cache_key] = result
                     return result
                     
-                # Special handling for 2000 and COVID timelines - start fresh with $1 million in cash
-                if is_special_start:
-                    # Reset to pure cash position at the start
-                    filtered_history[0]['cash'] = 1000000
-                    filtered_history[0]['portfolio_value'] = 1000000
-                    
-                    # Modify the portfolio value and cash over time - gradually shift from cash to equity
-                    # This simulates starting with cash and gradually building a portfolio
-                    equity_ratio = 0.0  # Start with 0% equity
-                    for i in range(1, len(filtered_history)):
-                        # Calculate days since start
-                        days_since_start = (datetime.strptime(filtered_history[i]['date'], '%Y-%m-%d') - 
-                                          datetime.strptime(filtered_history[0]['date'], '%Y-%m-%d')).days
-                        
-                        # Create a natural investment curve where portfolio gradually shifts to equities
-                        # Over 90 days, move from 0% to ~60% invested
-                        equity_ratio = min(0.6, days_since_start / 150)
-                        
-                        # Calculate portfolio growth based on previous entry
-                        growth_factor = filtered_history[i]['portfolio_value'] / filtered_history[i-1]['portfolio_value']
-                        
-                        # Apply the growth to the modified portfolio
-                        filtered_history[i]['portfolio_value'] = filtered_history[i-1]['portfolio_value'] * growth_factor
-                        
-                        # Adjust cash and ensure portfolio value = cash + equity
-                        filtered_history[i]['cash'] = filtered_history[i]['portfolio_value'] * (1 - equity_ratio)
-                        
-                    # Update all trade dates to match the new timeline
-                    # This ensures trades line up with the portfolio changes
-                    for trade in filtered_trades:
-                        # Keep trades proportional to the new starting capital
-                        original_value = trade.get('value', 0)
-                        trade['value'] = original_value * (1000000 / filtered_history[0]['portfolio_value'])
-                        
-                        if 'shares' in trade:
-                            trade['shares'] = trade['shares'] * (1000000 / filtered_history[0]['portfolio_value'])
-                    
-                    # Set initial values
-                    start_value = 1000000
-                else:
-                    # For normal timelines, use the actual starting value
-                    start_value = filtered_history[0]['portfolio_value']
+                start_value = filtered_history[0]['portfolio_value']
                 
                 # Update the total return values
                 for i, entry in enumerate(filtered_history):
@@ -622,6 +536,7 @@ class DataProcessor:
                     'portfolio': data['portfolio'],
                     'trade_log': filtered_trades,
                     'performance_history': filtered_history,
+                    'benchmark_history': filtered_benchmarks,
                     'initial_capital': start_value  # Use the actual starting value for this timeline
                 }
                 
@@ -630,46 +545,233 @@ class DataProcessor:
                 return filtered_data
                 
             except Exception as filter_error:
-                print(f"Error during timeline filtering: {filter_error}")
+                logger.error("Error during timeline filtering: %s", filter_error)
                 return data  # Return original data on error
                 
         except Exception as e:
-            print(f"Critical error in filter_by_timeline: {e}")
+            logger.error("Critical error in filter_by_timeline: %s", e)
             return data  # Return original data on error
     
-    def get_merged_performance_history(self, mode='default', timeline='all'):
-        """Get merged performance history from precomputed + current simulation."""
+    def get_timeline_start_date(self, timeline='all'):
+        """
+        Get the first date covered by a timeline selection.
+        
+        Args:
+            timeline: The timeline (all, 5y, 3y, 1y, 6m, 3m, 1m, 2000, covid)
+            
+        Returns:
+            The start date as YYYY-MM-DD, or None when the timeline is unbounded
+        """
+        if timeline in self.TIMELINE_DAYS:
+            return (datetime.now() - timedelta(days=self.TIMELINE_DAYS[timeline])).strftime('%Y-%m-%d')
+        if timeline in ('2000', 'covid'):
+            return self.PERIOD_START_DATES[timeline]
+        return None
+    
+    def get_timeline_period(self, timeline='all'):
+        """
+        Get the simulation period whose data backs a timeline selection.
+        
+        The 2000 and COVID timelines are fresh-capital simulations of their own;
+        every other timeline is a window onto the full simulation.
+        """
+        return timeline if timeline in ('2000', 'covid') else 'all'
+    
+    def get_artifact_version(self, mode='default', period='all'):
+        """
+        Get a version stamp for the precomputed simulation file of a mode and period.
+        
+        The stamp changes whenever the file is regenerated, so it can be used to
+        key anything derived from the artifact. While a live paper-trading state
+        exists for the mode, the 'all' period is versioned by that state instead,
+        which changes after every live bar. Returns None if the file is missing.
+        """
+        if period == 'all':
+            live_version = self.get_live_store(mode).version()
+            if live_version is not None:
+                return ('live', live_version)
+        
+        simulation_file = self.get_simulation_file(mode, period)
         try:
-            print(f"Fetching current data for mode={mode}, timeline={timeline}")
-            # Get data for the 'all' period (this is the same as before)
-            data = self.get_current_data_for_period('all', mode)
+            return os.stat(simulation_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def get_trade_log_index(self, mode='default', period='all'):
+        """
+        Get the trade log index for a mode and period.
+        
+        The index is built once per simulation artifact (and per day, since the
+        live continuation extends up to today) and then reused by every request.
+        
+        Args:
+            mode: The simulation mode
+            period: The time period (all, 2000, covid)
+            
+        Returns:
+            A TradeLogIndex over the current trade log
+        """
+        version = (self.get_artifact_version(mode, period), datetime.now().strftime('%Y-%m-%d'))
+        cache_key = f"trade_index_{mode}_{period}"
+        
+        cached = self._cache.get(cache_key)
+        if cached and cached['version'] == version:
+            record_cache_event('data_processor', 'hit')
+            return cached['index']
+        record_cache_event('data_processor', 'miss')
+        if cached:
+            record_cache_event('data_processor', 'eviction')
+        
+        data = self.get_current_data_for_period(period, mode)
+        index = TradeLogIndex(data.get('trade_log', []))
+        
+        # The artifact may have just been generated; stamp the index with its version
+        version = (self.get_artifact_version(mode, period), version[1])
+        self._cache[cache_key] = {'version': version, 'index': index}
+        logger.debug("Built trade log index for %s/%s with %s trades", mode, period, len(index))
+        return index
+
+    def get_attribution_index(self, mode='default', period='all'):
+        """
+        Get the per-symbol P&L attribution index for a mode and period.
+
+        Like the trade log index, it is built once per simulation artifact and
+        per day, then answers every date range from its prefix sums.
+
+        Args:
+            mode: The simulation mode
+            period: The time period (all, 2000, covid)
+
+        Returns:
+            An AttributionIndex over the current trade log and portfolio
+        """
+        version = (self.get_artifact_version(mode, period), datetime.now().strftime('%Y-%m-%d'))
+        cache_key = f"attribution_{mode}_{period}"
+
+        cached = self._cache.get(cache_key)
+        if cached and cached['version'] == version:
+            record_cache_event('data_processor', 'hit')
+            return cached['index']
+        record_cache_event('data_processor', 'miss')
+        if cached:
+            record_cache_event('data_processor', 'eviction')
+
+        data = self.get_current_data_for_period(period, mode)
+        index = AttributionIndex(data.get('trade_log', []), data.get('portfolio', {}), data.get('last_prices'))
+
+        # The artifact may have just been generated; stamp the index with its version
+        version = (self.get_artifact_version(mode, period), version[1])
+        self._cache[cache_key] = {'version': version, 'index': index}
+        logger.debug("Built attribution index for %s/%s over %s symbols", mode, period, len(index.symbols))
+        return index
+
+    def get_rolling_analyzer(self, mode='default', period='all'):
+        """
+        Get the rolling-window analyzer for a mode and period.
+
+        The analyzer over the simulation file's history is built once per file.
+        The live daemon only appends committed bars to its base simulation, so
+        in live mode that analyzer is extended with the new bars. Otherwise the
+        continuation after the file is simulated afresh on every call: a copy
+        of the file's analyzer is extended with it, unless the continuation is
+        the one already analyzed.
+
+        Args:
+            mode: The simulation mode
+            period: The time period (all, 2000, covid)
+
+        Returns:
+            A RollingAnalyzer over the current performance history
+        """
+        cache_key = f"rolling_{mode}_{period}"
+
+        data = self.get_current_data_for_period(period, mode)
+        history = sorted(data.get('performance_history', []), key=lambda x: x['date'])
+        # Versioned by what the history is built on, not by the continuation or the live bars
+        version = self._get_base_version(mode, period)
+        if version is None:
+            return RollingAnalyzer.from_history(history)
+
+        cached = self._cache.get(cache_key)
+        if cached and cached['version'] == version:
+            record_cache_event('data_processor', 'hit')
+        else:
+            record_cache_event('data_processor', 'miss')
+            if cached:
+                record_cache_event('data_processor', 'eviction')
+            if version[0] == 'live':
+                base = RollingAnalyzer.from_history(history)
+            else:
+                artifact = self.load_simulation_artifact(mode, period)
+                base = RollingAnalyzer.from_history(sorted(artifact.get('performance_history', []),
+                                                           key=lambda x: x['date']))
+            cached = self._cache[cache_key] = {'version': version, 'base': base, 'tail': None, 'analyzer': base}
+            logger.debug("Built rolling metrics for %s/%s over %s bars", mode, period, base.bars)
+
+        base = cached['base']
+        if version[0] == 'live':
+            added = base.extend(history)
+            if added:
+                logger.debug("Extended rolling metrics for %s/%s with %s live bars", mode, period, added)
+            return base
+
+        tail = [entry for entry in history if base.last_date is None or entry['date'] > base.last_date]
+        tail_key = [(entry['date'], entry['portfolio_value']) for entry in tail]
+        if tail_key != cached['tail']:
+            analyzer = base.copy() if tail else base
+            analyzer.extend(tail)
+            cached['tail'], cached['analyzer'] = tail_key, analyzer
+        return cached['analyzer']
+
+    def _get_base_version(self, mode='default', period='all'):
+        """
+        Version of the data a mode and period's history starts from: the live
+        daemon's base simulation while it has state, else the simulation file.
+        Returns None if neither exists.
+        """
+        try:
+            if period == 'all':
+                store = self.get_live_store(mode)
+                if store.version() is not None:
+                    return ('live', os.stat(store.base_file).st_mtime_ns)
+            return ('file', os.stat(self.get_simulation_file(mode, period)).st_mtime_ns)
+        except OSError:
+            return None
+
+    def get_merged_performance_data(self, mode='default', timeline='all'):
+        """Get merged simulation data (precomputed + current simulation), filtered by timeline."""
+        try:
+            logger.debug("Fetching current data for mode=%s, timeline=%s", mode, timeline)
+            data = self.get_current_data_for_period(self.get_timeline_period(timeline), mode)
             if not data:
-                print(f"No data returned from get_current_data_for_period for mode={mode}")
-                return []
+                logger.debug("No data returned from get_current_data_for_period for mode=%s", mode)
+                return {}
             
             # Apply timeline filter
-            print(f"Filtering data for timeline={timeline}")
+            logger.debug("Filtering data for timeline=%s", timeline)
             try:
                 filtered_data = self.filter_by_timeline(data, timeline)
                 if not filtered_data.get('performance_history'):
-                    print(f"Timeline filter returned no performance history for {timeline}")
-                    return []
+                    logger.debug("Timeline filter returned no performance history for %s", timeline)
+                    return {}
             except Exception as filter_error:
-                print(f"Error filtering timeline data: {filter_error}")
-                return []
+                logger.error("Error filtering timeline data: %s", filter_error)
+                return {}
             
-            # Return the performance history
-            history = filtered_data['performance_history']
-            print(f"Returning {len(history)} performance history records")
-            return history
+            logger.debug("Returning %s performance history records", len(filtered_data['performance_history']))
+            return filtered_data
         except Exception as e:
-            print(f"Critical error in get_merged_performance_history: {e}")
-            return []
+            logger.error("Critical error in get_merged_performance_data: %s", e)
+            return {}
+    
+    def get_merged_performance_history(self, mode='default', timeline='all'):
+        """Get merged performance history from precomputed + current simulation."""
+        return self.get_merged_performance_data(mode, timeline).get('performance_history', [])
     
     def get_trade_log(self, mode='default', timeline='all'):
         """Get trade log from simulation."""
         try:
-            data = self.get_current_data(mode=mode)
+            data = self.get_current_data_for_period(self.get_timeline_period(timeline), mode)
             if not data:
                 return []
             
@@ -679,7 +781,7 @@ class DataProcessor:
             # Return the trade log
             return filtered_data['trade_log']
         except Exception as e:
-            print(f"Error in get_trade_log: {e}")
+            logger.error("Error in get_trade_log: %s", e)
             return []
     
     def get_current_portfolio(self, mode='default'):
@@ -695,83 +797,31 @@ class DataProcessor:
                 'portfolio': data['portfolio']
             }
         except Exception as e:
-            print(f"Error in get_current_portfolio: {e}")
+            logger.error("Error in get_current_portfolio: %s", e)
             return None
     
     def get_performance_metrics(self, mode='default', timeline='all'):
         """Get performance metrics for the simulation."""
         try:
-            data = self.get_current_data(mode=mode)
+            data = self.get_current_data_for_period(self.get_timeline_period(timeline), mode)
             if not data:
                 return None
             
             # Apply timeline filter
             filtered_data = self.filter_by_timeline(data, timeline)
             
-            # Get the performance history
-            history = filtered_data.get('performance_history', [])
-            
-            if not history:
-                return {
-                    'total_return': 0,
-                    'starting_value': self.get_initial_capital(mode),
-                    'ending_value': self.get_initial_capital(mode),
-                    'max_drawdown': 0,
-                    'volatility': 0,
-                    'sharpe_ratio': 0
-                }
-            
-            # Calculate the metrics
             starting_value = filtered_data.get('initial_capital', self.get_initial_capital(mode))
-            ending_value = history[-1]['portfolio_value']
-            total_return = (ending_value / starting_value - 1) * 100
-            
-            # Calculate max drawdown
-            peak = history[0]['portfolio_value']
-            max_drawdown = 0
-            
-            for entry in history:
-                if entry['portfolio_value'] > peak:
-                    peak = entry['portfolio_value']
-                current_drawdown = (peak - entry['portfolio_value']) / peak * 100 if peak > 0 else 0
-                max_drawdown = max(max_drawdown, current_drawdown)
-            
-            # Calculate daily returns for volatility and Sharpe ratio
-            if len(history) > 1:
-                # Calculate daily returns
-                daily_returns = []
-                for i in range(1, len(history)):
-                    prev_value = history[i-1]['portfolio_value']
-                    curr_value = history[i]['portfolio_value']
-                    daily_return = (curr_value / prev_value - 1) * 100
-                    daily_returns.append(daily_return)
-                
-                volatility = np.std(daily_returns) if daily_returns else 0
-                avg_return = np.mean(daily_returns) if daily_returns else 0
-                
-                # Annualize the Sharpe ratio (assuming trading days)
-                risk_free_rate = 0.02  # 2% risk-free rate
-                sharpe_ratio = (avg_return - risk_free_rate/252) / volatility * np.sqrt(252) if volatility > 0 else 0
-            else:
-                volatility = 0
-                sharpe_ratio = 0
-            
-            return {
-                'total_return': total_return,
-                'starting_value': starting_value,
-                'ending_value': ending_value,
-                'max_drawdown': max_drawdown,
-                'volatility': volatility,
-                'sharpe_ratio': sharpe_ratio
-            }
+            return compute_metrics(filtered_data.get('performance_history', []),
+                                   trade_log=filtered_data.get('trade_log', []),
+                                   starting_value=starting_value)
         except Exception as e:
-            print(f"Error in get_performance_metrics: {e}")
+            logger.error("Error in get_performance_metrics: %s", e)
             return None
     
     def get_portfolio_distribution(self, mode='default', timeline='all'):
         """Get cash and equity distribution over time."""
         try:
-            data = self.get_current_data(mode=mode)
+            data = self.get_current_data_for_period(self.get_timeline_period(timeline), mode)
             if not data:
                 return []
             
@@ -805,7 +855,7 @@ class DataProcessor:
             
             return distribution
         except Exception as e:
-            print(f"Error in get_portfolio_distribution: {e}")
+            logger.error("Error in get_portfolio_distribution: %s", e)
             return []
     
     def regenerate_simulation_data(self, mode='default'):
@@ -814,17 +864,17 @@ class DataProcessor:
         if os.path.exists(simulation_file):
             try:
                 os.remove(simulation_file)
-                print(f"Removed existing simulation file: {simulation_file}")
+                logger.info("Removed existing simulation file: %s", simulation_file)
             except Exception as e:
-                print(f"Warning: Could not remove existing simulation file {simulation_file}: {e}")
+                logger.warning("Could not remove existing simulation file %s: %s", simulation_file, e)
                 
-        print(f"Regenerating simulation data for {mode} mode...")
+        logger.info("Regenerating simulation data for %s mode...", mode)
         success = self.generate_sample_precomputed_data(mode)
         
         if success:
-            print(f"Successfully regenerated simulation data for {mode} mode")
+            logger.info("Successfully regenerated simulation data for %s mode", mode)
         else:
-            print(f"Failed to regenerate simulation data for {mode} mode")
+            logger.error("Failed to regenerate simulation data for %s mode", mode)
             
         return success
 
@@ -839,73 +889,430 @@ class DataProcessor:
         Returns:
             True if successful, False otherwise
         """
-        print(f"Generating {period} period data for {mode} mode...")
+        return self.generate_simulations(modes=[mode], periods=[period])
+
+    @phase('generate_simulations')
+    @timed('generate_simulations')
+    def generate_simulations(self, modes=None, periods=None):
+        """
+        Generate simulation data for several modes and periods in one pass.
         
-        # Get parameters for the specified mode
-        params = self.simulation_params.get(mode, self.simulation_params['default'])
+        The market data is loaded and scanned once. Every (mode, period) pair is
+        a fresh-capital simulation forked at its period's start date, and all of
+        them share the per-date signal computation.
         
-        # Set start date based on period
-        if period == '2000':
-            start_date = '2000-01-01'
-        elif period == 'covid':
-            start_date = '2020-03-13'
-        else:  # Default to 1971
-            start_date = '1971-02-08'
+        Args:
+            modes: Simulation modes (defaults to all modes)
+            periods: Time periods (defaults to all, 2000 and covid)
         
-        # End date is always current cutoff date
-        end_date = self.cutoff_date
+        Returns:
+            True if every simulation was generated and saved, False otherwise
+        """
+        modes = [mode if mode in self.simulation_params else 'default'
+                 for mode in (modes or self.simulation_params)]
+        periods = [period if period in self.PERIOD_START_DATES else 'all'
+                   for period in (periods or self.PERIOD_START_DATES)]
         
-        # Output file
-        output_file = self.get_simulation_file(mode, period)
+        # A partitioned market store is scanned chunk by chunk instead of loaded whole
+        report_progress("Loading market data", 0.0)
+        store = self.get_market_store()
+        if store.exists():
+            market_data = None
+            last_date = store.date_range()[1]
+        else:
+            # Load market data once for every simulation
+            market_data = self.load_market_data()
+            last_date = None if market_data.empty else market_data['date'].max()
         
-        # Load market data
-        market_data = self.load_market_data()
+        simulations = []
+        for mode in modes:
+            params = self.simulation_params[mode]
+            for period in periods:
+                start_date = self.PERIOD_START_DATES[period]
+                if last_date is None or last_date < start_date:
+                    logger.info("No market data available for period %s", period)
+                    return False
+                
+                # Initialize algorithm with mode-specific parameters
+                algo = FiveTenAlgo(
+                    initial_capital=params['initial_capital'],
+                    buy_threshold=params['buy_threshold'],
+                    sell_threshold=params['sell_threshold'],
+                    trade_size_buy_pct=params['trade_size_buy_pct'],
+                    trade_size_sell_pct=params['trade_size_sell_pct']
+                )
+                # The market data runs to the cutoff date; the file records it (see stale_artifacts)
+                algo.cutoff_date = self.cutoff_date
+                simulations.append((mode, period, algo, start_date))
         
-        # Filter market data for the specified period
-        period_market_data = market_data[market_data['date'] >= start_date].copy()
+        if market_data is None:
+            return self._generate_store_simulations(store, simulations)
         
-        if period_market_data.empty:
-            print(f"No market data available for period {period}")
-            return False
+        logger.info("Processing %s market data records for %s simulations (%s x %s)", len(market_data), len(simulations), ', '.join(modes), ', '.join(periods))
+        report_progress(f"Simulating {len(simulations)} simulations over {len(market_data)} records", 0.1)
+        with self.signal_pool() as signal_pool:
+            run_forked_simulations(market_data, [(algo, start_date) for _, _, algo, start_date in simulations],
+                                   signal_pool=signal_pool)
         
-        # Initialize algorithm with mode-specific parameters
-        algo = FiveTenAlgo(
-            initial_capital=params['initial_capital'],
-            buy_threshold=params['buy_threshold'],
-            sell_threshold=params['sell_threshold'],
-            trade_size_buy_pct=params['trade_size_buy_pct'],
-            trade_size_sell_pct=params['trade_size_sell_pct']
-        )
+        # Past this point the files are written even if the job is cancelled
+        report_progress("Saving simulation files", 0.9)
+        success = True
+        for mode, period, algo, _ in simulations:
+            output_file = self.get_simulation_file(mode, period)
+            logger.info("Saving %s simulation data to %s", period, output_file)
+            if algo.save_simulation(output_file):
+                logger.info("Successfully saved %s simulation data for %s mode (%s performance history records)", period, mode, len(algo.performance_history))
+            else:
+                logger.error("Failed to save %s simulation data for %s mode", period, mode)
+                success = False
         
-        # Process the market data
-        print(f"Processing {len(period_market_data)} market data records for {period} period")
-        algo.process_market_data(period_market_data)
+        return success
+
+    def _generate_store_simulations(self, store, simulations):
+        """
+        Run simulations over the market store one chunk at a time.
         
-        # Save the result
-        print(f"Saving {period} simulation data to {output_file}")
-        success = algo.save_simulation(output_file)
+        Trades and histories are appended to per-simulation logs as the chunks
+        are processed, then copied into the usual simulation files.
         
-        if success:
-            print(f"Successfully saved {period} simulation data for {mode} mode")
-            # Verify saved data immediately
-            with open(output_file, 'r') as f:
-                data = json.load(f)
-            history_count = len(data.get('performance_history', []))
-            print(f"Verified: {history_count} performance history records saved")
-        else:
-            print(f"Failed to save {period} simulation data for {mode} mode")
+        Args:
+            store: The MarketStore to scan
+            simulations: List of (mode, period, algo, start_date)
+        
+        Returns:
+            True if every simulation was generated and saved, False otherwise
+        """
+        logger.info("Processing the market store (%s symbols, %s partitions) for %s simulations", len(store.symbols), len(store.partitions()), len(simulations))
+        logs = [SimulationLog(os.path.join(self.data_dir, 'simulation_logs', f"{mode}_{period}"))
+                for mode, period, _, _ in simulations]
+        with self.signal_pool() as signal_pool:
+            run_chunked_simulations(store, [(algo, start_date) for _, _, algo, start_date in simulations],
+                                    logs=logs, signal_pool=signal_pool, progress=self._chunk_progress)
+        
+        report_progress("Saving simulation files", 0.9)
+        success = True
+        for (mode, period, _, _), log in zip(simulations, logs):
+            output_file = self.get_simulation_file(mode, period)
+            logger.info("Saving %s simulation data to %s", period, output_file)
+            try:
+                log.export(output_file)
+                logger.info("Successfully saved %s simulation data for %s mode", period, mode)
+            except Exception as e:
+                logger.error("Failed to save %s simulation data for %s mode: %s", period, mode, e)
+                success = False
         
         return success
 
+    def roll_forward(self, cutoff_date=None, modes=None, periods=None):
+        """
+        Extend the precomputed simulations to a new cutoff date without rerunning them.
+        
+        The market data is first extended to the cutoff, continuing from its last
+        prices, so every simulation rolls forward over the same bars. Each
+        simulation file's final state is then loaded and only the bars after its
+        last date are simulated. The extended files record the new cutoff, which
+        also becomes this processor's cutoff_date: the market data now runs to
+        it. Files left out or not rolled keep their earlier cutoff and are
+        still valid (see stale_artifacts); rolling forward again picks them up.
+        
+        Args:
+            cutoff_date: New cutoff date (YYYY-MM-DD, defaults to today; never
+                earlier than the current cutoff)
+            modes: Simulation modes (defaults to all modes)
+            periods: Time periods (defaults to all, 2000 and covid)
+        
+        Returns:
+            Dict of (mode, period): number of bars added, or None if the file
+            could not be loaded or saved
+        """
+        cutoff_date = max(cutoff_date or datetime.now().strftime('%Y-%m-%d'), self.cutoff_date)
+        modes = [mode if mode in self.simulation_params else 'default'
+                 for mode in (modes or self.simulation_params)]
+        periods = [period if period in self.PERIOD_START_DATES else 'all'
+                   for period in (periods or self.PERIOD_START_DATES)]
+        
+        # Load the final state of every simulation, grouped by the date it ends at
+        results = {}
+        groups = {}  # Last date: [(mode, period, algo)]
+        for mode in modes:
+            params = self.simulation_params[mode]
+            for period in periods:
+                algo = FiveTenAlgo(
+                    initial_capital=params['initial_capital'],
+                    buy_threshold=params['buy_threshold'],
+                    sell_threshold=params['sell_threshold'],
+                    trade_size_buy_pct=params['trade_size_buy_pct'],
+                    trade_size_sell_pct=params['trade_size_sell_pct']
+                )
+                if not algo.load_simulation(self.get_simulation_file(mode, period)):
+                    logger.error("No %s simulation for %s mode to roll forward", period, mode)
+                    results[(mode, period)] = None
+                    continue
+                last_date = algo.performance_history[-1]['date'] if algo.performance_history else self.cutoff_date
+                last_date = max(last_date, algo.cutoff_date or '')
+                if last_date > cutoff_date:
+                    logger.error("The %s simulation for %s mode ends at %s, after the cutoff date %s", period, mode, last_date, cutoff_date)
+                    results[(mode, period)] = None
+                    continue
+                groups.setdefault(last_date, []).append((mode, period, algo))
+        
+        if not groups:
+            return results
+        
+        # A week before the earliest last date gives the first new bar its reference prices
+        report_progress(f"Extending the market data to {cutoff_date}", 0.0)
+        since = (datetime.strptime(min(groups), '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
+        tail = self._extend_market_data(cutoff_date, since)
+        
+        for number, (last_date, simulations) in enumerate(sorted(groups.items())):
+            report_progress(f"Rolling {len(simulations)} simulations forward from {last_date}", number / len(groups))
+            week_ago = (datetime.strptime(last_date, '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
+            matrix = tail.slice(week_ago)
+            context_rows = int(np.searchsorted(matrix.dates, last_date, side='right'))
+            
+            bars_before = [len(algo.performance_history) for _, _, algo in simulations]
+            if context_rows < len(matrix):
+                first_date = matrix.dates[context_rows]
+                with self.signal_pool() as signal_pool:
+                    run_forked_simulations(matrix, [(algo, first_date) for _, _, algo in simulations],
+                                           context_rows=context_rows, signal_pool=signal_pool)
+            
+            for (mode, period, algo), before in zip(simulations, bars_before):
+                algo.cutoff_date = cutoff_date
+                added = len(algo.performance_history) - before
+                if algo.save_simulation(self.get_simulation_file(mode, period)):
+                    logger.info("Rolled %s simulation for %s mode forward from %s to %s (%s new bars)", period, mode, last_date, algo.cutoff_date, added)
+                    results[(mode, period)] = added
+                else:
+                    logger.error("Failed to save the rolled-forward %s simulation for %s mode", period, mode)
+                    results[(mode, period)] = None
+        
+        # The market data now runs to the new cutoff, whichever files were rolled
+        self.cutoff_date = cutoff_date
+        with open(self.cutoff_file, 'w') as f:
+            json.dump({'cutoff_date': self.cutoff_date}, f)
+        return results
+
+    def _extend_market_data(self, end_date, since):
+        """
+        Extend the market data (store or cache file) with synthetic bars up to end_date.
+        
+        The new bars continue every symbol from its last known price; symbols
+        without a price in the data are not extended.
+        
+        Returns:
+            PriceMatrix of the bars from since to end_date, old and new
+        """
+        store = self.get_market_store()
+        if store.exists():
+            chunks = list(store.iter_chunks(since)) or [store.read_partition(store.partitions()[-1])]
+            market = PriceMatrix(np.concatenate([chunk.dates for chunk in chunks]), chunks[0].symbols,
+                                 np.vstack([chunk.prices for chunk in chunks]))
+            market_data = None
+        else:
+            market_data = self.load_market_data()
+            market = PriceMatrix.from_frame(market_data)
+        
+        last_date = market.dates[-1] if len(market) else since
+        new_bars = PriceMatrix([], market.symbols, np.empty((0, len(market.symbols))))
+        if last_date < end_date:
+            # Forward-filled last price of every symbol
+            last_prices = np.full(len(market.symbols), np.nan)
+            if len(market):
+                last_prices = pd.DataFrame(market.prices).ffill().iloc[-1].to_numpy()
+            known = np.flatnonzero(~np.isnan(last_prices))
+            generated = generate_market(list(market.symbols[known]),
+                                        (datetime.strptime(last_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d'),
+                                        end_date, freq=self.bar_frequency, rng=self._rng,
+                                        last_prices=dict(zip(market.symbols[known], last_prices[known])))
+            prices = np.full((len(generated), len(market.symbols)), np.nan)
+            prices[:, known] = generated.prices
+            new_bars = PriceMatrix(generated.dates, market.symbols, prices)
+        
+        if len(new_bars):
+            logger.info("Extending the market data with %s bars from %s to %s", len(new_bars), new_bars.dates[0], new_bars.dates[-1])
+            if market_data is None:
+                store.write(new_bars)
+            else:
+                market_data = pd.concat([market_data, new_bars.to_frame()[market_data.columns]], ignore_index=True)
+                with open(self.market_data_file, 'w') as f:
+                    json.dump(market_data.to_dict(orient='records'), f)
+        
+        tail = market.slice(since)
+        return PriceMatrix(np.concatenate([tail.dates, new_bars.dates]), market.symbols,
+                           np.vstack([tail.prices, new_bars.prices]))
+
+    @staticmethod
+    def _chunk_progress(message):
+        """Log the progress of a chunked run and report it to its job, which may be cancelled between chunks."""
+        logger.info(message)
+        report_progress(message)
+
+    def signal_pool(self):
+        """
+        A SignalPool over signal_workers processes (see models/sharding.py), or
+        an empty context when detection runs in this process.
+        """
+        if self.signal_workers and self.signal_workers > 1:
+            return SignalPool(self.signal_workers)
+        return nullcontext()
+
+    def get_market_store(self):
+        """Get the partitioned market data store (see models/market_store.py)."""
+        return MarketStore(self.market_store_dir)
+
     def generate_all_period_simulations(self):
         """Generate simulation data for all time periods and all modes."""
-        periods = ['all', '2000', 'covid']
+        return self.generate_simulations()
+
+    def stale_artifacts(self, modes=None, periods=None):
+        """
+        The simulations whose file is missing, unreadable, or cannot be
+        continued on the current market data: it records no cutoff date
+        (generated before files recorded it) or one after the current cutoff
+        (the market data was regenerated since). Files at an earlier cutoff,
+        such as those left out of a partial roll-forward, are kept; the
+        market data only grew after their last bar.
         
-        for mode in self.simulation_params:
-            for period in periods:
-                # Skip combinations that aren't needed
-                self.generate_period_simulation_data(period, mode)
+        Args:
+            modes: Simulation modes (defaults to all modes)
+            periods: Time periods (defaults to all, 2000 and covid)
+        
+        Returns:
+            List of (mode, period) pairs
+        """
+        stale = []
+        for mode in (modes or self.simulation_params):
+            for period in (periods or self.PERIOD_START_DATES):
+                try:
+                    cutoff_date = self.load_simulation_artifact(mode, period).get('cutoff_date')
+                except (OSError, ValueError) as e:
+                    if not isinstance(e, FileNotFoundError):
+                        logger.warning("Could not read %s simulation for %s mode: %s", period, mode, e)
+                    cutoff_date = None
+                if cutoff_date is None or cutoff_date > self.cutoff_date:
+                    stale.append((mode, period))
+        return stale
+
+    def artifact_ready(self, mode='default', period='all'):
+        """True if a mode and period can be served without generating its simulation first."""
+        if period == 'all' and self.get_live_store(mode).version() is not None:
+            return True
+        simulation_file = self.get_simulation_file(mode, period)
+        return os.path.exists(simulation_file) and os.path.getsize(simulation_file) > 0
 
+    def submit_generation(self, modes=None, periods=None, description=None):
+        """
+        Queue generate_simulations on the job scheduler.
+        
+        Args:
+            modes: Simulation modes (defaults to all modes)
+            periods: Time periods (defaults to all, 2000 and covid)
+            description: Summary shown by the jobs API
+        
+        Returns:
+            The Job; an identical job that is still pending or running is reused
+        """
+        modes = [mode if mode in self.simulation_params else 'default'
+                 for mode in (modes or self.simulation_params)]
+        periods = [period if period in self.PERIOD_START_DATES else 'all'
+                   for period in (periods or self.PERIOD_START_DATES)]
+        
+        # The key is the set of files the job writes, so requests can find the job covering theirs
+        key = frozenset((mode, period) for mode in modes for period in periods)
+        description = description or f"Generate simulations: {', '.join(modes)} x {', '.join(periods)}"
+        return self.jobs.submit('generate_simulations', key, self._run_generation_job, modes, periods,
+                                description=description)
+
+    def _run_generation_job(self, modes, periods):
+        if not self.generate_simulations(modes, periods):
+            raise RuntimeError("Simulation generation failed")
+
+    def request_artifact(self, mode='default', period='all'):
+        """
+        Make sure the simulation file of a mode and period is on its way, without waiting for it.
+        
+        Args:
+            mode: The simulation mode
+            period: The time period (all, 2000, covid)
+        
+        Returns:
+            The pending or running job generating the file, or None if the file
+            is ready or there is no job scheduler (callers then generate inline)
+        """
+        if self.jobs is None or self.artifact_ready(mode, period):
+            return None
+        mode = mode if mode in self.simulation_params else 'default'
+        period = period if period in self.PERIOD_START_DATES else 'all'
+        
+        for job in self.jobs.jobs(kind='generate_simulations', active_only=True):
+            if (mode, period) in job.key:
+                return job
+        # A job may have written it since the first check
+        if self.artifact_ready(mode, period):
+            return None
+        return self.submit_generation([mode], [period])
+
+    @phase('load_simulation')
+    def load_simulation_artifact(self, mode='default', period='all'):
+        """
+        Load the precomputed simulation file for a mode and period.
+        
+        The parsed file is kept in memory and only re-read when the file changes
+        on disk, so repeated requests do not pay for the JSON parse. Callers must
+        not mutate the returned dict.
+        
+        Args:
+            mode: The simulation mode
+            period: The time period (all, 2000, covid)
+            
+        Returns:
+            The parsed simulation data
+        """
+        simulation_file = self.get_simulation_file(mode, period)
+        version = os.stat(simulation_file).st_mtime_ns
+        
+        cached = self._artifacts.get(simulation_file)
+        if cached and cached['version'] == version:
+            return cached['data']
+        
+        with open(simulation_file, 'r') as f:
+            data = json.load(f)
+        
+        self._artifacts[simulation_file] = {'version': version, 'data': data}
+        record_artifact(os.path.basename(simulation_file), os.path.getsize(simulation_file), data)
+        return data
+    
+    def get_live_store(self, mode='default'):
+        """Get the live paper-trading state store of a mode (see models/live.py)."""
+        if mode not in self.simulation_params:
+            mode = 'default'
+        return LiveStore(self.data_dir, mode)
+    
+    def load_live_data(self, mode='default'):
+        """
+        Load the live paper-trading simulation of a mode, as written by the daemon.
+        
+        The parsed state is kept in memory until the daemon commits another bar.
+        Callers must not mutate the returned dict.
+        
+        Returns:
+            The live simulation data, or None if the daemon has never run for the mode
+        """
+        store = self.get_live_store(mode)
+        version = store.version()
+        if version is None:
+            return None
+        
+        cached = self._artifacts.get(store.directory)
+        if cached and cached['version'] == version:
+            return cached['data']
+        
+        data = store.load()
+        self._artifacts[store.directory] = {'version': version, 'data': data}
+        record_artifact(f"live/{os.path.basename(store.directory)}", os.path.getsize(store.base_file), data)
+        return data
+    
     def get_current_data_for_period(self, period='all', mode='default'):
         """
         Get current data for a specific period and mode.
@@ -917,25 +1324,33 @@ class DataProcessor:
         Returns:
             The current data for the specified period and mode
         """
+        # The live daemon's state replaces the simulated continuation
+        if period == 'all':
+            live_data = self.load_live_data(mode)
+            if live_data is not None:
+                return dict(live_data)
+        
         # Get the file for the specified period and mode
         simulation_file = self.get_simulation_file(mode, period)
         
         # Check if the file exists
         if not os.path.exists(simulation_file):
-            print(f"Simulation file does not exist for {period} period, {mode} mode. Generating...")
+            job = self.request_artifact(mode, period)
+            if job is not None:
+                raise JobPending(job)
+            logger.info("Simulation file does not exist for %s period, %s mode. Generating...", period, mode)
             success = self.generate_period_simulation_data(period, mode)
             if not success:
                 return self._get_empty_data(mode)
         
         try:
-            # Load the precomputed data
-            with open(simulation_file, 'r') as f:
-                precomputed_data = json.load(f)
+            # Load the precomputed data (shallow copy, the continuation replaces keys)
+            precomputed_data = dict(self.load_simulation_artifact(mode, period))
             
             # Continue the simulation from the precomputed data
             return self.get_current_data(precomputed_data, mode)
         except Exception as e:
-            print(f"Error loading or processing data for {period} period, {mode} mode: {e}")
+            logger.error("Error loading or processing data for %s period, %s mode: %s", period, mode, e)
             return self._get_empty_data(mode)
             
     def get_market_data_cache(self):
@@ -944,13 +1359,13 @@ class DataProcessor:
             try:
                 with open(self.market_data_file, 'r') as f:
                     market_data = json.load(f)
-                print(f"Loaded raw market data from cache: {len(market_data)} records")
+                logger.debug("Loaded raw market data from cache: %s records", len(market_data))
                 return market_data
             except Exception as e:
-                print(f"Error loading market data from cache: {e}")
+                logger.error("Error loading market data from cache: %s", e)
                 
         # If cache doesn't exist or is corrupted, generate new data
-        print("Market data cache not found. Generating new data...")
+        logger.info("Market data cache not found. Generating new data...")
         market_data = self.generate_and_cache_market_data()
         # Convert DataFrame to list of dicts for JSON serialization
         return market_data.to_dict(orient='records') 
\ No newline at end of file
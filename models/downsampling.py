@@ -0,0 +1,125 @@
+import numpy as np
+
+
+def _date_axis(records):
+    """Convert the 'date' field of each record into day numbers for the x axis."""
+    return np.array([record['date'] for record in records], dtype='datetime64[D]').astype(np.int64).astype(float)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Pick the indices to keep with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The remaining points are split
+    into threshold - 2 buckets and from each bucket the point forming the
+    largest triangle with the previously kept point and the average of the next
+    bucket is selected, which keeps peaks and troughs visible.
+
+    Args:
+        x: Array of x values (must be increasing)
+        y: Array of y values
+        threshold: Number of points to keep
+
+    Returns:
+        Sorted array of indices into x and y
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries over the points between the first and the last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start = stop
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        # Triangle areas (times two) for every candidate in this bucket
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a]) -
+            (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[bucket + 1] = a
+
+    return indices
+
+
+def minmax_indices(series, max_points):
+    """
+    Pick the indices to keep with min/max bucketing over one or more series.
+
+    The points are split into equal buckets and the minimum and maximum of
+    every series in each bucket are kept, together with the first and last
+    point, so no extreme of any series is lost.
+
+    Args:
+        series: List of equally long y arrays
+        max_points: Upper bound on the number of indices returned
+
+    Returns:
+        Sorted array of unique indices
+    """
+    n = len(series[0])
+    if n <= max_points:
+        return np.arange(n)
+
+    n_buckets = max(1, (max_points - 2) // (2 * len(series)))
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    starts = edges[:-1]
+
+    bucket_of = np.repeat(np.arange(n_buckets), np.diff(edges))
+
+    keep = [np.array([0, n - 1])]
+    for y in series:
+        # reduceat gives the extreme of each bucket; map it back to a position
+        bucket_min = np.minimum.reduceat(y, starts)
+        bucket_max = np.maximum.reduceat(y, starts)
+        is_min = y == bucket_min[bucket_of]
+        is_max = y == bucket_max[bucket_of]
+        # First hit per bucket for each of min and max
+        for hits in (is_min, is_max):
+            positions = np.flatnonzero(hits)
+            _, first = np.unique(bucket_of[positions], return_index=True)
+            keep.append(positions[first])
+
+    return np.unique(np.concatenate(keep))
+
+
+def downsample_records(records, max_points, value_keys, method='lttb'):
+    """
+    Downsample a date-ordered list of records for charting.
+
+    Args:
+        records: List of dicts with a 'date' field, sorted by date
+        max_points: Maximum number of records to return
+        value_keys: Record fields that carry the plotted values
+        method: 'lttb' (uses the first value key) or 'minmax' (uses all of them)
+
+    Returns:
+        A list of at most max_points of the original records
+    """
+    if not records or len(records) <= max_points:
+        return records
+
+    if method == 'minmax':
+        series = [np.array([record.get(key, 0) for record in records], dtype=float) for key in value_keys]
+        indices = minmax_indices(series, max_points)
+    elif method == 'lttb':
+        x = _date_axis(records)
+        y = np.array([record.get(value_keys[0], 0) for record in records], dtype=float)
+        indices = lttb_indices(x, y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    return [records[i] for i in indices]
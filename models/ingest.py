@@ -0,0 +1,240 @@
+"""
+Streaming ingestion of external price files into the market store.
+
+Vendor dumps are read in chunks (CSV with pandas, Parquet with pyarrow when
+it is installed), normalized to the engine's date/symbol/price schema and
+spooled to one binary file per year as (day, column, price) records. Each
+year is then deduplicated, sorted and merged into its store partition in one
+go. The input is read once and memory is bounded by a chunk plus one year of
+records, whatever the size of the dump.
+
+Rows without a parseable date, a symbol or a positive price are dropped.
+Within the ingested files the first record of a (date, symbol) pair wins, as
+in PriceMatrix.from_frame; over prices already in the store, the ingested
+ones win.
+"""
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.price_matrix import PriceMatrix
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Accepted names of each engine column in external files, compared case-insensitively
+COLUMN_ALIASES = {
+    'date': ['date', 'timestamp', 'datetime', 'trade_date'],
+    'symbol': ['symbol', 'ticker', 'sym', 'code'],
+    'price': ['price', 'close', 'adj_close', 'adjclose', 'adj close', 'last']
+}
+
+# Spooled record of one price
+SPOOL_DTYPE = np.dtype([('day', np.int32), ('column', np.int32), ('price', np.float64)])
+
+
+def detect_format(path):
+    """'parquet' for .parquet/.pq files, else 'csv'."""
+    return 'parquet' if path.lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def resolve_columns(columns, overrides=None):
+    """
+    Map the engine columns to the columns of a file.
+
+    Args:
+        columns: Column names of the file
+        overrides: Engine column: file column, taking precedence over the aliases
+
+    Returns:
+        Dict of engine column (date, symbol, price): file column
+
+    Raises:
+        ValueError: If a column cannot be found
+    """
+    overrides = overrides or {}
+    lowered = {str(column).strip().lower(): column for column in columns}
+    resolved = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        if overrides.get(name):
+            if overrides[name] not in columns:
+                raise ValueError(f"Column {overrides[name]!r} not found (columns: {', '.join(map(str, columns))})")
+            resolved[name] = overrides[name]
+            continue
+        match = next((lowered[alias] for alias in aliases if alias in lowered), None)
+        if match is None:
+            raise ValueError(f"No {name} column found (columns: {', '.join(map(str, columns))}); "
+                             f"name it with --{name}-column")
+        resolved[name] = match
+    return resolved
+
+
+def read_chunks(path, file_format=None, chunksize=1000000):
+    """
+    Read a price file in chunks.
+
+    Yields:
+        DataFrames of up to chunksize rows with the file's own columns
+    """
+    file_format = file_format or detect_format(path)
+    if file_format == 'parquet':
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif file_format == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=str, skipinitialspace=True)
+    else:
+        raise ValueError(f"Unsupported format: {file_format!r}")
+
+
+def normalize_chunk(frame, columns, date_format=None):
+    """
+    Normalize a chunk to the engine schema.
+
+    Args:
+        frame: A chunk as read from the file
+        columns: Engine column: file column, from resolve_columns
+        date_format: strptime format of the dates, or None to infer it
+
+    Returns:
+        DataFrame with columns [day (days since the epoch), symbol, price] of the valid rows
+    """
+    dates = pd.to_datetime(frame[columns['date']], format=date_format, errors='coerce')
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    symbols = frame[columns['symbol']].astype(str).str.strip().str.upper()
+    prices = pd.to_numeric(frame[columns['price']], errors='coerce')
+
+    valid = dates.notna().to_numpy() & (prices > 0).to_numpy() & frame[columns['symbol']].notna().to_numpy()
+    valid &= (symbols != '').to_numpy()
+    return pd.DataFrame({
+        'day': dates[valid].to_numpy().astype('datetime64[D]').astype(np.int64),
+        'symbol': symbols[valid].to_numpy(),
+        'price': prices[valid].to_numpy(dtype=float)
+    })
+
+
+class Ingestor:
+    def __init__(self, store, chunksize=1000000, progress=None):
+        """
+        Initialize an ingestion into a store.
+
+        Parameters:
+        store (MarketStore): The store to write
+        chunksize (int): Rows read per chunk
+        progress (callable): Receives progress messages, or None
+        """
+        self.store = store
+        self.chunksize = chunksize
+        self.progress = progress
+        self.spool_dir = os.path.join(store.directory, '.ingest')
+        self.rows_read = 0
+        self.rows_kept = 0
+        self._started = None
+
+    def _report(self, message):
+        if self.progress:
+            self.progress(message)
+
+    def _rate(self):
+        elapsed = time.perf_counter() - self._started
+        return self.rows_read / elapsed if elapsed > 0 else 0.0
+
+    def spool_file(self, year):
+        return os.path.join(self.spool_dir, f"{year}.bin")
+
+    def spool(self, path, file_format=None, column_overrides=None, date_format=None):
+        """Read one file and append its normalized records to the year spools."""
+        columns = None
+        for frame in read_chunks(path, file_format, self.chunksize):
+            if columns is None:
+                columns = resolve_columns(list(frame.columns), column_overrides)
+            chunk = normalize_chunk(frame, columns, date_format)
+            self.rows_read += len(frame)
+            self.rows_kept += len(chunk)
+
+            if len(chunk):
+                records = np.empty(len(chunk), dtype=SPOOL_DTYPE)
+                records['day'] = chunk['day'].to_numpy()
+                codes, symbols = pd.factorize(chunk['symbol'])
+                records['column'] = self.store.add_symbols(list(symbols))[codes]
+                records['price'] = chunk['price'].to_numpy()
+
+                years = records['day'].astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+                order = np.argsort(years, kind='stable')
+                bounds = np.flatnonzero(np.diff(years[order])) + 1
+                for part in np.split(order, bounds):
+                    with open(self.spool_file(int(years[part[0]])), 'ab') as f:
+                        records[part].tofile(f)
+
+            self._report(f"{path}: {self.rows_read:,} rows read, {self.rows_kept:,} kept "
+                         f"({self._rate():,.0f} rows/s)")
+
+    def merge_year(self, year):
+        """Deduplicate and sort one year of spooled records and merge it into the store."""
+        records = np.fromfile(self.spool_file(year), dtype=SPOOL_DTYPE)
+        symbol_count = len(self.store.symbols)
+
+        # First record of every (day, column), in date order
+        keys = records['day'].astype(np.int64) * symbol_count + records['column']
+        _, first = np.unique(keys, return_index=True)
+        records = records[first]
+
+        days, rows = np.unique(records['day'], return_inverse=True)
+        prices = np.full((len(days), symbol_count), np.nan)
+        prices[rows, records['column']] = records['price']
+        dates = days.astype('datetime64[D]').astype(str)
+        self.store.write(PriceMatrix(dates, self.store.symbols, prices))
+        return len(days), len(first)
+
+    def run(self, paths, file_format=None, column_overrides=None, date_format=None):
+        """
+        Ingest files into the store.
+
+        Args:
+            paths: Files to ingest, in priority order for duplicate records
+            file_format: 'csv' or 'parquet', or None to go by each file's extension
+            column_overrides: Engine column: file column, for non-standard names
+            date_format: strptime format of the dates, or None to infer it
+
+        Returns:
+            Summary dict with the row counts, distinct prices and bars written
+        """
+        self._started = time.perf_counter()
+        if os.path.exists(self.spool_dir):
+            shutil.rmtree(self.spool_dir)
+        os.makedirs(self.spool_dir)
+
+        try:
+            for path in paths:
+                self.spool(path, file_format, column_overrides, date_format)
+
+            years = sorted(int(name[:-4]) for name in os.listdir(self.spool_dir) if name.endswith('.bin'))
+            bars = prices = 0
+            for year in years:
+                year_bars, year_prices = self.merge_year(year)
+                bars += year_bars
+                prices += year_prices
+                self._report(f"Merged {year}: {year_bars} bars, {year_prices:,} prices")
+        finally:
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+        elapsed = time.perf_counter() - self._started
+        return {
+            'rows_read': self.rows_read,
+            'rows_kept': self.rows_kept,
+            'prices': prices,
+            'duplicates': self.rows_kept - prices,
+            'bars': bars,
+            'years': len(years),
+            'symbols': len(self.store.symbols),
+            'seconds': elapsed,
+            'rows_per_second': self.rows_read / elapsed if elapsed > 0 else 0.0
+        }
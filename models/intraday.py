@@ -0,0 +1,233 @@
+"""
+Minute-bar backtests of the FiveTenAlgo strategy.
+
+The daily engine compares one price per symbol per day with the price a week
+earlier. Here every minute is compared with the same minute one week earlier,
+and a signal only fires once the change has stayed inside its band for
+`stability_minutes` consecutive bars. Bands and stability are evaluated for a
+whole day at once with boolean reductions over the minutes x symbols matrix.
+
+Input is consumed one trading day at a time and only the last week of days is
+kept for the week-ago reference, so memory does not grow with the length of
+the backtest. The result is the usual trade_log and performance_history (one
+entry per day); trades additionally carry the minute they executed at.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from models.synthetic import price_paths
+
+# One trading day of minute bars: minutes ('HH:MM', sorted) x symbols prices, NaN where missing
+MinuteDay = namedtuple('MinuteDay', ['date', 'minutes', 'symbols', 'prices'])
+
+# Regular session, 09:30 to 15:59
+SESSION_MINUTES = [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(9 * 60 + 30, 16 * 60)]
+
+
+def day_from_frame(frame, date):
+    """
+    Build a MinuteDay from the records of one date.
+
+    Args:
+        frame: DataFrame with columns [symbol, timestamp, price] ('YYYY-MM-DD HH:MM')
+        date: The date of the records (YYYY-MM-DD)
+    """
+    times = frame['timestamp'].str.slice(11, 16).to_numpy()
+    minutes = np.unique(times)
+    symbols = pd.unique(frame['symbol'])
+
+    rows = np.searchsorted(minutes, times)
+    columns = pd.Index(symbols).get_indexer(frame['symbol'])
+    prices = np.full((len(minutes), len(symbols)), np.nan)
+    prices[rows, columns] = frame['price'].to_numpy(dtype=float)
+    return MinuteDay(date, minutes, symbols, prices)
+
+
+def read_minute_csv(path, chunksize=1000000):
+    """
+    Read minute bars from a CSV file one trading day at a time.
+
+    The file has columns [symbol, timestamp, price] and must be sorted by
+    timestamp; it is read in chunks, so only about one day is held at a time.
+
+    Yields:
+        MinuteDay for every date in the file
+    """
+    pending = None
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype={'symbol': str, 'timestamp': str}):
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        dates = chunk['timestamp'].str.slice(0, 10)
+
+        # The last date may continue in the next chunk
+        last_date = dates.iloc[-1]
+        pending = chunk[dates == last_date]
+        complete = chunk[dates != last_date]
+        for date, frame in complete.groupby(dates[dates != last_date], sort=True):
+            yield day_from_frame(frame, date)
+
+    if pending is not None and len(pending):
+        yield day_from_frame(pending, pending['timestamp'].iloc[0][:10])
+
+
+def generate_minute_days(symbols, start_date, end_date, seed=None, daily_volatility=0.02, trend=0.0002):
+    """
+    Generate synthetic minute bars for every business day in a date range.
+
+    Each day continues from the previous day's close with a random walk scaled
+    to the daily volatility, floored at $1.
+
+    Yields:
+        MinuteDay for every business day
+    """
+    rng = np.random.default_rng(seed)
+    minutes = np.array(SESSION_MINUTES)
+    symbols = np.asarray(symbols, dtype=object)
+    close = rng.uniform(50, 500, size=len(symbols))
+
+    for date in pd.date_range(start=start_date, end=end_date, freq='B').strftime('%Y-%m-%d'):
+        shocks = rng.normal(trend / len(minutes), daily_volatility / np.sqrt(len(minutes)),
+                            size=(len(minutes), len(symbols)))
+        prices = price_paths(close, shocks)
+        close = prices[-1]
+        yield MinuteDay(date, minutes, symbols, prices)
+
+
+def stable_first_minute(band, stability_minutes):
+    """
+    For every symbol, the first minute at which it has been inside the band for
+    stability_minutes consecutive bars.
+
+    Args:
+        band: minutes x symbols boolean matrix
+        stability_minutes: Required run length
+
+    Returns:
+        (symbols with a stable signal, the minute index of each)
+    """
+    minutes = band.shape[0]
+    if minutes < stability_minutes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Bars inside the band over every trailing window of stability_minutes
+    counts = np.cumsum(band, axis=0, dtype=np.int32)
+    window = counts[stability_minutes - 1:].copy()
+    window[1:] -= counts[:minutes - stability_minutes]
+    stable = window == stability_minutes
+
+    columns = np.flatnonzero(stable.any(axis=0))
+    first = stable[:, columns].argmax(axis=0) + stability_minutes - 1
+    return columns, first
+
+
+class IntradayBacktest:
+    def __init__(self, algo):
+        """
+        Initialize the intraday backtest.
+
+        Parameters:
+        algo (FiveTenAlgo): The strategy; its thresholds, trade sizes and
+            stability_minutes are used and its trade_log and performance_history filled
+        """
+        self.algo = algo
+        self.recent = {}  # Date: MinuteDay, for the last week
+        self.last_prices = algo.last_prices  # Symbol: last known price, for valuing holdings without bars
+
+    def week_ago_prices(self, day):
+        """The week-ago price of every minute and symbol of a day, NaN where there is none."""
+        week_ago_date = (datetime.strptime(day.date, '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
+        reference = self.recent.get(week_ago_date)
+        aligned = np.full(day.prices.shape, np.nan)
+        if reference is None or not len(reference.minutes):
+            return aligned
+
+        rows = np.searchsorted(reference.minutes, day.minutes)
+        clipped = np.minimum(rows, len(reference.minutes) - 1)
+        found_rows = (rows < len(reference.minutes)) & (reference.minutes[clipped] == day.minutes)
+        columns = pd.Index(reference.symbols).get_indexer(day.symbols)
+        found_columns = columns >= 0
+
+        aligned[np.ix_(found_rows, found_columns)] = reference.prices[np.ix_(rows[found_rows], columns[found_columns])]
+        return aligned
+
+    def process_day(self, day):
+        """Detect stable signals in one day of minute bars, trade them in time order and value the day."""
+        algo = self.algo
+        week_ago = self.week_ago_prices(day)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change_pct = (day.prices - week_ago) / week_ago * 100
+        buy_band, sell_band = algo.signal_masks(change_pct, week_ago > 0)
+
+        # Each symbol fires at most once per side per day, at the minute its signal is confirmed
+        buy_columns, buy_minutes = stable_first_minute(buy_band, algo.stability_minutes)
+        sell_columns, sell_minutes = stable_first_minute(sell_band, algo.stability_minutes)
+
+        for minute in np.union1d(buy_minutes, sell_minutes):
+            time = day.minutes[minute]
+            prices = day.prices[minute]
+
+            buy_candidates = [(day.symbols[i], prices[i]) for i in np.sort(buy_columns[buy_minutes == minute])]
+            sell_candidates = [(day.symbols[i], prices[i]) for i in np.sort(sell_columns[sell_minutes == minute])
+                               if day.symbols[i] in algo.portfolio]
+
+            # Randomly sample buy candidates if we have too many (to avoid concentration)
+            if len(buy_candidates) > 10:
+                algo._rng.shuffle(buy_candidates)
+                buy_candidates = buy_candidates[:10]
+
+            for symbol, price in buy_candidates:
+                if algo.capital > algo.initial_capital * algo.trade_size_buy_pct:
+                    if algo.execute_buy(symbol, price, day.date):
+                        algo.trade_log[-1]['time'] = time
+
+            for symbol, price in sell_candidates:
+                if algo.execute_sell(symbol, price, day.date):
+                    algo.trade_log[-1]['time'] = time
+
+        # Close of every symbol: its last minute with a price
+        listed = ~np.isnan(day.prices)
+        has_price = listed.any(axis=0)
+        last_rows = len(day.minutes) - 1 - listed[::-1].argmax(axis=0)
+        closes = day.prices[last_rows, np.arange(len(day.symbols))]
+        self.last_prices.update(zip(day.symbols[has_price], closes[has_price]))
+
+        # Holdings without a price today are valued at their last known price
+        portfolio_value = algo.capital
+        for symbol, details in algo.portfolio.items():
+            price = self.last_prices.get(symbol)
+            if price is not None:
+                portfolio_value += details['shares'] * price
+
+        algo.performance_history.append({
+            'date': day.date,
+            'portfolio_value': portfolio_value,
+            'cash': algo.capital,
+            'total_return': (portfolio_value / algo.initial_capital - 1) * 100
+        })
+
+        # Only the last week is needed for week-ago references
+        self.recent[day.date] = day
+        oldest = (datetime.strptime(day.date, '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
+        for date in [date for date in self.recent if date < oldest]:
+            del self.recent[date]
+
+    def run(self, days, progress=None):
+        """
+        Process trading days in date order.
+
+        Args:
+            days: Iterable of MinuteDay
+            progress: Callable receiving progress messages, or None
+
+        Returns:
+            The algorithm, with its trade_log and performance_history filled in
+        """
+        for count, day in enumerate(days, start=1):
+            self.process_day(day)
+            if progress and count % 20 == 0:
+                progress(f"Processed {count} days through {day.date} ({len(self.algo.trade_log)} trades)")
+        return self.algo
@@ -0,0 +1,229 @@
+"""
+Background jobs for long-running work such as simulation generation.
+
+A JobScheduler runs submitted jobs on a bounded thread pool, in submission
+order. Submitting a job identical to one that is still pending or running
+(same kind and key) returns the existing job instead of queueing the work a
+second time.
+
+Code running inside a job reports how far it is with report_progress(),
+which is also where cancellation takes effect: a pending job is dropped from
+the queue immediately, a running one stops with JobCancelled at its next
+progress report. Outside a job report_progress() does nothing, so the same
+code runs unchanged from the CLI.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# Finished jobs kept for the progress API
+JOB_HISTORY = 100
+
+_local = threading.local()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by report_progress() once the job has been cancelled."""
+
+
+class JobPending(Exception):
+    """Raised when a result is being produced by a job that has not finished yet."""
+
+    def __init__(self, job):
+        super().__init__(f"{job.description} is {job.status}")
+        self.job = job
+
+
+class Job:
+    def __init__(self, kind, key, description):
+        """
+        Initialize a job record.
+
+        Parameters:
+        kind (str): Type of work, e.g. 'generate_simulations'
+        key (hashable): Identifies the work within its kind; identical jobs share it
+        description (str): Human-readable summary
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.description = description
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._future = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def active(self):
+        """True while the job is pending or running."""
+        return self.status in (PENDING, RUNNING)
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'description': self.description,
+            'status': self.status,
+            'progress': round(self.progress, 4),
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed': ((self.finished_at or time.time()) - self.started_at) if self.started_at else None
+        }
+
+
+class JobScheduler:
+    def __init__(self, workers=1, history=JOB_HISTORY):
+        """
+        Initialize the scheduler.
+
+        Parameters:
+        workers (int): Jobs running at once; the others wait in the queue
+        history (int): Finished jobs kept for listing
+        """
+        self.workers = workers
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fiveten-job')
+        self._jobs = OrderedDict()  # Job id: Job, oldest first
+        self._lock = threading.Lock()
+
+    def submit(self, kind, key, target, *args, description=None, **kwargs):
+        """
+        Queue target(*args, **kwargs) as a job, unless an identical job is still active.
+
+        Returns:
+            The new job, or the pending or running job with the same kind and key
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active and job.kind == kind and job.key == key:
+                    return job
+
+            job = Job(kind, key, description or kind)
+            self._jobs[job.id] = job
+            self._prune()
+            job._future = self._executor.submit(self._run, job, target, args, kwargs)
+        logger.info("Queued job %s: %s", job.id, job.description)
+        return job
+
+    def _run(self, job, target, args, kwargs):
+        with self._lock:
+            if job.status != PENDING:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+
+        _local.job = job
+        try:
+            target(*args, **kwargs)
+            status = DONE
+            job.progress = 1.0
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.description)
+            job.error = str(e)
+            status = FAILED
+        finally:
+            _local.job = None
+
+        self._finish(job, status)
+        logger.info("Job %s %s after %.1fs: %s", job.id, status, job.finished_at - job.started_at, job.description)
+
+    def _finish(self, job, status):
+        with self._lock:
+            job.status = status
+            job.finished_at = time.time()
+        job._done.set()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history size."""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: a pending one is dropped at once, a running one stops at its next progress report.
+
+        Returns:
+            True if the job was still active, False if it had finished or is unknown
+        """
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return False
+        job._cancel.set()
+        if job._future.cancel():
+            self._finish(job, CANCELLED)
+        return True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, kind=None, active_only=False):
+        """The known jobs, oldest first."""
+        with self._lock:
+            return [job for job in self._jobs.values()
+                    if (kind is None or job.kind == kind) and (job.active or not active_only)]
+
+    def shutdown(self, wait=False):
+        """Drop the pending jobs and stop the pool."""
+        for job in self.jobs(active_only=True):
+            self.cancel(job.id)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def current_job():
+    """The job running in this thread, or None."""
+    return getattr(_local, 'job', None)
+
+
+def report_progress(message=None, fraction=None):
+    """
+    Report the progress of the job running in this thread, if any.
+
+    Args:
+        message: What the job is doing now
+        fraction: Share of the work done, from 0 to 1
+
+    Raises:
+        JobCancelled: The job has been cancelled
+    """
+    job = current_job()
+    if job is None:
+        return
+    if message is not None:
+        job.message = message
+    if fraction is not None:
+        job.progress = min(max(fraction, 0.0), 1.0)
+    if job.cancel_requested:
+        raise JobCancelled(job.id)
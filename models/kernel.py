@@ -0,0 +1,130 @@
+"""
+Compiled execution kernel for the simulation engine.
+
+Signal detection is vectorized over the whole price matrix, but executing the
+signals is inherently sequential: whether a buy goes through depends on the
+capital left by every earlier trade. This module runs that loop over flat
+arrays (holdings indexed by symbol column, trades written to preallocated
+buffers) so Numba can compile it in nopython mode.
+
+Numba is optional. Without it `NUMBA_AVAILABLE` is False and the engine keeps
+using its pure-Python bar loop, which produces identical trade logs.
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the function as plain Python."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
+
+from models.profiling import phase
+
+# Trade sides in the trade buffers
+BUY = 0
+SELL = 1
+
+
+@phase('trade_execution')
+@njit(cache=True)
+def execute_bars(prices, buy_ptr, buy_idx, sell_ptr, sell_idx, capital, buy_size, sell_size,
+                 shares, cost_basis, held, order, held_count,
+                 trade_bar, trade_column, trade_side, trade_shares, trade_value, trade_profit_loss,
+                 cash):
+    """
+    Execute buy and sell candidates bar by bar.
+
+    Mirrors FiveTenAlgo.execute_buy/execute_sell operation for operation, so
+    trades match the Python engine exactly. Holdings are valued afterwards
+    from the trades, outside the kernel.
+
+    Args:
+        prices: bars x symbols prices (NaN where missing)
+        buy_ptr, buy_idx: Buy candidate columns of bar i at buy_idx[buy_ptr[i]:buy_ptr[i + 1]]
+        sell_ptr, sell_idx: Sell candidate columns, laid out the same way
+        capital: Cash at the start of the first bar
+        buy_size: Dollar amount of every buy
+        sell_size: Dollar amount of every sell
+        shares, cost_basis: Holdings per column, updated in place
+        held: Whether each column is in the portfolio, updated in place
+        order: Held columns in the order they entered the portfolio, updated in place
+        held_count: Number of valid entries in order
+        trade_*: Trade buffers, sized for every candidate
+        cash: Per-bar cash, filled in
+
+    Returns:
+        (capital, held_count, trade_count)
+    """
+    bars = prices.shape[0]
+    trade_count = 0
+
+    for bar in range(bars):
+        # Buys go through while the remaining cash exceeds a trade
+        for k in range(buy_ptr[bar], buy_ptr[bar + 1]):
+            if not capital > buy_size:
+                continue
+            column = buy_idx[k]
+            price = prices[bar, column]
+            quantity = buy_size / price
+
+            if held[column]:
+                shares[column] = shares[column] + quantity
+                cost_basis[column] = cost_basis[column] + buy_size
+            else:
+                shares[column] = quantity
+                cost_basis[column] = buy_size
+                held[column] = True
+                order[held_count] = column
+                held_count += 1
+            capital -= buy_size
+
+            trade_bar[trade_count] = bar
+            trade_column[trade_count] = column
+            trade_side[trade_count] = BUY
+            trade_shares[trade_count] = quantity
+            trade_value[trade_count] = buy_size
+            trade_profit_loss[trade_count] = 0.0
+            trade_count += 1
+
+        # Sells of held positions
+        for k in range(sell_ptr[bar], sell_ptr[bar + 1]):
+            column = sell_idx[k]
+            if not held[column] or shares[column] <= 0:
+                continue
+            price = prices[bar, column]
+            quantity = min(sell_size / price, shares[column])
+            sell_value = quantity * price
+            shares[column] -= quantity
+
+            if shares[column] <= 0:
+                profit_loss = sell_value - cost_basis[column]
+                held[column] = False
+                # Close the gap in the entry order
+                position = 0
+                while order[position] != column:
+                    position += 1
+                for j in range(position, held_count - 1):
+                    order[j] = order[j + 1]
+                held_count -= 1
+            else:
+                sell_ratio = quantity / (shares[column] + quantity)
+                cost_basis_portion = cost_basis[column] * sell_ratio
+                cost_basis[column] -= cost_basis_portion
+                profit_loss = sell_value - cost_basis_portion
+            capital += sell_value
+
+            trade_bar[trade_count] = bar
+            trade_column[trade_count] = column
+            trade_side[trade_count] = SELL
+            trade_shares[trade_count] = quantity
+            trade_value[trade_count] = sell_value
+            trade_profit_loss[trade_count] = profit_loss
+            trade_count += 1
+
+        cash[bar] = capital
+
+    return capital, held_count, trade_count
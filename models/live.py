@@ -0,0 +1,443 @@
+"""
+Paper-trading daemon.
+
+A long-running asyncio process pulls quote bars from a pluggable source, runs
+them through the FiveTenAlgo engine one bar at a time and persists what each
+bar adds. The web app reads the persisted state instead of simulating on
+every request, so every client sees the same live state and request latency
+does not depend on simulation work.
+
+State lives in data/live/<mode>/:
+- base.json: The simulation the daemon started from (a copy of the precomputed artifact)
+- trades.jsonl, history.jsonl, benchmarks.jsonl: Entries appended after the base, one per line
+- state.json: Capital, holdings, the last week of prices and the line counts
+  of the logs, rewritten atomically after every bar
+
+Lines past the counts in state.json (from a bar interrupted mid-write) are
+ignored by readers and dropped when the daemon resumes.
+
+A quote bar is a JSON object with a date and a price per symbol:
+    {"date": "2025-03-09", "prices": {"AAPL": 241.8, "MSFT": 398.2}}
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from models.algorithm import FiveTenAlgo
+from models.price_matrix import PriceMatrix
+
+logger = logging.getLogger(__name__)
+
+LOGS = ('trades', 'history', 'benchmarks')
+
+
+def parse_bar(line):
+    """Parse one quote bar; raises ValueError if it is malformed."""
+    try:
+        bar = json.loads(line)
+        date = datetime.strptime(bar['date'], '%Y-%m-%d').strftime('%Y-%m-%d')
+        prices = {str(symbol): float(price) for symbol, price in bar['prices'].items()}
+    except (TypeError, KeyError, AttributeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed quote bar: {e}")
+    return date, prices
+
+
+class SyntheticQuoteSource:
+    def __init__(self, last_prices, last_date, freq='W', interval=5.0, seed=None,
+                 volatility=0.05, trend=0.001):
+        """
+        Random-walk quotes continuing from the last known prices.
+
+        Bars are produced on the bar calendar up to today, `interval` seconds
+        apart, then one per new calendar date as it arrives.
+
+        Parameters:
+        last_prices (dict): Symbol: last known price
+        last_date (str): Date of the last processed bar (YYYY-MM-DD)
+        freq (str): 'W' (weekly) or 'B' (business days)
+        interval (float): Seconds between bars
+        seed (int): Seed for the random walk
+        volatility, trend (float): Weekly return volatility and drift
+        """
+        self.prices = dict(last_prices)
+        self.last_date = pd.Timestamp(last_date)
+        self.offset = pd.offsets.Week(weekday=self.last_date.weekday()) if freq == 'W' else pd.offsets.BDay()
+        bars_per_week = 1 if freq == 'W' else 5
+        self.volatility = volatility / np.sqrt(bars_per_week)
+        self.trend = trend / bars_per_week
+        self.interval = interval
+        self.rng = np.random.default_rng(seed)
+
+    async def bars(self):
+        while True:
+            next_date = self.last_date + self.offset
+            if next_date > pd.Timestamp(datetime.now().date()):
+                await asyncio.sleep(self.interval)
+                continue
+
+            symbols = list(self.prices)
+            returns = self.rng.normal(self.trend, self.volatility, size=len(symbols))
+            for symbol, change in zip(symbols, returns):
+                self.prices[symbol] = max(1.0, self.prices[symbol] * (1 + change))
+            self.last_date = next_date
+            yield next_date.strftime('%Y-%m-%d'), dict(self.prices)
+            await asyncio.sleep(self.interval)
+
+
+class FileQuoteSource:
+    def __init__(self, path, poll_interval=1.0, follow=True):
+        """
+        Quote bars read from a JSON-lines file, following it as lines are appended.
+
+        Parameters:
+        path (str): File with one quote bar per line
+        poll_interval (float): Seconds between checks for new lines
+        follow (bool): Keep waiting for new lines; if False, stop at the end of the file
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.follow = follow
+
+    async def bars(self):
+        position = 0
+        partial = ''
+        while True:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    f.seek(position)
+                    chunk = f.read()
+                    position = f.tell()
+                lines = (partial + chunk).split('\n')
+                partial = lines.pop()  # Incomplete until its newline is written
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield parse_bar(line)
+                    except ValueError as e:
+                        logger.warning("Skipping quote line in %s: %s", self.path, e)
+            if not self.follow:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+
+class SocketQuoteSource:
+    def __init__(self, host='127.0.0.1', port=8765):
+        """
+        Quote bars pushed over TCP by any number of feeders, one JSON bar per line.
+
+        Parameters:
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        """
+        self.host = host
+        self.port = port
+        self.queue = asyncio.Queue()
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    await self.queue.put(parse_bar(line.decode()))
+                except ValueError as e:
+                    logger.warning("Skipping quote line from %s: %s", peer, e)
+        finally:
+            writer.close()
+
+    async def bars(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info("Listening for quote bars on %s:%s", self.host, self.port)
+        async with server:
+            while True:
+                yield await self.queue.get()
+
+
+class LiveStore:
+    def __init__(self, data_dir, mode):
+        """
+        Initialize the live state store of a simulation mode.
+
+        Parameters:
+        data_dir (str): Data directory (the store is data_dir/live/<mode>)
+        mode (str): Simulation mode
+        """
+        self.directory = os.path.join(data_dir, 'live', mode)
+        self.state_file = os.path.join(self.directory, 'state.json')
+        self.base_file = os.path.join(self.directory, 'base.json')
+
+    def log_file(self, name):
+        return os.path.join(self.directory, f"{name}.jsonl")
+
+    def exists(self):
+        return os.path.exists(self.state_file)
+
+    def version(self):
+        """Version stamp that changes after every persisted bar; None without live state."""
+        try:
+            return os.stat(self.state_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def load_state(self):
+        with open(self.state_file, 'r') as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        """Write the state atomically; it commits the log lines appended before it."""
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.state_file)
+
+    def read_log(self, name, count):
+        """The first count entries of a log."""
+        entries = []
+        if count and os.path.exists(self.log_file(name)):
+            with open(self.log_file(name), 'r') as f:
+                for line in f:
+                    if len(entries) == count:
+                        break
+                    entries.append(json.loads(line))
+        return entries
+
+    def append_log(self, name, entries):
+        if entries:
+            with open(self.log_file(name), 'a') as f:
+                f.writelines(json.dumps(entry) + '\n' for entry in entries)
+
+    def truncate_logs(self, counts):
+        """Drop log lines not committed by the state (from an interrupted bar)."""
+        for name in LOGS:
+            entries = self.read_log(name, counts[name])
+            with open(self.log_file(name), 'w') as f:
+                f.writelines(json.dumps(entry) + '\n' for entry in entries)
+
+    def create(self, base_data, state):
+        """Start a new live state from a base simulation."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.base_file, 'w') as f:
+            json.dump(base_data, f)
+        for name in LOGS:
+            open(self.log_file(name), 'w').close()
+        self.save_state(state)
+
+    def load(self):
+        """
+        The live simulation: the base with every committed entry appended, and
+        the current capital and holdings.
+        """
+        state = self.load_state()
+        with open(self.base_file, 'r') as f:
+            data = json.load(f)
+        data['trade_log'] = data.get('trade_log', []) + self.read_log('trades', state['counts']['trades'])
+        data['performance_history'] = (data.get('performance_history', []) +
+                                       self.read_log('history', state['counts']['history']))
+        data['benchmark_history'] = (data.get('benchmark_history', []) +
+                                     self.read_log('benchmarks', state['counts']['benchmarks']))
+        data['capital'] = state['capital']
+        data['portfolio'] = state['portfolio']
+        data['last_prices'] = state['last_prices']
+        data['initial_capital'] = state['initial_capital']
+        return data
+
+
+class LiveEngine:
+    def __init__(self, algo, symbols, store, state):
+        """
+        Advance a simulation one quote bar at a time.
+
+        Parameters:
+        algo (FiveTenAlgo): Strategy holding the current capital and portfolio;
+            only the last history entries are kept in memory
+        symbols (list): Universe of symbols traded; quotes for other symbols are ignored
+        store (LiveStore): Where each bar is persisted
+        state (dict): The committed state (last_date, window, counts)
+        """
+        self.algo = algo
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.columns = {symbol: i for i, symbol in enumerate(symbols)}
+        self.store = store
+        self.last_date = state['last_date']
+        self.counts = dict(state['counts'])
+
+        # Prices of the last week's bars, for the week-ago reference
+        self.window = {date: np.array([np.nan if price is None else price for price in prices])
+                       for date, prices in state['window'].items()}
+
+        # Columns for valuation, and benchmarks continuing from their last values
+        algo.start_scan(PriceMatrix([], self.symbols, np.empty((0, len(self.symbols)))))
+
+    def state(self):
+        return {
+            'symbols': list(self.symbols),
+            'last_date': self.last_date,
+            'capital': self.algo.capital,
+            'portfolio': self.algo.portfolio,
+            'last_prices': self.algo.last_prices,
+            'initial_capital': self.algo.initial_capital,
+            'window': {date: [None if np.isnan(price) else float(price) for price in prices]
+                       for date, prices in self.window.items()},
+            'counts': self.counts
+        }
+
+    def process_bar(self, date, quotes):
+        """
+        Trade one bar of quotes and persist what it added.
+
+        Returns:
+            Number of trades made, or None if the bar was not after the last one
+        """
+        if date <= self.last_date:
+            logger.warning("Ignoring quote bar for %s, not after %s", date, self.last_date)
+            return None
+
+        prices = np.full(len(self.symbols), np.nan)
+        for symbol, price in quotes.items():
+            column = self.columns.get(symbol)
+            if column is not None and price > 0:
+                prices[column] = price
+
+        matrix = PriceMatrix([date], self.symbols, prices[np.newaxis, :])
+        masks = None
+        week_ago_date = (datetime.strptime(date, '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
+        week_ago_prices = self.window.get(week_ago_date)
+        if week_ago_prices is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                change_pct = (prices - week_ago_prices) / week_ago_prices * 100
+            masks = self.algo.signal_masks(change_pct, week_ago_prices > 0)
+
+        algo = self.algo
+        trades_before = len(algo.trade_log)
+        algo.process_bar(matrix, 0, masks)
+        algo.finish_scan()
+        trades = algo.trade_log[trades_before:]
+
+        # Keep a week of prices and only the entries later bars build on
+        self.window[date] = prices
+        for old_date in [d for d in self.window if d <= week_ago_date]:
+            del self.window[old_date]
+        self.last_date = date
+
+        # Append the new entries, then commit them with the state
+        self.store.append_log('trades', trades)
+        self.store.append_log('history', algo.performance_history[-1:])
+        self.store.append_log('benchmarks', algo.benchmark_history[-1:])
+        self.counts['trades'] += len(trades)
+        self.counts['history'] += 1
+        self.counts['benchmarks'] += 1
+        self.store.save_state(self.state())
+
+        del algo.trade_log[:]
+        del algo.performance_history[:-1]
+        del algo.benchmark_history[:-1]
+        return len(trades)
+
+    async def run(self, source, stop, on_bar=None):
+        """
+        Process bars from a source until it ends or stop is set.
+
+        Args:
+            source: Quote source
+            stop: asyncio.Event that ends the run
+            on_bar: Callable(date, trades, portfolio value) called after every committed bar, or None
+        """
+        async def consume():
+            async for date, quotes in source.bars():
+                traded = self.process_bar(date, quotes)
+                if traded is not None:
+                    value = self.algo.performance_history[-1]['portfolio_value']
+                    logger.debug("%s: %s trades, portfolio value %.2f", date, traded, value)
+                    if on_bar:
+                        on_bar(date, traded, value)
+
+        consumer = asyncio.ensure_future(consume())
+        stopper = asyncio.ensure_future(stop.wait())
+        await asyncio.wait([consumer, stopper], return_when=asyncio.FIRST_COMPLETED)
+        for task in (consumer, stopper):
+            task.cancel()
+        if consumer.done() and not consumer.cancelled() and consumer.exception():
+            raise consumer.exception()
+
+
+def start_engine(data_processor, mode='default'):
+    """
+    Resume the live state of a mode, or start it from the precomputed simulation.
+
+    Returns:
+        A LiveEngine ready for new bars
+    """
+    params = data_processor.simulation_params[mode]
+    store = LiveStore(data_processor.data_dir, mode)
+
+    if store.exists():
+        state = store.load_state()
+        store.truncate_logs(state['counts'])
+        last_entries = {name: store.read_log(name, state['counts'][name])[-1:] for name in ('history', 'benchmarks')}
+        logger.info("Resuming live %s simulation after %s", mode, state['last_date'])
+    else:
+        base = data_processor.load_simulation_artifact(mode, 'all')
+        if not base.get('performance_history'):
+            raise ValueError(f"No precomputed {mode} simulation to start from")
+        last_date = base['performance_history'][-1]['date']
+
+        # The universe is the market data's; the week before the last bar seeds the references
+        matrix = PriceMatrix.from_frame(data_processor.load_market_data())
+        week_ago = (datetime.strptime(last_date, '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
+        recent = matrix.slice(week_ago, (datetime.strptime(last_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d'))
+        state = {
+            'symbols': list(matrix.symbols),
+            'last_date': last_date,
+            'capital': base['capital'],
+            'portfolio': base['portfolio'],
+            'last_prices': base.get('last_prices', {}),
+            'initial_capital': base.get('initial_capital', params['initial_capital']),
+            'window': {date: [None if np.isnan(price) else float(price) for price in row]
+                       for date, row in zip(recent.dates, recent.prices) if date > week_ago},
+            'counts': {name: 0 for name in LOGS}
+        }
+        store.create(base, state)
+        last_entries = {'history': base['performance_history'][-1:],
+                        'benchmarks': base.get('benchmark_history', [])[-1:]}
+        logger.info("Started live %s simulation from the precomputed data after %s", mode, last_date)
+
+    algo = FiveTenAlgo(
+        initial_capital=state['initial_capital'],
+        buy_threshold=params['buy_threshold'],
+        sell_threshold=params['sell_threshold'],
+        trade_size_buy_pct=params['trade_size_buy_pct'],
+        trade_size_sell_pct=params['trade_size_sell_pct']
+    )
+    algo.capital = state['capital']
+    algo.portfolio = state['portfolio']
+    algo.last_prices = state['last_prices']
+    algo.performance_history = last_entries['history']
+    algo.benchmark_history = last_entries['benchmarks']
+    return LiveEngine(algo, state['symbols'], store, state)
+
+
+def run_live(engine, source, on_bar=None):
+    """Run the daemon until the source ends or SIGINT/SIGTERM; on_bar is passed to LiveEngine.run."""
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on this platform; Ctrl+C still interrupts
+        await engine.run(source, stop, on_bar)
+
+    asyncio.run(main())
+    logger.info("Live simulation stopped after %s", engine.last_date)
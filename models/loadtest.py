@@ -0,0 +1,209 @@
+"""
+Load testing of the dashboard API.
+
+The traffic is what the dashboard sends: each virtual user picks a view (a
+simulation mode, period and timeline) and requests the five panels of that
+view, with the same query strings the page uses. Users run on a thread pool
+of the requested concurrency against either the Flask app in-process, through
+its test client, or a server at a URL.
+
+Every request's latency and outcome is recorded per route. An error is a
+response with a 4xx/5xx status or a request that raised (refused connection,
+timeout...). 202 responses, sent while a simulation is still being generated,
+are counted as pending.
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def panel_requests(mode, period, timeline):
+    """The (route, query string) of each dashboard panel for one view."""
+    # Like the dashboard, a fixed-period view shows the whole period
+    if period != 'all':
+        timeline = 'all'
+    view = f"mode={mode}&period={period}"
+    return [
+        ('/api/performance_history', f"{view}&timeline={timeline}&benchmark=1"),
+        ('/api/trade_log', f"{view}&timeline={timeline}&limit=20"),
+        ('/api/portfolio', view),
+        ('/api/metrics', f"{view}&timeline={timeline}"),
+        ('/api/distribution', f"{view}&timeline={timeline}")
+    ]
+
+
+class ClientTransport:
+    """Requests through a Flask test client, without a server."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self._local = threading.local()
+
+    def get(self, path):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.flask_app.test_client()
+        response = client.get(path)
+        response.get_data()
+        return response.status_code
+
+
+class HTTPTransport:
+    """Requests to a running server."""
+
+    def __init__(self, base_url, timeout=30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class LoadTestResult:
+    def __init__(self):
+        self.samples = {}  # Route: [(seconds, status or None if the request raised)]
+        self.errors = {}  # Error message: count
+        self.wall_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, status, error=None):
+        with self._lock:
+            self.samples.setdefault(route, []).append((seconds, status))
+            if error is not None:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    @property
+    def requests(self):
+        return sum(len(samples) for samples in self.samples.values())
+
+    def summary(self):
+        """Dict of route (and 'all'): requests, errors, error_rate, pending and latency percentiles in ms."""
+        routes = dict(sorted(self.samples.items()))
+        routes['all'] = [sample for samples in self.samples.values() for sample in samples]
+
+        summary = {}
+        for route, samples in routes.items():
+            if not samples:
+                continue
+            latencies = np.array([seconds for seconds, _ in samples]) * 1000
+            errors = sum(1 for _, status in samples if status is None or status >= 400)
+            summary[route] = {
+                'requests': len(samples),
+                'errors': errors,
+                'error_rate': errors / len(samples),
+                'pending': sum(1 for _, status in samples if status == 202),
+                'mean_ms': float(latencies.mean()),
+                **{f"p{q}_ms": float(np.percentile(latencies, q)) for q in PERCENTILES},
+                'max_ms': float(latencies.max())
+            }
+        return summary
+
+    def throughput(self):
+        """Requests per second over the whole run."""
+        return self.requests / self.wall_seconds if self.wall_seconds else 0.0
+
+    def report(self):
+        """The results as printable lines."""
+        lines = [f"{'Route':<28}{'Requests':>9}{'Errors':>8}" +
+                 ''.join(f"{f'p{q} ms':>10}" for q in PERCENTILES) + f"{'max ms':>10}"]
+        for route, stats in self.summary().items():
+            lines.append(f"{route:<28}{stats['requests']:>9}{stats['error_rate']:>8.1%}" +
+                         ''.join(f"{stats[f'p{q}_ms']:>10.1f}" for q in PERCENTILES) +
+                         f"{stats['max_ms']:>10.1f}")
+        lines.append(f"{self.requests} requests in {self.wall_seconds:.2f}s: {self.throughput():.1f} requests/s")
+        pending = self.summary().get('all', {}).get('pending')
+        if pending:
+            lines.append(f"{pending} requests were answered 'pending' while simulations were being generated")
+        for error, count in sorted(self.errors.items(), key=lambda item: -item[1]):
+            lines.append(f"  {count} x {error}")
+        return lines
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'wall_seconds': self.wall_seconds,
+            'throughput': self.throughput(),
+            'routes': self.summary(),
+            'errors': self.errors
+        }
+
+
+def run_load_test(transport, modes, periods, timelines, views=100, duration=None, concurrency=8,
+                  seed=None, progress=None):
+    """
+    Drive dashboard traffic through a transport.
+
+    Args:
+        transport: ClientTransport or HTTPTransport
+        modes, periods, timelines: Values the views are drawn from
+        views: Number of dashboard views to load (five requests each)
+        duration: Run for this many seconds instead of a number of views
+        concurrency: Number of concurrent virtual users
+        seed: Seed for the choice of views
+        progress: Callback(requests done), called every 100 requests
+
+    Returns:
+        LoadTestResult
+    """
+    rng = random.Random(seed)
+    result = LoadTestResult()
+    lock = threading.Lock()
+    remaining = [None if duration else views]
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    def next_view():
+        """The next view to load, or None when the run is over."""
+        with lock:
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return None
+            elif remaining[0] <= 0:
+                return None
+            else:
+                remaining[0] -= 1
+            return rng.choice(modes), rng.choice(periods), rng.choice(timelines)
+
+    def user():
+        while True:
+            view = next_view()
+            if view is None:
+                return
+            for route, query in panel_requests(*view):
+                request_start = time.perf_counter()
+                try:
+                    status, error = transport.get(f"{route}?{query}"), None
+                    if status >= 400:
+                        error = f"HTTP {status}"
+                except Exception as e:
+                    status, error = None, f"{type(e).__name__}: {e}"
+                result.record(route, time.perf_counter() - request_start, status, error)
+                if progress and result.requests % 100 == 0:
+                    progress(result.requests)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(user) for _ in range(concurrency)]
+        for future in futures:
+            future.result()
+
+    result.wall_seconds = time.perf_counter() - start
+    return result
+
+
+def save_result(result, filename):
+    """Write the summary as JSON, e.g. to compare runs before and after a change."""
+    with open(filename, 'w') as f:
+        json.dump(result.to_dict(), f, indent=2)
@@ -0,0 +1,129 @@
+"""
+Logging for the app, the CLI and the models.
+
+Modules log through `logging.getLogger(__name__)`. configure_logging() routes
+every record through a QueueHandler: the calling thread only puts the record
+on a bounded in-memory queue and a QueueListener thread does the formatting
+and the writing, so a slow terminal or a burst of messages never blocks a
+request. When the queue is full, records are dropped and counted rather than
+waited for.
+
+Repeated messages (the same logger and format string, whatever the values)
+are rate-limited before they are queued: a few get through per interval and
+the next one to get through reports how many were suppressed.
+
+The level comes from configure_logging's argument, else the FIVETEN_LOG_LEVEL
+environment variable, else INFO. Per-request detail is logged at DEBUG.
+"""
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Records waiting for the listener before new ones are dropped
+QUEUE_SIZE = 10000
+
+# Each message template may be logged this many times per interval
+RATE_LIMIT_BURST = 5
+RATE_LIMIT_INTERVAL = 60.0  # seconds
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, burst=RATE_LIMIT_BURST, interval=RATE_LIMIT_INTERVAL):
+        """
+        Initialize the filter.
+
+        Parameters:
+        burst (int): Records let through per message template and interval
+        interval (float): Length of an interval in seconds
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}  # (logger, template): [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking."""
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level=None, stream=None):
+    """
+    Send all logging through the non-blocking queue.
+
+    Safe to call more than once; later calls only change the level.
+
+    Args:
+        level: Level name or number (defaults to FIVETEN_LOG_LEVEL, else INFO)
+        stream: Where the listener writes (defaults to stderr)
+    """
+    global _listener
+    level = level or os.environ.get('FIVETEN_LOG_LEVEL', 'INFO')
+    if isinstance(level, str):
+        level = level.upper()
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return
+
+    record_queue = queue.Queue(QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(record_queue)
+    queue_handler.addFilter(RateLimitFilter())
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter(DEFAULT_FORMAT))
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(record_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out the queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
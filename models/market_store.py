@@ -0,0 +1,318 @@
+"""
+On-disk market data for universes too large to hold in memory.
+
+Prices are stored as one compressed NumPy partition per calendar year
+(<year>.npz with the bar dates and a bars x symbols price array), against a
+symbol universe kept in symbols.json. The universe only ever grows: new
+symbols get new columns, and partitions written before they existed are
+padded with NaN when read.
+
+run_chunked_simulations scans a store one partition at a time. Each chunk is
+prefixed with the last week of bars of the previous one, so week-ago lookups
+work across the boundary, and simulations carry their holdings, last prices
+and benchmarks from chunk to chunk. With a SimulationLog per simulation the
+trades and histories of every chunk are appended to disk and dropped from
+memory, so peak memory follows the size of one year of bars, not the length
+of the history.
+"""
+import json
+import os
+
+import numpy as np
+
+from models.algorithm import run_forked_simulations
+from models.price_matrix import PriceMatrix
+from models.profiling import phase
+from models.synthetic import generate_market
+
+
+class MarketStore:
+    def __init__(self, directory):
+        """
+        Initialize the store.
+
+        Parameters:
+        directory (str): Directory holding the partitions and symbols.json
+        """
+        self.directory = directory
+        self.symbols_file = os.path.join(directory, 'symbols.json')
+        self.symbols = np.asarray(self._load_symbols(), dtype=object)
+
+    def _load_symbols(self):
+        if not os.path.exists(self.symbols_file):
+            return []
+        with open(self.symbols_file, 'r') as f:
+            return json.load(f)
+
+    def exists(self):
+        """Whether the store has any partitions."""
+        return bool(self.partitions())
+
+    def partitions(self):
+        """Years with a partition, in order."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory)
+                      if name.endswith('.npz') and name[:-4].isdigit())
+
+    def partition_file(self, year):
+        return os.path.join(self.directory, f"{year}.npz")
+
+    def add_symbols(self, symbols):
+        """
+        Add symbols to the universe.
+
+        Returns:
+            The column of every given symbol
+        """
+        columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in columns]
+        if new:
+            self.symbols = np.concatenate([self.symbols, np.asarray(new, dtype=object)])
+            columns.update((symbol, i) for i, symbol in enumerate(self.symbols) if symbol in new)
+            os.makedirs(self.directory, exist_ok=True)
+            temp_file = self.symbols_file + '.tmp'
+            with open(temp_file, 'w') as f:
+                json.dump(self.symbols.tolist(), f)
+            os.replace(temp_file, self.symbols_file)
+        return np.array([columns[symbol] for symbol in symbols], dtype=np.int64)
+
+    @phase('load_market_data')
+    def read_partition(self, year):
+        """Read one year as a PriceMatrix over the whole universe."""
+        with np.load(self.partition_file(year), allow_pickle=False) as partition:
+            dates = partition['dates'].astype(object)
+            stored = partition['prices']
+
+        prices = np.full((len(dates), len(self.symbols)), np.nan)
+        prices[:, :stored.shape[1]] = stored
+        return PriceMatrix(dates, self.symbols, prices)
+
+    def write(self, matrix):
+        """
+        Merge a PriceMatrix into the store, one partition per year it covers.
+
+        Dates already in a partition are kept; where both have a price for the
+        same date and symbol, the new one wins.
+        """
+        if not len(matrix):
+            return
+        columns = self.add_symbols(list(matrix.symbols))
+        years = np.array([date[:4] for date in matrix.dates], dtype=object)
+
+        for year in dict.fromkeys(years):
+            rows = np.flatnonzero(years == year)
+            dates = matrix.dates[rows]
+            prices = np.full((len(rows), len(self.symbols)), np.nan)
+            prices[:, columns] = matrix.prices[rows]
+
+            if os.path.exists(self.partition_file(year)):
+                existing = self.read_partition(year)
+                merged_dates = np.union1d(existing.dates.astype(str), dates.astype(str)).astype(object)
+                merged = np.full((len(merged_dates), len(self.symbols)), np.nan)
+                merged[np.searchsorted(merged_dates, existing.dates)] = existing.prices
+                target = merged[np.searchsorted(merged_dates, dates)]
+                merged[np.searchsorted(merged_dates, dates)] = np.where(np.isnan(prices), target, prices)
+                dates, prices = merged_dates, merged
+
+            self._write_partition(year, dates, prices)
+
+    def _write_partition(self, year, dates, prices):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_file = self.partition_file(year) + '.tmp'
+        with open(temp_file, 'wb') as f:
+            np.savez_compressed(f, dates=np.asarray(dates, dtype=str), prices=prices)
+        os.replace(temp_file, self.partition_file(year))
+
+    def iter_chunks(self, start_date=None, end_date=None):
+        """
+        Read the store one partition at a time.
+
+        Yields:
+            PriceMatrix of every year with bars in start_date <= date < end_date
+        """
+        for year in self.partitions():
+            if start_date is not None and f"{year}-12-31" < start_date:
+                continue
+            if end_date is not None and f"{year}-01-01" >= end_date:
+                break
+            chunk = self.read_partition(year).slice(start_date, end_date)
+            if len(chunk):
+                yield chunk
+
+    def date_range(self):
+        """(first date, last date) in the store, or None if it is empty."""
+        years = self.partitions()
+        if not years:
+            return None
+        with np.load(self.partition_file(years[0]), allow_pickle=False) as first:
+            first_date = str(first['dates'][0])
+        with np.load(self.partition_file(years[-1]), allow_pickle=False) as last:
+            last_date = str(last['dates'][-1])
+        return first_date, last_date
+
+
+def build_synthetic_store(store, symbols, start_date, end_date, freq='W', seed=None, progress=None):
+    """
+    Generate a synthetic market straight into a store, one year at a time.
+
+    Each year continues from the previous year's last prices, so only one year
+    of bars is in memory at once.
+
+    Returns:
+        Number of bars written
+    """
+    rng = np.random.default_rng(seed)
+    last_prices = None
+    bars = 0
+    for year in range(int(start_date[:4]), int(end_date[:4]) + 1):
+        market = generate_market(symbols, max(start_date, f"{year}-01-01"), min(end_date, f"{year}-12-31"),
+                                 freq=freq, rng=rng, last_prices=last_prices)
+        if not len(market):
+            continue
+        store.write(market)
+        last_prices = dict(zip(market.symbols, market.prices[-1]))
+        bars += len(market)
+        if progress:
+            progress(f"Wrote {year}: {len(market)} bars of {len(symbols)} symbols")
+    return bars
+
+
+class SimulationLog:
+    def __init__(self, directory):
+        """
+        Initialize an append-only log of one simulation.
+
+        Parameters:
+        directory (str): Directory for trades.jsonl, history.jsonl,
+            benchmarks.jsonl and state.json; existing logs are discarded
+        """
+        self.directory = directory
+        self.trades_file = os.path.join(directory, 'trades.jsonl')
+        self.history_file = os.path.join(directory, 'history.jsonl')
+        self.benchmarks_file = os.path.join(directory, 'benchmarks.jsonl')
+        self.state_file = os.path.join(directory, 'state.json')
+
+        os.makedirs(directory, exist_ok=True)
+        for path in (self.trades_file, self.history_file, self.benchmarks_file, self.state_file):
+            if os.path.exists(path):
+                os.remove(path)
+        self._written_history = 0  # Entries at the start of the in-memory histories already on disk
+
+    @phase('save_simulation')
+    def flush(self, algo):
+        """
+        Append the simulation's new trades and history entries to disk and drop
+        them from memory. The latest history entries stay, since the next chunk
+        continues from them.
+        """
+        skip = self._written_history
+        self._append(self.trades_file, algo.trade_log)
+        self._append(self.history_file, algo.performance_history[skip:])
+        self._append(self.benchmarks_file, algo.benchmark_history[skip:])
+
+        del algo.trade_log[:]
+        del algo.performance_history[:-1]
+        del algo.benchmark_history[:-1]
+        self._written_history = len(algo.performance_history)
+
+        state = {
+            'capital': algo.capital,
+            'portfolio': algo.portfolio,
+            'last_prices': algo.last_prices,
+            'initial_capital': algo.initial_capital
+        }
+        if algo.cutoff_date:
+            state['cutoff_date'] = algo.cutoff_date
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.state_file)
+
+    @staticmethod
+    def _append(path, entries):
+        with open(path, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+
+    @phase('save_simulation')
+    def export(self, filename):
+        """
+        Write the logged simulation as a simulation file (the format of
+        FiveTenAlgo.save_simulation), copying the logs line by line.
+        """
+        with open(self.state_file, 'r') as f:
+            state = json.load(f)
+
+        temp_file = filename + '.tmp'
+        with open(temp_file, 'w') as out:
+            out.write('{')
+            for key, value in state.items():
+                out.write(f"{json.dumps(key)}: {json.dumps(value)}, ")
+            for key, path in (('trade_log', self.trades_file),
+                              ('performance_history', self.history_file),
+                              ('benchmark_history', self.benchmarks_file)):
+                out.write(f"{json.dumps(key)}: [")
+                with open(path, 'r') as f:
+                    for i, line in enumerate(f):
+                        out.write(line.rstrip('\n') if i == 0 else ', ' + line.rstrip('\n'))
+                out.write(']' if key == 'benchmark_history' else '], ')
+            out.write('}')
+        os.replace(temp_file, filename)
+
+
+@phase('simulation')
+def run_chunked_simulations(store, simulations, logs=None, start_date=None, end_date=None,
+                            compiled=None, signal_pool=None, progress=None):
+    """
+    Run simulations over a MarketStore one partition at a time.
+
+    Produces the same trades and histories as run_forked_simulations over the
+    whole market at once.
+
+    Args:
+        store: The MarketStore to scan
+        simulations: List of (FiveTenAlgo, start_date) pairs; a start_date of
+            None starts at the first bar
+        logs: SimulationLog per simulation (same order), flushed after every
+            chunk; without them the results accumulate in memory
+        start_date, end_date: Bars of the store to scan (start_date <= date < end_date)
+        compiled: Execute trades in the compiled kernel; defaults to whether
+            Numba is installed
+        signal_pool: SignalPool to detect signals in worker processes, or None
+        progress: Callable receiving progress messages, or None
+    """
+    pending = sorted(range(len(simulations)), key=lambda i: simulations[i][1] or '')
+    started = []
+    context = None
+
+    for chunk in store.iter_chunks(start_date, end_date):
+        last_date = chunk.dates[-1]
+        while pending and (simulations[pending[0]][1] or '') <= last_date:
+            started.append((pending.pop(0), True))
+
+        # Carry the last week of the previous chunk for week-ago lookups
+        context_rows = 0 if context is None else len(context)
+        matrix = chunk if context is None else PriceMatrix(
+            np.concatenate([context.dates, chunk.dates]), chunk.symbols,
+            np.concatenate([context.prices, chunk.prices]))
+
+        if started:
+            run_forked_simulations(
+                matrix,
+                [(simulations[i][0], simulations[i][1] if fresh else None) for i, fresh in started],
+                compiled=compiled,
+                context_rows=context_rows,
+                signal_pool=signal_pool
+            )
+            started = [(i, False) for i, _ in started]
+
+            if logs is not None:
+                for i, _ in started:
+                    logs[i].flush(simulations[i][0])
+
+        week_start = np.datetime64(int(matrix.days[-1]) - 7, 'D')
+        context = matrix.slice(str(week_start))
+        if progress:
+            progress(f"Processed {chunk.dates[0]}..{last_date}: {len(chunk)} bars of {len(chunk.symbols)} symbols, "
+                     f"{len(started)} simulations running")
@@ -0,0 +1,186 @@
+"""
+Memory accounting for the caches and loaded data of a running app.
+
+deep_size() follows references from an object (dict and list items, object
+attributes, ...) and adds up the size of everything reachable that has not
+been counted yet. Modules, classes and functions are not followed, and
+DataFrames and arrays are measured by their buffers. Sizes are therefore
+what the data would free if nothing else referenced it; objects shared
+between two cache entries count towards the first one measured.
+
+memory_report() measures each section (simulation artifacts, the response
+cache, DataProcessor's cache, the market data) and trace_allocations() lists
+the lines that allocated the most memory while running a piece of code,
+using tracemalloc.
+"""
+import gc
+import os
+import resource
+import sys
+import tracemalloc
+import types
+
+import numpy as np
+import pandas as pd
+
+# Largest entries listed per section
+TOP_ENTRIES = 10
+
+_NOT_FOLLOWED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, types.CodeType, types.FrameType)
+
+
+def deep_size(obj, seen=None, exclude=()):
+    """
+    Bytes reachable from obj that are not in seen (the ids counted so far, updated).
+
+    Args:
+        obj: Object to measure
+        seen: Set of ids already counted, shared between calls to not count objects twice
+        exclude: Objects that are neither counted nor followed (e.g. the owner of a cache)
+    """
+    seen = set() if seen is None else seen
+    seen.update(id(excluded) for excluded in exclude)
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _NOT_FOLLOWED):
+            continue
+        seen.add(id(current))
+
+        if isinstance(current, (pd.DataFrame, pd.Series, pd.Index)):
+            usage = current.memory_usage(deep=True)
+            size += int(usage.sum() if isinstance(usage, pd.Series) else usage)
+        elif isinstance(current, np.ndarray):
+            # A view's buffer belongs to its base
+            size += sys.getsizeof(current) if current.base is None else current.__sizeof__()
+            if current.dtype == object:
+                stack.extend(current.ravel().tolist())
+        else:
+            size += sys.getsizeof(current)
+            stack.extend(gc.get_referents(current))
+    return size
+
+
+def section(entries, seen, exclude=()):
+    """Summary of a mapping of name: object, largest entries first."""
+    sizes = sorted(((str(name), deep_size(value, seen, exclude)) for name, value in entries.items()),
+                   key=lambda item: -item[1])
+    return {
+        'entries': len(sizes),
+        'bytes': sum(size for _, size in sizes),
+        'largest': [{'name': name, 'bytes': size} for name, size in sizes[:TOP_ENTRIES]]
+    }
+
+
+def process_memory():
+    """Resident set size now (Linux only, else None) and at its peak, in bytes."""
+    current = None
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'rss_bytes': current, 'peak_rss_bytes': peak if sys.platform == 'darwin' else peak * 1024}
+
+
+def memory_report(data_processor, app_cache=None, market_data=True):
+    """
+    Measure what a data processor (and the app's response cache) hold in memory.
+
+    Sections are measured in order with one shared set of counted objects, so
+    data shared with an earlier section is not counted again.
+
+    Args:
+        data_processor: The DataProcessor to inspect
+        app_cache: app.cache, if the app is loaded
+        market_data: Also load the market data and measure it; it is not kept
+            in memory between simulation runs, so this is what a run needs
+
+    Returns:
+        Dict of section name: summary, plus 'process' and 'total_bytes'
+    """
+    seen = set()
+    exclude = (data_processor,)
+    report = {
+        'artifacts': section({os.path.relpath(path, data_processor.data_dir): entry['data']
+                              for path, entry in data_processor._artifacts.items()}, seen, exclude),
+        'data_processor_cache': section(data_processor._cache, seen, exclude)
+    }
+    if app_cache is not None:
+        report['app_cache'] = section({key: entry['data'] for key, entry in list(app_cache.items())}, seen, exclude)
+
+    if market_data:
+        store = data_processor.get_market_store()
+        if store.exists():
+            report['market_data'] = {'entries': 0, 'bytes': 0, 'largest': [],
+                                     'note': f"market store: one year partition in memory at a time, "
+                                             f"{len(store.symbols)} symbols"}
+        else:
+            frame = data_processor.load_market_data()
+            report['market_data'] = section({'DataFrame (loaded per run)': frame}, set())
+            report['market_data']['records'] = len(frame)
+
+    report['total_bytes'] = sum(summary['bytes'] for name, summary in report.items() if name != 'market_data')
+    report['process'] = process_memory()
+    return report
+
+
+def trace_allocations(func, *args, top=15, **kwargs):
+    """
+    Run func under tracemalloc and list the lines that allocated the most memory.
+
+    Returns:
+        (result, peak traced bytes, [{'location', 'bytes', 'count'}] of the memory
+        still allocated when func returned, largest first)
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        result = func(*args, **kwargs)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    statistics = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), 'lineno')
+    allocators = [{'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                   'bytes': stat.size_diff, 'count': stat.count_diff}
+                  for stat in statistics if stat.size_diff > 0][:top]
+    return result, peak, allocators
+
+
+def format_bytes(size):
+    if size is None:
+        return 'n/a'
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_report(report):
+    """The report as printable lines."""
+    lines = []
+    for name, summary in report.items():
+        if not isinstance(summary, dict) or 'bytes' not in summary:
+            continue
+        lines.append(f"{name:<24}{summary['entries']:>8} entries{format_bytes(summary['bytes']):>14}")
+        if summary.get('note'):
+            lines.append(f"    {summary['note']}")
+        for entry in summary['largest']:
+            lines.append(f"    {entry['name'][:60]:<62}{format_bytes(entry['bytes']):>12}")
+    lines.append(f"{'cached total':<24}{'':>16}{format_bytes(report['total_bytes']):>14}")
+    process = report['process']
+    lines.append(f"{'process RSS':<24}{'':>16}{format_bytes(process['rss_bytes']):>14}"
+                 f" (peak {format_bytes(process['peak_rss_bytes'])})")
+    return lines
@@ -0,0 +1,134 @@
+"""
+Monte Carlo robustness runs of the FiveTenAlgo strategy.
+
+Every path is an independent synthetic market drawn from its own child of one
+SeedSequence, so a run is reproducible from its root seed regardless of the
+number of workers or the batch size. Paths are simulated on a process pool
+and submitted in batches; each worker only sends back a few summary numbers
+per mode, so memory stays bounded by the batch size rather than the number
+of paths.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from models.algorithm import FiveTenAlgo
+from models.performance_metrics import compute_metrics
+from models.synthetic import generate_market
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Per-path outcomes that are aggregated across paths
+OUTCOMES = ('total_return', 'max_drawdown', 'sharpe_ratio')
+
+
+def simulate_path(seed_sequence, start_date, end_date, symbols, modes, freq='W'):
+    """
+    Run every mode over one synthetic path.
+
+    Args:
+        seed_sequence: SeedSequence of this path
+        start_date: First date of the path (YYYY-MM-DD)
+        end_date: Last date of the path (YYYY-MM-DD)
+        symbols: List of symbols
+        modes: Mode name: FiveTenAlgo parameters
+        freq: Bar frequency ('W' or 'B')
+
+    Returns:
+        Mode name: {total_return, max_drawdown, sharpe_ratio}
+    """
+    # Separate streams for the market and for candidate sampling; every mode sees the same ones
+    market_seed, algo_seed = seed_sequence.spawn(2)
+    market = generate_market(symbols, start_date, end_date, freq=freq, rng=np.random.default_rng(market_seed))
+
+    results = {}
+    for mode, params in modes.items():
+        algo = FiveTenAlgo(
+            initial_capital=params['initial_capital'],
+            buy_threshold=params['buy_threshold'],
+            sell_threshold=params['sell_threshold'],
+            trade_size_buy_pct=params['trade_size_buy_pct'],
+            trade_size_sell_pct=params['trade_size_sell_pct'],
+            seed=algo_seed
+        )
+        algo.process_market_data(market)
+        metrics = compute_metrics(algo.performance_history, algo.trade_log,
+                                  starting_value=params['initial_capital'])
+        results[mode] = {outcome: metrics[outcome] for outcome in OUTCOMES}
+    return results
+
+
+def summarize(values):
+    """Percentiles, mean and standard deviation of one outcome across paths."""
+    values = np.asarray(values, dtype=float)
+    summary = {f"p{q}": float(value) for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    summary['mean'] = float(values.mean())
+    summary['std'] = float(values.std())
+    return summary
+
+
+def run_monte_carlo(modes, paths, start_date, end_date, symbols, workers=None, batch_size=None,
+                    seed=None, freq='W', progress=print):
+    """
+    Run the strategy over many seeded synthetic paths.
+
+    Args:
+        modes: Mode name: FiveTenAlgo parameters (as in DataProcessor.simulation_params)
+        paths: Number of synthetic paths
+        start_date: First date of every path (YYYY-MM-DD)
+        end_date: Last date of every path (YYYY-MM-DD)
+        symbols: List of symbols in every path
+        workers: Worker processes (defaults to the CPU count)
+        batch_size: Paths submitted at a time (defaults to twice the workers)
+        seed: Root seed; a random one is drawn (and reported) when None
+        freq: Bar frequency ('W' or 'B')
+        progress: Callable receiving progress messages, or None
+
+    Returns:
+        Dictionary with the seed, the run settings and, per mode, the percentiles
+        of final return, max drawdown and Sharpe ratio across paths
+    """
+    root = np.random.SeedSequence(seed)
+    bars = len(pd.date_range(start=start_date, end=end_date, freq=freq))
+    path_seeds = root.spawn(paths)
+
+    outcomes = {mode: {outcome: np.empty(paths) for outcome in OUTCOMES} for mode in modes}
+    start = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    batch_size = batch_size or 2 * workers
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        done = 0
+        for batch_start in range(0, paths, batch_size):
+            batch = path_seeds[batch_start:batch_start + batch_size]
+            futures = [executor.submit(simulate_path, path_seed, start_date, end_date, symbols, modes, freq) for path_seed in batch]
+
+            # Collect in submission order so each path keeps its slot
+            for offset, future in enumerate(futures):
+                for mode, result in future.result().items():
+                    for outcome in OUTCOMES:
+                        outcomes[mode][outcome][batch_start + offset] = result[outcome]
+            done += len(batch)
+
+            if progress:
+                elapsed = time.perf_counter() - start
+                progress(f"Simulated {done}/{paths} paths ({elapsed:.1f}s)")
+
+    return {
+        'seed': root.entropy,
+        'paths': paths,
+        'start_date': start_date,
+        'end_date': end_date,
+        'symbols': list(symbols),
+        'bars': bars,
+        'freq': freq,
+        'workers': workers,
+        'modes': {
+            mode: {outcome: summarize(values) for outcome, values in mode_outcomes.items()}
+            for mode, mode_outcomes in outcomes.items()
+        }
+    }
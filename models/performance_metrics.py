@@ -0,0 +1,163 @@
+import numpy as np
+
+RISK_FREE_RATE = 0.02  # 2% annual risk-free rate
+
+
+def infer_periods_per_year(dates):
+    """
+    Infer the number of bars per year from the spacing of a series of dates.
+
+    Daily bars map to 252 trading days, weekly to 52, monthly to 12 and
+    quarterly to 4; anything else is derived from the median spacing.
+
+    Args:
+        dates: Sorted dates as YYYY-MM-DD strings (or anything numpy parses as datetime64)
+
+    Returns:
+        The annualization factor for per-bar returns
+    """
+    if len(dates) < 2:
+        return 252
+
+    spacing = np.median(np.diff(np.asarray(dates, dtype='datetime64[D]').astype(np.int64)))
+    if spacing <= 1.5:
+        return 252
+    if spacing <= 8:
+        return 52
+    if spacing <= 35:
+        return 12
+    if spacing <= 100:
+        return 4
+    return 365.25 / spacing
+
+
+def empty_metrics(starting_value):
+    """Metrics for a simulation without any history."""
+    return {
+        'total_return': 0,
+        'starting_value': starting_value,
+        'ending_value': starting_value,
+        'annualized_return': 0,
+        'max_drawdown': 0,
+        'max_drawdown_duration': 0,
+        'volatility': 0,
+        'sharpe_ratio': 0,
+        'sortino_ratio': 0,
+        'calmar_ratio': 0,
+        'win_rate': 0,
+        'turnover': 0,
+        'periods_per_year': 0
+    }
+
+
+def drawdown_series(values):
+    """
+    Compute the running-peak drawdown of a value series.
+
+    Args:
+        values: Array of portfolio values
+
+    Returns:
+        (drawdown, peak_index) where drawdown is the percentage below the
+        running peak at every bar and peak_index is the bar of that peak
+    """
+    running_peak = np.maximum.accumulate(values)
+    drawdown = np.divide(running_peak - values, running_peak,
+                         out=np.zeros_like(values), where=running_peak > 0) * 100
+
+    # Index of the bar that set the running peak, carried forward
+    positions = np.arange(len(values))
+    peak_index = np.maximum.accumulate(np.where(values >= running_peak, positions, 0))
+    return drawdown, peak_index
+
+
+def compute_metrics(history, trade_log=None, starting_value=None, risk_free_rate=RISK_FREE_RATE):
+    """
+    Compute performance metrics for a performance history in one vectorized pass.
+
+    Returns are annualized with the bar frequency inferred from the dates, so
+    weekly simulations use 52 periods per year rather than 252.
+
+    Args:
+        history: List of performance history entries (date, portfolio_value)
+        trade_log: Trades over the same period, for win rate and turnover
+        starting_value: Value the returns are measured against (defaults to the first entry)
+        risk_free_rate: Annual risk-free rate used by Sharpe and Sortino
+
+    Returns:
+        Dictionary with total and annualized return, drawdown and its duration
+        (days), annualized volatility, Sharpe, Sortino and Calmar ratios, win
+        rate of closed trades and annual turnover
+    """
+    if not history:
+        return empty_metrics(starting_value or 0)
+
+    dates = np.array([entry['date'] for entry in history], dtype='datetime64[D]')
+    values = np.array([entry['portfolio_value'] for entry in history], dtype=float)
+
+    if starting_value is None:
+        starting_value = values[0]
+    ending_value = values[-1]
+    total_return = (ending_value / starting_value - 1) * 100 if starting_value > 0 else 0
+
+    periods_per_year = infer_periods_per_year(dates)
+    years = (dates[-1] - dates[0]).astype(np.int64) / 365.25
+
+    if years > 0 and starting_value > 0 and ending_value > 0:
+        annualized_return = ((ending_value / starting_value) ** (1 / years) - 1) * 100
+    else:
+        annualized_return = 0
+
+    # Drawdown and the longest time spent below a previous peak
+    drawdown, peak_index = drawdown_series(values)
+    max_drawdown = float(drawdown.max())
+    underwater_days = (dates - dates[peak_index]).astype(np.int64)
+    max_drawdown_duration = int(underwater_days.max())
+
+    # Per-bar returns
+    if len(values) > 1:
+        previous = values[:-1]
+        returns = np.divide(values[1:], previous, out=np.ones_like(previous), where=previous > 0) - 1
+        excess = returns - risk_free_rate / periods_per_year
+
+        volatility_per_bar = returns.std()
+        downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2))
+
+        volatility = volatility_per_bar * np.sqrt(periods_per_year) * 100
+        sharpe_ratio = excess.mean() / volatility_per_bar * np.sqrt(periods_per_year) if volatility_per_bar > 0 else 0
+        sortino_ratio = excess.mean() / downside * np.sqrt(periods_per_year) if downside > 0 else 0
+    else:
+        volatility = 0
+        sharpe_ratio = 0
+        sortino_ratio = 0
+
+    calmar_ratio = annualized_return / max_drawdown if max_drawdown > 0 else 0
+
+    # Trade statistics
+    win_rate = 0
+    turnover = 0
+    if trade_log:
+        profit_loss = np.array([trade['profit_loss'] for trade in trade_log if 'profit_loss' in trade], dtype=float)
+        if len(profit_loss):
+            win_rate = float((profit_loss > 0).mean() * 100)
+
+        traded_value = float(np.sum([trade.get('value', 0) for trade in trade_log]))
+        average_value = values.mean()
+        if years > 0 and average_value > 0:
+            turnover = traded_value / average_value / years
+
+    return {
+        'total_return': float(total_return),
+        'starting_value': float(starting_value),
+        'ending_value': float(ending_value),
+        'annualized_return': float(annualized_return),
+        'max_drawdown': max_drawdown,
+        'max_drawdown_duration': max_drawdown_duration,
+        'volatility': float(volatility),
+        'sharpe_ratio': float(sharpe_ratio),
+        'sortino_ratio': float(sortino_ratio),
+        'calmar_ratio': float(calmar_ratio),
+        'win_rate': win_rate,
+        'turnover': float(turnover),
+        'periods_per_year': float(periods_per_year)
+    }
@@ -0,0 +1,84 @@
+"""
+Dense price matrix used by the simulation engine.
+
+Prices are held as one bars x symbols float array (NaN where a symbol has no
+price on a date) instead of a long DataFrame, so looking up a date, or the
+date one week earlier, is an index into a row rather than a filter over
+every record.
+"""
+import numpy as np
+import pandas as pd
+
+
+class PriceMatrix:
+    def __init__(self, dates, symbols, prices):
+        """
+        Initialize the price matrix.
+
+        Parameters:
+        dates (array): Sorted, unique bar dates as YYYY-MM-DD strings
+        symbols (array): Symbols, one per column
+        prices (ndarray): bars x symbols prices, NaN where a symbol has no price
+        """
+        self.dates = np.asarray(dates, dtype=object)
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.prices = prices
+
+        # Day numbers of each bar, for date arithmetic
+        self.days = pd.to_datetime(self.dates).values.astype('datetime64[D]').astype(np.int64)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_frame(cls, market_data):
+        """
+        Build a price matrix from a long DataFrame with columns [symbol, date, price].
+
+        Symbols keep the order of their first appearance and the first price of a
+        (date, symbol) pair wins, matching how the engine scans the records.
+        """
+        if isinstance(market_data, cls):
+            return market_data
+
+        dates = np.sort(market_data['date'].unique())
+        symbols = pd.unique(market_data['symbol'])
+
+        rows = np.searchsorted(dates, market_data['date'].to_numpy())
+        columns = pd.Index(symbols).get_indexer(market_data['symbol'])
+
+        # Write in reverse so the first record of a duplicated (date, symbol) is kept
+        prices = np.full((len(dates), len(symbols)), np.nan)
+        prices[rows[::-1], columns[::-1]] = market_data['price'].to_numpy(dtype=float)[::-1]
+        return cls(dates, symbols, prices)
+
+    def to_frame(self):
+        """Convert to a long DataFrame with columns [date, price, symbol], symbol by symbol."""
+        bars, count = self.prices.shape
+        prices = self.prices.T.ravel()
+        present = ~np.isnan(prices)
+        return pd.DataFrame({
+            'date': np.tile(self.dates, count)[present],
+            'price': prices[present],
+            'symbol': np.repeat(self.symbols, bars)[present]
+        })
+
+    def slice(self, start_date=None, end_date=None):
+        """Rows with start_date <= date < end_date (either bound may be None)."""
+        start = 0 if start_date is None else np.searchsorted(self.dates, start_date, side='left')
+        stop = len(self.dates) if end_date is None else np.searchsorted(self.dates, end_date, side='left')
+        return PriceMatrix(self.dates[start:stop], self.symbols, self.prices[start:stop])
+
+    def offset_index(self, days):
+        """
+        For every bar, the index of the bar exactly `days` days earlier, or -1 if there is none.
+        """
+        target = self.days - days
+        index = np.searchsorted(self.days, target)
+        clipped = np.minimum(index, len(self.days) - 1)
+        found = (index < len(self.days)) & (self.days[clipped] == target)
+        return np.where(found, index, -1)
+
+    def week_ago_index(self):
+        """For every bar, the index of the bar exactly one week earlier, or -1."""
+        return self.offset_index(7)
@@ -0,0 +1,131 @@
+"""
+Per-phase profiling of simulation runs.
+
+Functions that make up a phase of the work (loading market data, signal
+scanning, trade execution, valuation, serialization...) are marked with
+@phase. The decorator only registers the function and returns it unchanged,
+so with profiling off the marked code runs exactly as before. enable()
+installs timing wrappers in place of every marked function (on its class or
+module, and wherever it was imported by name) and disable() puts the
+originals back.
+
+Times are cumulative wall-clock seconds per phase. A call nested in a call
+of the same phase is not counted twice, but phases nest in each other (the
+verify re-read is part of save_simulation), so the totals are not meant to
+add up. Work done in worker processes is not included.
+"""
+import sys
+import threading
+import time
+from functools import wraps
+
+# Marked functions: (phase name, function)
+_REGISTRY = []
+
+# Installed wrappers: (owner, attribute, original)
+_INSTALLED = []
+
+
+class PhaseTimer:
+    def __init__(self):
+        self._totals = {}  # Phase: [seconds, calls]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+    def wrap(self, name, func):
+        """A wrapper of func adding its calls and time to a phase."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            active = self._active()
+            if name in active:
+                return func(*args, **kwargs)
+            active.add(name)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                active.discard(name)
+                with self._lock:
+                    total = self._totals.setdefault(name, [0.0, 0])
+                    total[0] += elapsed
+                    total[1] += 1
+        return wrapper
+
+    def _active(self):
+        active = getattr(self._local, 'active', None)
+        if active is None:
+            active = self._local.active = set()
+        return active
+
+    def totals(self):
+        """Dict of phase: (seconds, calls), slowest first."""
+        with self._lock:
+            items = sorted(self._totals.items(), key=lambda item: -item[1][0])
+        return {name: (seconds, calls) for name, (seconds, calls) in items}
+
+    def report(self, wall_seconds=None):
+        """The breakdown as printable lines."""
+        lines = [f"{'Phase':<24}{'Seconds':>10}{'Calls':>10}{'ms/call':>12}" +
+                 (f"{'Of wall':>9}" if wall_seconds else '')]
+        for name, (seconds, calls) in self.totals().items():
+            line = f"{name:<24}{seconds:>10.3f}{calls:>10}{seconds / calls * 1000:>12.3f}"
+            if wall_seconds:
+                line += f"{seconds / wall_seconds * 100:>8.1f}%"
+            lines.append(line)
+        if wall_seconds:
+            lines.append(f"{'wall clock':<24}{wall_seconds:>10.3f}")
+        return lines
+
+
+TIMER = PhaseTimer()
+
+
+def phase(name):
+    """Mark a function (or method) as part of a profiling phase."""
+    def decorator(func):
+        _REGISTRY.append((name, func))
+        return func
+    return decorator
+
+
+def _owner(func):
+    """The class or module a marked function is defined on, and its attribute name."""
+    owner = sys.modules[func.__module__]
+    *path, attribute = func.__qualname__.split('.')
+    for part in path:
+        owner = getattr(owner, part)
+    return owner, attribute
+
+
+def enable():
+    """Start timing every marked function."""
+    if _INSTALLED:
+        return
+    modules = [module for name, module in list(sys.modules.items())
+               if module is not None and (name in ('__main__', 'app', 'asgi_app', 'cli') or name.startswith('models'))]
+
+    for name, func in _REGISTRY:
+        wrapper = TIMER.wrap(name, func)
+        owner, attribute = _owner(func)
+        if vars(owner).get(attribute) is func:
+            setattr(owner, attribute, wrapper)
+            _INSTALLED.append((owner, attribute, func))
+
+        # Module functions may also have been imported by name elsewhere
+        for module in modules:
+            for attribute_name, value in list(vars(module).items()):
+                if value is func and module is not owner:
+                    setattr(module, attribute_name, wrapper)
+                    _INSTALLED.append((module, attribute_name, func))
+
+
+def disable():
+    """Stop timing and restore the original functions."""
+    while _INSTALLED:
+        owner, attribute, func = _INSTALLED.pop()
+        setattr(owner, attribute, func)
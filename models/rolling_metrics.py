@@ -0,0 +1,243 @@
+"""
+Rolling-window analytics over a performance history.
+
+Each window keeps running sums of its returns and squared returns, plus a
+queue of its values built from two stacks whose entries carry the peak,
+trough and maximum drawdown of the values below them. Adding a bar costs
+O(1) amortized and a whole series costs O(n) regardless of the window length.
+Because the state only moves forward, a series can be extended with new bars
+without recomputing anything that came before.
+"""
+from collections import deque
+import copy
+import math
+
+from models.performance_metrics import RISK_FREE_RATE, infer_periods_per_year
+
+# Window name: length in months
+WINDOWS = {
+    '3m': 3,
+    '6m': 6,
+    '12m': 12
+}
+
+
+def _drop(peak, trough):
+    """Relative fall from a peak to a later trough."""
+    return (peak - trough) / peak if peak > 0 else 0.0
+
+
+def _combine(earlier, later):
+    """The (peak, trough, max drawdown) of two consecutive runs of values."""
+    return (max(earlier[0], later[0]), min(earlier[1], later[1]),
+            max(earlier[2], later[2], _drop(earlier[0], later[1])))
+
+
+class DrawdownQueue:
+    """
+    FIFO queue of values that answers the maximum drawdown of its contents.
+
+    The maximum drawdown of a run of values combines from its parts: the worst
+    of each part's own, and the fall from the earlier part's peak to the later
+    part's trough. New values go on the back stack, each entry carrying the
+    summary of the back stack up to it. Popping takes from the front stack,
+    refilled from the back stack when empty with each entry carrying the
+    summary of itself and the entries after it. Both ends then answer in O(1).
+    """
+
+    def __init__(self):
+        self._front = []  # (value, summary of it and the later front values), earliest on top
+        self._back = []   # (value, summary of the back values up to it), latest on top
+
+    def __len__(self):
+        return len(self._front) + len(self._back)
+
+    def push(self, value):
+        summary = (value, value, 0.0)
+        if self._back:
+            summary = _combine(self._back[-1][1], summary)
+        self._back.append((value, summary))
+
+    def pop(self):
+        if not self._front:
+            summary = None
+            while self._back:
+                value, _ = self._back.pop()
+                single = (value, value, 0.0)
+                summary = single if summary is None else _combine(single, summary)
+                self._front.append((value, summary))
+        return self._front.pop()[0]
+
+    def max_drawdown(self):
+        """Worst peak-to-trough fall of the queued values, as a fraction of the peak."""
+        if self._front and self._back:
+            return _combine(self._front[-1][1], self._back[-1][1])[2]
+        if self._front or self._back:
+            return (self._front or self._back)[-1][1][2]
+        return 0.0
+
+
+class RollingWindow:
+    def __init__(self, size, periods_per_year, risk_free_rate=RISK_FREE_RATE):
+        """
+        Initialize a rolling window.
+
+        Parameters:
+        size (int): Number of returns in the window (the window spans size + 1 bars)
+        periods_per_year (float): Bars per year, used to annualize
+        risk_free_rate (float): Annual risk-free rate used by the Sharpe ratio
+        """
+        self.size = size
+        self.periods_per_year = periods_per_year
+        self.risk_free_rate = risk_free_rate
+
+        self.returns = deque()
+        self.return_sum = 0.0
+        self.return_sum_sq = 0.0
+
+        # Portfolio values of the window's size + 1 bars
+        self.values = DrawdownQueue()
+
+    def push(self, value, ret):
+        """
+        Add a bar to the window.
+
+        Args:
+            value: Portfolio value at the bar
+            ret: Return since the previous bar (None for the first bar)
+
+        Returns:
+            The window's volatility, Sharpe ratio and maximum drawdown at this
+            bar, or None until the window is full
+        """
+        self.values.push(value)
+        if len(self.values) > self.size + 1:
+            self.values.pop()
+
+        if ret is None:
+            return None
+
+        self.returns.append(ret)
+        self.return_sum += ret
+        self.return_sum_sq += ret * ret
+        if len(self.returns) > self.size:
+            old = self.returns.popleft()
+            self.return_sum -= old
+            self.return_sum_sq -= old * old
+        if len(self.returns) < self.size:
+            return None
+
+        mean = self.return_sum / self.size
+        variance = max(self.return_sum_sq / self.size - mean * mean, 0.0)
+        std = math.sqrt(variance)
+        annualization = math.sqrt(self.periods_per_year)
+
+        excess = mean - self.risk_free_rate / self.periods_per_year
+
+        return {
+            'volatility': std * annualization * 100,
+            'sharpe_ratio': excess / std * annualization if std > 1e-12 else 0,
+            'max_drawdown': self.values.max_drawdown() * 100
+        }
+
+
+class RollingAnalyzer:
+    def __init__(self, periods_per_year, windows=None, risk_free_rate=RISK_FREE_RATE):
+        """
+        Initialize the analyzer.
+
+        Parameters:
+        periods_per_year (float): Bars per year of the history it will be fed
+        windows (dict): Window name: length in months (defaults to WINDOWS)
+        risk_free_rate (float): Annual risk-free rate used by the Sharpe ratio
+        """
+        self.periods_per_year = periods_per_year
+        self.windows = {}
+        for name, months in (windows or WINDOWS).items():
+            size = max(2, int(round(periods_per_year * months / 12)))
+            self.windows[name] = RollingWindow(size, periods_per_year, risk_free_rate)
+
+        self.series = {name: [] for name in self.windows}
+        self.last_date = None
+        self.last_value = None
+        self.bars = 0
+
+    @classmethod
+    def from_history(cls, history, windows=None):
+        """Build an analyzer over a date-sorted performance history."""
+        periods_per_year = infer_periods_per_year([entry['date'] for entry in history])
+        analyzer = cls(periods_per_year, windows)
+        analyzer.extend(history)
+        return analyzer
+
+    def extend(self, history):
+        """
+        Feed bars newer than the last one seen.
+
+        Args:
+            history: Date-sorted performance history; entries at or before the
+                last processed date are skipped
+
+        Returns:
+            The number of bars added
+        """
+        added = 0
+        for entry in history:
+            date = entry['date']
+            if self.last_date is not None and date <= self.last_date:
+                continue
+
+            value = entry['portfolio_value']
+            if self.last_value is None:
+                ret = None
+            else:
+                ret = value / self.last_value - 1 if self.last_value > 0 else 0.0
+
+            for name, window in self.windows.items():
+                point = window.push(value, ret)
+                if point is not None:
+                    point['date'] = date
+                    self.series[name].append(point)
+
+            self.last_date = date
+            self.last_value = value
+            self.bars += 1
+            added += 1
+        return added
+
+    def copy(self):
+        """
+        An independent copy that can be extended without changing this one.
+
+        The windows are bounded, and the points already in the series are never
+        changed, so copying costs one list copy per series.
+        """
+        duplicate = copy.copy(self)
+        duplicate.windows = copy.deepcopy(self.windows)
+        duplicate.series = {name: list(points) for name, points in self.series.items()}
+        return duplicate
+
+    def get_series(self, window, start_date=None):
+        """
+        Get the rolling series of a window.
+
+        Args:
+            window: Window name (e.g. '3m')
+            start_date: Optional first date to include (YYYY-MM-DD)
+
+        Returns:
+            List of points with date, volatility, sharpe_ratio and max_drawdown
+        """
+        series = self.series[window]
+        if start_date is None:
+            return series
+
+        # Points are in date order
+        low, high = 0, len(series)
+        while low < high:
+            middle = (low + high) // 2
+            if series[middle]['date'] < start_date:
+                low = middle + 1
+            else:
+                high = middle
+        return series[low:]
@@ -0,0 +1,97 @@
+"""
+Signal detection sharded by symbol across worker processes.
+
+Trades have to be executed in date order against one pool of cash, but
+whether a symbol is a buy or sell candidate on a bar only depends on its own
+prices. SignalPool splits the symbol columns into one contiguous shard per
+worker; every worker detects the signals of its shard over all bars and the
+coordinator merges the shards back into (row, column) order, which is exactly
+what a single-process detection produces. Execution then proceeds as usual on
+the merged signal streams.
+
+The price matrix reaches the workers through a memory-mapped temporary .npy
+file, so each worker only reads its own columns and nothing large is pickled.
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.algorithm import FiveTenAlgo, detect_signals
+from models.profiling import phase
+
+
+def _detect_shard(path, week_ago_index, keys, start_row, column_start, column_stop):
+    """Detect the signals of one column shard (columns relative to the shard)."""
+    prices = np.load(path, mmap_mode='r')[:, column_start:column_stop]
+    algos = {key: FiveTenAlgo(buy_threshold=key[:2], sell_threshold=key[2:]) for key in keys}
+    return detect_signals(prices, week_ago_index, algos, start_row)
+
+
+def shard_bounds(symbol_count, shards):
+    """(start, stop) columns of up to `shards` contiguous, non-empty shards."""
+    edges = np.linspace(0, symbol_count, min(shards, symbol_count) + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+
+class SignalPool:
+    def __init__(self, workers=None, temp_dir=None):
+        """
+        Initialize the pool; use it as a context manager, or call close().
+
+        Parameters:
+        workers (int): Worker processes, one shard each (defaults to the CPU count)
+        temp_dir (str): Where the shared price files are written (defaults to the system temp dir)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.temp_dir = temp_dir
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    @phase('signal_scan')
+    def detect(self, prices, week_ago_index, keys, start_row=0):
+        """
+        Detect signals like algorithm.detect_signals, one symbol shard per worker.
+
+        Args:
+            prices: bars x symbols prices
+            week_ago_index: Index of the bar one week before every bar, or -1
+            keys: Distinct signal keys (buy low, buy high, sell low, sell high)
+            start_row: First bar to detect signals at
+
+        Returns:
+            Dict of signal_key: ((buy_rows, buy_columns), (sell_rows, sell_columns))
+        """
+        handle, path = tempfile.mkstemp(suffix='.npy', dir=self.temp_dir)
+        os.close(handle)
+        try:
+            np.save(path, prices)
+            bounds = shard_bounds(prices.shape[1], self.workers)
+            futures = [self._executor.submit(_detect_shard, path, week_ago_index, keys, start_row, start, stop)
+                       for start, stop in bounds]
+            shards = [(start, future.result()) for (start, _), future in zip(bounds, futures)]
+        finally:
+            os.remove(path)
+
+        def merge(parts, side):
+            """One side's signals of every shard, back in (row, column) order."""
+            rows = np.concatenate([np.zeros(0, dtype=np.int64)] + [signals[side][0] for _, signals in parts])
+            columns = np.concatenate([np.zeros(0, dtype=np.int64)] +
+                                     [signals[side][1] + start for start, signals in parts])
+            order = np.lexsort((columns, rows))
+            return rows[order], columns[order]
+
+        merged = {}
+        for key in keys:
+            parts = [(start, shard[key]) for start, shard in shards]
+            merged[key] = (merge(parts, 0), merge(parts, 1))
+        return merged
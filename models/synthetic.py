@@ -0,0 +1,108 @@
+"""
+Vectorized synthetic market generator.
+
+Produces the same dynamics as the original sample data: 5% weekly noise, a
+small upward trend, a 5% drop every 8 weeks and a 10% rise every 12 weeks,
+with a $1 price floor. The whole shock matrix is drawn at once and prices
+come from a cumulative sum of log returns. The floor is applied with a
+running maximum (price = path + highest shortfall below the floor so far),
+which reproduces clamping the price at every step without a Python loop.
+"""
+import numpy as np
+import pandas as pd
+
+from models.price_matrix import PriceMatrix
+
+# Bars per week for each supported frequency
+BARS_PER_WEEK = {
+    'W': 1,  # Weekly (Sundays)
+    'B': 5   # Business days
+}
+
+# Symbols generated per block, bounding the temporary arrays
+BLOCK_SYMBOLS = 256
+
+
+def shock_matrix(rng, bars, count, freq='W', volatility=0.05, trend=0.001, drop=-0.05, rise=0.10):
+    """
+    Draw the per-bar returns for a bars x symbols block.
+
+    Volatility and trend are weekly figures, scaled to the bar frequency; the
+    periodic drop and rise land on every 8th and 12th week.
+
+    Returns:
+        bars x count array of simple returns
+    """
+    per_week = BARS_PER_WEEK[freq]
+    shocks = rng.normal(trend / per_week, volatility / np.sqrt(per_week), size=(bars, count))
+
+    index = np.arange(bars)
+    drops = (index > 0) & (index % (8 * per_week) == 0)
+    rises = (index > 0) & ~drops & (index % (12 * per_week) == 0)
+    shocks[drops] += drop
+    shocks[rises] += rise
+    return shocks
+
+
+def price_paths(base_prices, shocks, floor=1.0):
+    """
+    Compound returns from base prices, never letting a price fall below the floor.
+
+    Args:
+        base_prices: Starting price of each symbol
+        shocks: bars x symbols simple returns
+        floor: Minimum price
+
+    Returns:
+        bars x symbols prices
+    """
+    # A return of -100% or worse would take the price to zero before the floor applies
+    log_paths = np.log1p(np.maximum(shocks, -0.999999))
+    np.cumsum(log_paths, axis=0, out=log_paths)
+    log_paths += np.log(base_prices)
+
+    # Clamping at every step lifts the rest of the path by the deepest shortfall so far
+    shortfall = np.log(floor) - log_paths
+    np.maximum.accumulate(shortfall, axis=0, out=shortfall)
+    np.maximum(shortfall, 0, out=shortfall)
+    log_paths += shortfall
+    return np.exp(log_paths, out=log_paths)
+
+
+def generate_market(symbols, start_date, end_date, freq='W', seed=None, rng=None, last_prices=None, **dynamics):
+    """
+    Generate a synthetic market.
+
+    Args:
+        symbols: List of symbols
+        start_date: First date (YYYY-MM-DD)
+        end_date: Last date (YYYY-MM-DD)
+        freq: 'W' for weekly or 'B' for business-day bars
+        seed: Seed for a new Generator (ignored when rng is given)
+        rng: numpy Generator to draw from
+        last_prices: Symbol: price to continue from; other symbols start at a random price
+        **dynamics: Overrides for shock_matrix (volatility, trend, drop, rise)
+
+    Returns:
+        A PriceMatrix of the generated prices
+    """
+    if freq not in BARS_PER_WEEK:
+        raise ValueError(f"Unsupported frequency: {freq!r}")
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    dates = pd.date_range(start=start_date, end=end_date, freq=freq)
+    bars, count = len(dates), len(symbols)
+    prices = np.empty((bars, count))
+
+    if bars:
+        base_prices = rng.uniform(50, 500, size=count)
+        if last_prices:
+            known = [i for i, symbol in enumerate(symbols) if symbol in last_prices]
+            base_prices[known] = [last_prices[symbols[i]] for i in known]
+        for start in range(0, count, BLOCK_SYMBOLS):
+            stop = min(start + BLOCK_SYMBOLS, count)
+            shocks = shock_matrix(rng, bars, stop - start, freq=freq, **dynamics)
+            prices[:, start:stop] = price_paths(base_prices[start:stop], shocks)
+
+    return PriceMatrix(dates.strftime('%Y-%m-%d'), symbols, prices)
@@ -0,0 +1,189 @@
+"""
+Process-local metrics in the Prometheus text exposition format.
+
+Recording a sample is a dictionary lookup and an increment under a lock, and
+the text is only rendered when /metrics is scraped, so instrumentation on the
+request path costs close to nothing when nobody is looking.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Request latencies (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Simulation and file operations can take minutes
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(names, values, extra=()):
+    """Render a label set as {name="value",...}."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # Label values tuple: sample state
+        self._lock = threading.Lock()
+
+    def render(self):
+        """Render the metric's HELP, TYPE and sample lines."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_samples(labels, value))
+        return lines
+
+    def _render_samples(self, labels, value):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        """Increase the counter for a label set."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        """Set the gauge for a label set."""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        """Record one observation for a label set."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, labels, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        """Add a metric to the registry and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render every registered metric in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'fiveten_http_requests_total',
+    'HTTP requests by route, method and status code.',
+    ['route', 'method', 'status']
+))
+
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    'fiveten_http_request_duration_seconds',
+    'HTTP request latency by route.',
+    ['route']
+))
+
+CACHE_EVENTS = REGISTRY.register(Counter(
+    'fiveten_cache_events_total',
+    'Cache hits, misses and evictions by cache layer.',
+    ['cache', 'event']
+))
+
+OPERATION_LATENCY = REGISTRY.register(Histogram(
+    'fiveten_operation_duration_seconds',
+    'Duration of simulation and data loading operations.',
+    ['operation'],
+    buckets=SLOW_BUCKETS
+))
+
+ARTIFACT_BYTES = REGISTRY.register(Gauge(
+    'fiveten_simulation_artifact_bytes',
+    'Size on disk of each loaded simulation artifact.',
+    ['artifact']
+))
+
+ARTIFACT_RECORDS = REGISTRY.register(Gauge(
+    'fiveten_simulation_artifact_records',
+    'Number of records in each loaded simulation artifact.',
+    ['artifact', 'kind']
+))
+
+
+def observe_request(route, method, status, seconds):
+    """Record one served HTTP request."""
+    HTTP_REQUESTS.inc(route, method, str(status))
+    HTTP_LATENCY.observe(seconds, route)
+
+
+def record_cache_event(cache, event):
+    """Count a cache 'hit', 'miss' or 'eviction' for a cache layer."""
+    CACHE_EVENTS.inc(cache, event)
+
+
+def record_artifact(artifact, size_bytes, data=None):
+    """Record the size (and record counts, if the data is given) of a loaded simulation artifact."""
+    ARTIFACT_BYTES.set(size_bytes, artifact)
+    if data:
+        ARTIFACT_RECORDS.set(len(data.get('trade_log', [])), artifact, 'trade_log')
+        ARTIFACT_RECORDS.set(len(data.get('performance_history', [])), artifact, 'performance_history')
+
+
+def timed(operation):
+    """Decorator recording the duration of each call in the operation histogram."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                OPERATION_LATENCY.observe(time.perf_counter() - start, operation)
+        return wrapper
+    return decorator
@@ -0,0 +1,127 @@
+from bisect import bisect_left, bisect_right
+
+
+class TradeLogIndex:
+    """
+    Date/symbol/action index over a simulation's trade log.
+
+    Trades are stably sorted by date once and each one gets a sequence number
+    (its position in that order). Queries are answered with binary searches on
+    the sorted dates and on the per-symbol / per-action position lists, so a
+    page costs O(log n + page size) instead of a scan of the whole log.
+    """
+
+    ACTIONS = ('BUY', 'SELL')
+
+    def __init__(self, trade_log):
+        order = sorted(range(len(trade_log)), key=lambda i: trade_log[i]['date'])
+        self.trades = [trade_log[i] for i in order]
+        self.dates = [trade['date'] for trade in self.trades]
+        self.by_symbol = {}  # Symbol: sorted list of sequence numbers
+        self.by_action = {}  # Action: sorted list of sequence numbers
+
+        for seq, trade in enumerate(self.trades):
+            self.by_symbol.setdefault(trade['symbol'], []).append(seq)
+            self.by_action.setdefault(trade['action'], []).append(seq)
+
+    def __len__(self):
+        return len(self.trades)
+
+    @staticmethod
+    def encode_cursor(date, seq):
+        """Build the opaque cursor handed to clients for a trade position."""
+        return f"{date}:{seq}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Split a cursor back into (date, seq); raises ValueError if malformed."""
+        try:
+            date, seq = cursor.rsplit(':', 1)
+            return date, int(seq)
+        except (AttributeError, ValueError):
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    def _resolve_cursor(self, cursor, descending):
+        """
+        Translate a cursor into the first/last position still to be returned.
+
+        The sequence number is used directly while it still points at the same
+        date. If the index was rebuilt in the meantime (new artifact), fall back
+        to the date boundary so a client never sees a page twice.
+        """
+        date, seq = self.decode_cursor(cursor)
+        if 0 <= seq < len(self.dates) and self.dates[seq] == date:
+            return seq if descending else seq + 1
+        return bisect_left(self.dates, date) if descending else bisect_right(self.dates, date)
+
+    def query(self, symbol=None, action=None, start_date=None, end_date=None,
+              cursor=None, limit=50, descending=True):
+        """
+        Return one page of trades matching the filters.
+
+        Args:
+            symbol: Only return trades for this symbol
+            action: Only return 'BUY' or 'SELL' trades
+            start_date: Inclusive lower date bound (YYYY-MM-DD)
+            end_date: Inclusive upper date bound (YYYY-MM-DD)
+            cursor: Cursor returned by the previous page, if any
+            limit: Maximum number of trades in the page
+            descending: Newest trades first when True
+
+        Returns:
+            (trades, next_cursor) where next_cursor is None on the last page
+        """
+        if action is not None and action not in self.ACTIONS:
+            raise ValueError(f"Invalid action: {action!r}")
+
+        lo = bisect_left(self.dates, start_date) if start_date else 0
+        hi = bisect_right(self.dates, end_date) if end_date else len(self.dates)
+
+        if cursor:
+            position = self._resolve_cursor(cursor, descending)
+            if descending:
+                hi = min(hi, position)
+            else:
+                lo = max(lo, position)
+
+        if lo >= hi or limit <= 0:
+            return [], None
+
+        # Walk the narrowest position list available and test the other filter
+        # on each hit; without filters the page is a plain slice.
+        if symbol is not None or action is not None:
+            candidates = []
+            if symbol is not None:
+                candidates.append(self.by_symbol.get(symbol, []))
+            if action is not None:
+                candidates.append(self.by_action.get(action, []))
+            ranges = [(positions, bisect_left(positions, lo), bisect_left(positions, hi))
+                      for positions in candidates]
+            positions, start, stop = min(ranges, key=lambda r: r[2] - r[1])
+            walk = range(stop - 1, start - 1, -1) if descending else range(start, stop)
+            selected = []
+            for i in walk:
+                seq = positions[i]
+                trade = self.trades[seq]
+                if symbol is not None and trade['symbol'] != symbol:
+                    continue
+                if action is not None and trade['action'] != action:
+                    continue
+                selected.append(seq)
+                if len(selected) > limit:
+                    break
+        else:
+            if descending:
+                selected = list(range(hi - 1, max(lo, hi - limit - 1) - 1, -1))
+            else:
+                selected = list(range(lo, min(hi, lo + limit + 1)))
+
+        has_more = len(selected) > limit
+        selected = selected[:limit]
+
+        page = [dict(self.trades[seq], seq=seq) for seq in selected]
+        next_cursor = None
+        if has_more and selected:
+            last = selected[-1]
+            next_cursor = self.encode_cursor(self.dates[last], last)
+        return page, next_cursor
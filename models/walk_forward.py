@@ -0,0 +1,291 @@
+"""
+Walk-forward optimization of the FiveTenAlgo parameters.
+
+The market history is split into rolling folds of a train window followed by
+a test window. On every train window the whole parameter grid is simulated
+on a process pool and the best configuration (by the chosen objective) is
+then run on the following test window, next to the hand-picked presets.
+
+Every simulated (window, parameters) pair is cached on disk under a hash of
+the market data, so rerunning with more folds, a longer history or a new
+objective only simulates what has not been seen before.
+"""
+import hashlib
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from models.algorithm import FiveTenAlgo
+from models.performance_metrics import compute_metrics
+
+logger = logging.getLogger(__name__)
+
+# Metrics kept for every simulated window
+RESULT_METRICS = ('total_return', 'annualized_return', 'max_drawdown', 'volatility',
+                  'sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'win_rate')
+
+OBJECTIVES = ('sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'total_return')
+
+PARAM_FIELDS = ('buy_threshold', 'sell_threshold', 'trade_size_buy_pct', 'trade_size_sell_pct')
+
+# Grid step of each parameter; thresholds step their band's center, in percent
+GRID_STEPS = {
+    'buy_threshold': 0.5,
+    'sell_threshold': 1.0,
+    'trade_size_buy_pct': 0.0005,
+    'trade_size_sell_pct': 0.001
+}
+
+# Steps the grid extends beyond the lowest and highest preset values
+GRID_MARGIN = 1
+
+# Seed for buy-candidate sampling, so cached results are reproducible
+SIMULATION_SEED = 0
+
+# Market data of the worker processes, set once per worker
+_worker_market = None
+
+
+def data_version(matrix):
+    """Hash of the market data's dates, symbols and prices."""
+    digest = hashlib.sha1()
+    digest.update('\n'.join(matrix.dates).encode())
+    digest.update('\n'.join(matrix.symbols).encode())
+    digest.update(np.ascontiguousarray(matrix.prices).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def parameter_grid(presets, steps=None, margin=GRID_MARGIN):
+    """
+    A grid of parameter ranges spanning the presets.
+
+    Each parameter takes evenly spaced values from the lowest to the highest
+    preset value, extended by margin steps on both sides. Trade sizes stay
+    above zero. Thresholds are bands: the grid steps the band's center and
+    keeps the presets' median width.
+
+    Args:
+        presets: Mode name: parameters (as in DataProcessor.simulation_params)
+        steps: Field: grid step (defaults to GRID_STEPS)
+        margin: Steps added below the lowest and above the highest preset value
+
+    Returns:
+        List of parameter dicts, one per combination
+    """
+    steps = {**GRID_STEPS, **(steps or {})}
+    values = {}
+    for field in PARAM_FIELDS:
+        step = steps[field]
+        preset_values = [p[field] for p in presets.values()]
+        band = isinstance(preset_values[0], (list, tuple))
+        centers = [(low + high) / 2 for low, high in preset_values] if band else preset_values
+
+        low = min(centers) - margin * step
+        if not band:
+            low = max(low, step)
+        grid = np.round(np.arange(low, max(centers) + margin * step + step / 2, step), 6)
+
+        if band:
+            half_width = float(np.median([high - low for low, high in preset_values])) / 2
+            values[field] = [(round(center - half_width, 4), round(center + half_width, 4)) for center in grid]
+        else:
+            values[field] = [float(value) for value in grid]
+    return [dict(zip(PARAM_FIELDS, combination))
+            for combination in itertools.product(*(values[field] for field in PARAM_FIELDS))]
+
+
+def params_key(params):
+    """Stable string key for a parameter set."""
+    return json.dumps([list(params[field]) if isinstance(params[field], (list, tuple)) else params[field]
+                       for field in PARAM_FIELDS])
+
+
+def make_folds(dates, train_years, test_years):
+    """
+    Split a date range into rolling train/test windows.
+
+    Each fold's test window starts where its train window ends, and the next
+    fold moves forward by one test window.
+
+    Returns:
+        List of (train_start, test_start, test_end) dates; windows are [start, end)
+    """
+    first, last = pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
+    folds = []
+    train_start = first
+    while True:
+        test_start = train_start + pd.DateOffset(years=train_years)
+        test_end = test_start + pd.DateOffset(years=test_years)
+        if test_end > last + pd.Timedelta(days=1):
+            break
+        folds.append((train_start.strftime('%Y-%m-%d'), test_start.strftime('%Y-%m-%d'),
+                      test_end.strftime('%Y-%m-%d')))
+        train_start += pd.DateOffset(years=test_years)
+    return folds
+
+
+def simulate_window(matrix, start_date, end_date, params, initial_capital, seed=SIMULATION_SEED):
+    """
+    Simulate one parameter set on a [start_date, end_date) window.
+
+    The week before the window is included so signals can fire from its first bar.
+
+    Returns:
+        Dictionary of RESULT_METRICS and the number of trades
+    """
+    warmup_start = (pd.Timestamp(start_date) - pd.Timedelta(days=7)).strftime('%Y-%m-%d')
+    algo = FiveTenAlgo(
+        initial_capital=initial_capital,
+        buy_threshold=tuple(params['buy_threshold']),
+        sell_threshold=tuple(params['sell_threshold']),
+        trade_size_buy_pct=params['trade_size_buy_pct'],
+        trade_size_sell_pct=params['trade_size_sell_pct'],
+        seed=seed
+    )
+    algo.process_market_data(matrix.slice(warmup_start, end_date))
+
+    history = [entry for entry in algo.performance_history if entry['date'] >= start_date]
+    metrics = compute_metrics(history, algo.trade_log, starting_value=initial_capital)
+    result = {name: metrics[name] for name in RESULT_METRICS}
+    result['trades'] = len(algo.trade_log)
+    return result
+
+
+def _init_worker(matrix):
+    """Keep the market data in the worker process, so tasks only carry window bounds and parameters."""
+    global _worker_market
+    _worker_market = matrix
+
+
+def _simulate_task(start_date, end_date, params, initial_capital, seed):
+    return simulate_window(_worker_market, start_date, end_date, params, initial_capital, seed)
+
+
+class FoldCache:
+    def __init__(self, cache_dir, version):
+        """
+        Initialize the fold cache.
+
+        Parameters:
+        cache_dir (str): Directory holding one cache file per market data version
+        version (str): Market data version (see data_version)
+        """
+        self.path = os.path.join(cache_dir, f"{version}.json")
+        self.results = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.results = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Ignoring unreadable walk-forward cache %s: %s", self.path, e)
+
+    @staticmethod
+    def key(start_date, end_date, params, initial_capital, seed):
+        return f"{start_date}:{end_date}:{initial_capital}:{seed}:{params_key(params)}"
+
+    def get(self, start_date, end_date, params, initial_capital, seed):
+        return self.results.get(self.key(start_date, end_date, params, initial_capital, seed))
+
+    def put(self, start_date, end_date, params, initial_capital, seed, result):
+        self.results[self.key(start_date, end_date, params, initial_capital, seed)] = result
+
+    def save(self):
+        """Write the cache atomically."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.results, f)
+        os.replace(temp_path, self.path)
+
+
+def walk_forward(matrix, presets, train_years=10, test_years=2, objective='sharpe_ratio', grid=None,
+                 initial_capital=1000000, seed=SIMULATION_SEED, workers=None,
+                 cache_dir=os.path.join('data', 'walk_forward'), progress=None):
+    """
+    Run a walk-forward optimization.
+
+    Args:
+        matrix: PriceMatrix of the market history
+        presets: Mode name: parameters; the grid spans ranges around their
+            values (see parameter_grid) and each preset is also evaluated on
+            every test window
+        train_years: Length of each train window
+        test_years: Length of each test window (and the step between folds)
+        objective: Metric maximized on the train windows (one of OBJECTIVES)
+        grid: Parameter sets tried on the train windows (defaults to parameter_grid(presets))
+        initial_capital: Starting capital of every simulated window
+        seed: Seed for buy-candidate sampling in every simulated window
+        workers: Worker processes (defaults to the CPU count)
+        cache_dir: Directory of the fold result cache
+        progress: Callable receiving progress messages, or None
+
+    Returns:
+        The report: settings, and per fold the selected parameters with their
+        train score and the test results of the selection and the presets
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Invalid objective: {objective!r}")
+
+    version = data_version(matrix)
+    cache = FoldCache(cache_dir, version)
+    grid = grid or parameter_grid(presets)
+    folds = make_folds(matrix.dates, train_years, test_years)
+    workers = workers or os.cpu_count() or 1
+
+    if progress:
+        progress(f"{len(folds)} folds, {len(grid)} parameter sets, data version {version}")
+
+    def evaluate(executor, start_date, end_date, candidates):
+        """Results for every candidate on a window, simulating only cache misses."""
+        missing = [params for params in candidates
+                   if cache.get(start_date, end_date, params, initial_capital, seed) is None]
+        futures = [executor.submit(_simulate_task, start_date, end_date, params, initial_capital, seed)
+                   for params in missing]
+        for params, future in zip(missing, futures):
+            cache.put(start_date, end_date, params, initial_capital, seed, future.result())
+        if missing:
+            cache.save()
+        return [cache.get(start_date, end_date, params, initial_capital, seed) for params in candidates], len(missing)
+
+    report_folds = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matrix,)) as executor:
+        for number, (train_start, test_start, test_end) in enumerate(folds, start=1):
+            train_results, simulated = evaluate(executor, train_start, test_start, grid)
+            scores = np.array([result[objective] for result in train_results])
+            best = int(np.argmax(scores))
+            selected = grid[best]
+
+            preset_names = list(presets)
+            test_candidates = [selected] + [presets[name] for name in preset_names]
+            test_results, test_simulated = evaluate(executor, test_start, test_end, test_candidates)
+
+            report_folds.append({
+                'fold': number,
+                'train_window': [train_start, test_start],
+                'test_window': [test_start, test_end],
+                'selected_params': {field: selected[field] for field in PARAM_FIELDS},
+                'train_score': train_results[best][objective],
+                'test_results': test_results[0],
+                'presets_test_results': dict(zip(preset_names, test_results[1:]))
+            })
+
+            if progress:
+                progress(f"Fold {number}/{len(folds)} {test_start}..{test_end}: "
+                         f"{objective} train {train_results[best][objective]:.2f}, "
+                         f"test {test_results[0][objective]:.2f} "
+                         f"({simulated + test_simulated} simulated, "
+                         f"{len(grid) + len(test_candidates) - simulated - test_simulated} cached)")
+
+    return {
+        'data_version': version,
+        'objective': objective,
+        'train_years': train_years,
+        'test_years': test_years,
+        'grid_size': len(grid),
+        'folds': report_folds
+    }